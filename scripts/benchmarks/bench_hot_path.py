@@ -0,0 +1,397 @@
+# bench_hot_path.py
+"""Micro-benchmarks for the quad control hot path (plain timeit).
+
+Each benchmark is timed with timeit: autorange() picks a loop count that
+runs for at least 0.2 s, then the measurement is repeated --repeat times.
+Reported numbers are per call, in microseconds.
+
+Benchmarks that need hardware run against stand-ins:
+  - SPI    : afb2._spi_sim.RecorderTransport, SPI_PACKET_GAP_SEC = 0
+  - sensor : a local UDS datagram server answering like i2c_manager, and a
+             temporary shared-memory snapshot in i2c_manager's layout
+A benchmark whose dependencies are missing (numpy, cv2, flask) is reported
+as skipped instead of failing the whole run.
+
+Usage:
+    python3 bench_hot_path.py                          # print table
+    python3 bench_hot_path.py --json before.json       # save results
+    python3 bench_hot_path.py --json after.json --compare before.json
+    python3 bench_hot_path.py -k ik                    # only names containing "ik"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SCRIPTS / "package"))
+sys.path.insert(0, str(SCRIPTS / "lec_quad"))
+
+# Never touch a real SPI bus from a benchmark.
+os.environ["AFB_SPI_BACKEND"] = "recorder"
+
+# Same numbers as A_quad_api.GEO_DEFAULT (importing it pulls in afb2).
+GEO_ARGS = dict(A=48, B=64, C=114, Z_OFF=0, DZ_A0_A1=25.0)
+TARGET_XYZ = (60.0, 120.0, -50.0)
+
+Setup = Callable[[], Tuple[Callable[[], object], Optional[Callable[[], None]]]]
+BENCHMARKS: List[Tuple[str, Setup]] = []
+
+
+def bench(name: str):
+    """Register a setup function returning (fn, cleanup or None)."""
+
+    def deco(setup: Setup) -> Setup:
+        BENCHMARKS.append((name, setup))
+        return setup
+
+    return deco
+
+
+# -----------------------------
+# kinematics / calibration
+# -----------------------------
+@bench("ik_leg_a0_xyz")
+def _ik():
+    from A_ik_3dof_a0 import LegGeometry, ik_leg_a0_xyz
+
+    geo = LegGeometry(**GEO_ARGS)
+    x, y, z = TARGET_XYZ
+    return (lambda: ik_leg_a0_xyz(x, y, z, geo)), None
+
+
+@bench("fk_leg_a0")
+def _fk():
+    from A_ik_3dof_a0 import LegGeometry, fk_leg_a0, ik_leg_a0_xyz
+
+    geo = LegGeometry(**GEO_ARGS)
+    a0, a1, a2 = ik_leg_a0_xyz(*TARGET_XYZ, geo)
+    return (lambda: fk_leg_a0(a0, a1, a2, geo)), None
+
+
+@bench("Calibration.apply_one")
+def _apply_one():
+    from A_calib import load_calibration
+
+    calib = load_calibration(str(SCRIPTS / "lec_quad" / "calib_quad.json"))
+    return (lambda: calib.apply_one(4, 97.5)), None
+
+
+# -----------------------------
+# SPI path
+# -----------------------------
+@bench("_spi_bus.build_packet")
+def _build_packet():
+    from afb2 import _spi_bus
+
+    return (lambda: _spi_bus.build_packet(_spi_bus.CMD_SERVO_SET, [4, 97])), None
+
+
+@bench("_spi_bus.build_batch_packet[12]")
+def _build_batch_packet():
+    from afb2 import _spi_bus
+
+    pairs = [(ch, 90 + ch) for ch in range(12)]
+    return (lambda: _spi_bus.build_batch_packet(pairs)), None
+
+
+@bench("QuadLegAPI.set_leg_xyz (mock SPI)")
+def _set_leg_xyz():
+    import afb2
+    from afb2 import _spi_bus
+    from afb2._spi_sim import RecorderTransport
+    from A_quad_api import make_default_api
+
+    rec = RecorderTransport()
+    _spi_bus.set_transport(rec)
+    gap = _spi_bus.SPI_PACKET_GAP_SEC
+    _spi_bus.SPI_PACKET_GAP_SEC = 0.0  # measure CPU cost, not the STM32 pacing delay
+
+    api = make_default_api(enable_flask_stream=False)
+    # Alternate between two targets so delta suppression does not skip the writes.
+    x, y, z = TARGET_XYZ
+    targets = [(x, y, z), (x + 5.0, y, z + 5.0)]
+    state = {"i": 0}
+
+    def fn():
+        i = state["i"] = state["i"] ^ 1
+        api.set_leg_xyz(0, *targets[i])
+        if len(rec.frames) > 10000:
+            rec.clear()
+
+    def cleanup():
+        _spi_bus.SPI_PACKET_GAP_SEC = gap
+        afb2.quad.resetTxStats()
+
+    return fn, cleanup
+
+
+# -----------------------------
+# sensor IPC
+# -----------------------------
+class _StandInI2CServer:
+    """Answers datagrams like i2c_manager: JSON {"cmd":"get"/"caps"} and binary "AFBQ" requests.
+
+    Replies are encoded per request (as i2c_manager does), so the JSON and
+    binary round trips include the server-side encoding cost.
+    """
+
+    def __init__(self, path: str):
+        from afb2 import sensor
+
+        self.sensor = sensor
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(path)
+        self.sock.settimeout(0.2)
+        self.stop_event = threading.Event()
+        t = time.time()
+        self.payload = {
+            "ts": t,
+            "distance_mm": 123.0,
+            "distance_ts": t,
+            "distance_seq": 10,
+            "imu": {
+                "accel_m_s2": [0.1, 0.2, 9.8],
+                "gyro_rad_s": [0.01, 0.02, 0.03],
+                "temp_c": 31.5,
+                "ts": t,
+                "seq": 100,
+            },
+        }
+        self.values = sensor._ipc_dict_to_values(self.payload)
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def _reply(self, data: bytes) -> bytes:
+        sensor = self.sensor
+        if data[:4] == sensor._BIN_REQ_MAGIC:
+            _magic, version, _cmd, _reserved, rid = sensor._BIN_HEADER.unpack_from(data, 0)
+            header = sensor._BIN_HEADER.pack(sensor._BIN_RESP_MAGIC, version, 0, sensor._IPC_FIELDS.size, rid)
+            return header + sensor._IPC_FIELDS.pack(*self.values)
+
+        req = json.loads(data.decode("utf-8"))
+        if req.get("cmd") == "caps":
+            payload = {"caps": {"binary": list(sensor._BIN_VERSIONS)}}
+        else:
+            payload = dict(self.payload)
+        if "id" in req:
+            payload["id"] = req["id"]
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                data, addr = self.sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                self.sock.sendto(self._reply(data), addr)
+            except OSError:
+                pass
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def _uds_setup(read):
+    """Start a stand-in server and time read(sensor, path) against it."""
+    from afb2 import sensor
+
+    path = os.path.join(tempfile.mkdtemp(prefix="afb_bench_"), "i2c.sock")
+    server = _StandInI2CServer(path)
+
+    def fn():
+        if read(sensor, path) is None:
+            raise RuntimeError("stand-in server did not answer")
+
+    def cleanup():
+        server.close()
+        os.rmdir(os.path.dirname(path))
+
+    return fn, cleanup
+
+
+@bench("sensor._uds_rpc (stand-in server)")
+def _uds_rpc():
+    return _uds_setup(lambda sensor, path: sensor._uds_rpc({"cmd": "get"}, uds_path=path))
+
+
+@bench("sensor.snapshot (UDS, JSON)")
+def _uds_snapshot_json():
+    def read(sensor, path):
+        sensor.UDS_BINARY = False
+        try:
+            return sensor.snapshot(uds_path=path, shm_path=None)
+        finally:
+            sensor.UDS_BINARY = True
+
+    return _uds_setup(read)
+
+
+@bench("sensor.snapshot (UDS, binary)")
+def _uds_snapshot_binary():
+    return _uds_setup(lambda sensor, path: sensor.snapshot(uds_path=path, shm_path=None))
+
+
+def _shm_setup(read):
+    """Write a stand-in shared-memory snapshot and time read(sensor, path) against it."""
+    from afb2 import sensor
+
+    shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    fd, path = tempfile.mkstemp(prefix="afb_bench_", suffix=".shm", dir=shm_dir)
+    t = time.time()
+    body = (t, 123.0, t, 0.1, 0.2, 9.8, 0.01, 0.02, 0.03, 31.5, t, 10, 100)
+    with os.fdopen(fd, "wb") as f:
+        f.write(sensor._SHM_HEADER.pack(sensor._SHM_MAGIC, sensor._SHM_VERSION, 2))
+        f.write(sensor._IPC_FIELDS.pack(*body))
+    stale = sensor.SHM_STALE_SEC
+    sensor.SHM_STALE_SEC = 1e9  # the stand-in snapshot is never refreshed
+
+    def fn():
+        if read(sensor, path) is None:
+            raise RuntimeError("shared-memory snapshot not readable")
+
+    def cleanup():
+        sensor.SHM_STALE_SEC = stale
+        os.unlink(path)
+
+    return fn, cleanup
+
+
+@bench("sensor.mpu (shared memory)")
+def _shm_mpu():
+    return _shm_setup(lambda sensor, path: sensor.mpu(uds_path="/nonexistent", shm_path=path))
+
+
+@bench("sensor.snapshot (shared memory)")
+def _shm_snapshot():
+    return _shm_setup(lambda sensor, path: sensor.snapshot(uds_path="/nonexistent", shm_path=path))
+
+
+# -----------------------------
+# video streaming
+# -----------------------------
+@bench("flask.imshow (resize + JPEG)")
+def _imshow():
+    import numpy as np
+    import afb2
+
+    afb2.flask.server_started = True  # encode only, do not start the web server
+    h, w = 480, 640
+    yy, xx = np.mgrid[0:h, 0:w]
+    frame = np.stack([(xx * 255 // w), (yy * 255 // h), ((xx + yy) % 256)], axis=-1).astype(np.uint8)
+    return (lambda: afb2.flask.imshow("bench", frame, 0)), None
+
+
+# -----------------------------
+# runner
+# -----------------------------
+def run_one(setup: Setup, repeat: int) -> Dict[str, object]:
+    try:
+        fn, cleanup = setup()
+        fn()  # warm-up + fail fast
+    except Exception as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+
+    try:
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_us": min(runs),
+        "median_us": statistics.median(runs),
+        "mean_us": statistics.fmean(runs),
+        "stdev_us": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS, stderr=subprocess.DEVNULL, timeout=5
+        )
+        return out.decode().strip()
+    except Exception:
+        return None
+
+
+def print_table(results: Dict[str, Dict[str, object]], baseline: Optional[Dict[str, Dict[str, object]]] = None):
+    print(f"{'benchmark':<38} {'median us':>11} {'min us':>10} {'stdev':>8}" + ("   vs base" if baseline else ""))
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<38} skipped ({r['skipped']})")
+            continue
+        line = f"{name:<38} {r['median_us']:>11.2f} {r['min_us']:>10.2f} {r['stdev_us']:>8.2f}"
+        base = (baseline or {}).get(name)
+        if base and "median_us" in base:
+            change = (r["median_us"] / base["median_us"] - 1.0) * 100.0
+            line += f"   {change:+7.1f}%"
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Control hot path micro-benchmarks")
+    ap.add_argument("-k", dest="filter", default="", help="only run benchmarks whose name contains this")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--json", metavar="PATH", help="write results as JSON")
+    ap.add_argument("--compare", metavar="PATH", help="baseline JSON from an earlier run")
+    args = ap.parse_args()
+
+    results: Dict[str, Dict[str, object]] = {}
+    for name, setup in BENCHMARKS:
+        if args.filter and args.filter.lower() not in name.lower():
+            continue
+        results[name] = run_one(setup, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print_table(results, baseline)
+
+    if args.json:
+        doc = {
+            "meta": {
+                "git": _git_rev(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
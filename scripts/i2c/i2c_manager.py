@@ -5,13 +5,35 @@
   - INA219 (bus voltage / current / power)
   - VL53L1X (distance)
   - MPU6xxx (MPU6050/MPU6500-class) (accel / gyro / temp) [optional]
+    MPU_FIFO (off by default) samples it at MPU_FIFO_RATE_HZ on the MPU's own
+    clock and drains its FIFO in burst reads; each frame is a separate IMU
+    sample (seq / ring / push) with its own timestamp.
 - Displays on OLED:
   - Wi-Fi mode (STA/AP), SSID, IP
   - Battery percent (INA219 voltage-based)
 - IPC:
   - Unix Domain Socket (datagram) server: /run/afb_i2c.sock
-  - Request: JSON bytes (e.g. {"cmd":"get"})
-  - Response: JSON dict with latest cached readings
+  - Request: JSON bytes (e.g. {"cmd":"get"}, optional "id")
+  - Response: JSON dict with latest cached readings (+ the request "id", if any);
+    distance and IMU carry their own sample time and sequence number
+  - Binary protocol (same readings, fixed layout, no JSON encode/decode):
+    {"cmd":"caps"} answers {"caps":{"binary":[versions]}}; a client that sees
+    its version there sends "AFBQ" requests and gets "AFBR" replies (see
+    _BIN_*). Every request carries its version, so JSON-only clients and
+    older/newer binary clients keep working side by side.
+  - Push subscriptions: {"cmd":"subscribe","sensors":["imu","distance"],
+    "rate_hz":0,"lease_sec":5} from a bound client socket registers that
+    address; every new sample of those sensors is then sent to it as an
+    "AFBP" datagram (see _PUSH_*) with a per-subscription sequence number and
+    drop counter. Re-send subscribe to renew the lease; {"cmd":"unsubscribe"}
+    or an unreachable client ends it.
+  - IMU history: the last IMU_RING_SIZE IMU samples are kept in a ring buffer;
+    {"cmd":"history","since_seq":n} (or binary cmd _BIN_CMD_HISTORY) returns
+    every sample newer than n in one reply, so a slow consumer can still
+    integrate each one.
+  - Shared memory: /dev/shm/afb_i2c_cache, the same readings as fixed-layout
+    packed doubles guarded by a sequence counter (seqlock). afb2.sensor reads
+    it without a round trip and falls back to the UDS when it is missing/stale.
 
 This process should be started by systemd using the venv python:
   ExecStart=/home/pi/.afbvenv/bin/python3 .../i2c_manager.py
@@ -24,6 +46,8 @@ Notes:
 from __future__ import annotations
 
 import json
+import math
+import mmap
 import os
 import signal
 import socket
@@ -32,8 +56,10 @@ import threading
 import time
 import csv
 import getpass
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple
+import struct
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
 import board
 import busio
@@ -62,21 +88,49 @@ class _MPU6xxxCompat:
     - WHO_AM_I differs (MPU6050 -> 0x68, MPU6500 -> 0x70), and some libraries reject it.
 
     This reader supports both as long as the register map is compatible.
+
+    FIFO mode (enable_fifo / read_fifo): the chip samples on its own clock at
+    1 kHz / (1 + SMPLRT_DIV) and queues accel/temp/gyro frames in its FIFO;
+    read_fifo() drains every queued frame in one burst read.
     """
 
     # Registers
     _REG_WHO_AM_I = 0x75
     _REG_PWR_MGMT_1 = 0x6B
     _REG_ACCEL_XOUT_H = 0x3B
+    _REG_SMPLRT_DIV = 0x19
+    _REG_CONFIG = 0x1A
+    _REG_FIFO_EN = 0x23
+    _REG_USER_CTRL = 0x6A
+    _REG_FIFO_COUNTH = 0x72
+    _REG_FIFO_R_W = 0x74
+
+    _CONFIG_DLPF_184HZ = 0x01        # DLPF on -> 1 kHz internal sample clock (both parts)
+    _FIFO_EN_ACCEL_TEMP_GYRO = 0xF8  # TEMP | XG | YG | ZG | ACCEL
+    _USER_CTRL_FIFO_EN = 0x40
+    _USER_CTRL_FIFO_RESET = 0x04
+    _FIFO_SIZE = {0x68: 1024, 0x70: 512}  # bytes, by WHO_AM_I
+
+    # One FIFO frame = ACCEL_XOUT_H..GYRO_ZOUT_L in register order (big-endian int16)
+    _FRAME = struct.Struct(">7h")
+    _FIFO_COUNT = struct.Struct(">H")
 
     def __init__(self, i2c: busio.I2C, address: int = 0x68) -> None:
         self.i2c = i2c
         self.address = int(address)
 
+        self.fifo_period: Optional[float] = None  # seconds per FIFO sample, None = FIFO off
+        self.fifo_resets = 0
+        self._count_buf = bytearray(2)
+        self._frame_buf = bytearray(self._FRAME.size)
+        self._reg_accel = bytes([self._REG_ACCEL_XOUT_H])
+        self._repeated_start = hasattr(i2c, "writeto_then_readfrom")
+
         who = self._read_u8(self._REG_WHO_AM_I)
         # Accept common IDs: MPU6050(0x68), MPU6500(0x70). Keep it permissive.
         if who not in (0x68, 0x70):
             raise ValueError(f"Unsupported MPU WHO_AM_I=0x{who:02x} at 0x{self.address:02x}")
+        self.fifo_size = self._FIFO_SIZE[who]
 
         # Wake up device (clear sleep bit)
         self._write_u8(self._REG_PWR_MGMT_1, 0x00)
@@ -94,9 +148,14 @@ class _MPU6xxxCompat:
         a separate write+read.
         """
         out = bytearray(1)
+        self._read_into(reg, out)
+        return int(out[0])
+
+    def _read_into(self, reg: int, out: bytearray) -> None:
+        """Read len(out) consecutive bytes starting at reg in one transaction (see _read_u8)."""
         reg_b = bytes([reg & 0xFF])
 
-        if hasattr(self.i2c, "writeto_then_readfrom"):
+        if self._repeated_start:
             # Repeated-start (preferred)
             self.i2c.writeto_then_readfrom(self.address, reg_b, out)
         else:
@@ -104,48 +163,71 @@ class _MPU6xxxCompat:
             self.i2c.writeto(self.address, reg_b)
             self.i2c.readfrom_into(self.address, out)
 
-        return int(out[0])
-
-    @staticmethod
-    def _i16(msb: int, lsb: int) -> int:
-        v = ((msb & 0xFF) << 8) | (lsb & 0xFF)
-        return v - 65536 if v & 0x8000 else v
-
     def read(self) -> Tuple[Tuple[float, float, float], Tuple[float, float, float], float]:
-        """Return (accel_m_s2, gyro_rad_s, temp_c)."""
-        buf = bytearray(14)
-        reg_b = bytes([self._REG_ACCEL_XOUT_H])
-        if hasattr(self.i2c, "writeto_then_readfrom"):
-            self.i2c.writeto_then_readfrom(self.address, reg_b, buf)
+        """Return (accel_m_s2, gyro_rad_s, temp_c).
+
+        ACCEL_XOUT_H..GYRO_ZOUT_L (0x3B-0x48) are contiguous: one 14-byte
+        transaction into a preallocated buffer, decoded by one unpack.
+        """
+        buf = self._frame_buf
+        if self._repeated_start:
+            self.i2c.writeto_then_readfrom(self.address, self._reg_accel, buf)
         else:
-            self.i2c.writeto(self.address, reg_b)
+            self.i2c.writeto(self.address, self._reg_accel)
             self.i2c.readfrom_into(self.address, buf)
 
-        ax = self._i16(buf[0], buf[1])
-        ay = self._i16(buf[2], buf[3])
-        az = self._i16(buf[4], buf[5])
-        temp_raw = self._i16(buf[6], buf[7])
-        gx = self._i16(buf[8], buf[9])
-        gy = self._i16(buf[10], buf[11])
-        gz = self._i16(buf[12], buf[13])
-
-        # Assuming default ranges: accel +/-2g, gyro +/-250 dps
-        # Accel sensitivity: 16384 LSB/g
-        g_to_m_s2 = 9.80665
-        ax_m = (ax / 16384.0) * g_to_m_s2
-        ay_m = (ay / 16384.0) * g_to_m_s2
-        az_m = (az / 16384.0) * g_to_m_s2
-
-        # Gyro sensitivity: 131 LSB/(deg/s)
-        dps_to_rad_s = 3.141592653589793 / 180.0
-        gx_r = (gx / 131.0) * dps_to_rad_s
-        gy_r = (gy / 131.0) * dps_to_rad_s
-        gz_r = (gz / 131.0) * dps_to_rad_s
+        return self._scale(*self._FRAME.unpack(buf))
 
+    # Assuming default ranges: accel +/-2g (16384 LSB/g), gyro +/-250 dps (131 LSB/(deg/s))
+    _ACCEL_SCALE = 9.80665 / 16384.0
+    _GYRO_SCALE = (3.141592653589793 / 180.0) / 131.0
+
+    @classmethod
+    def _scale(cls, ax: int, ay: int, az: int, temp_raw: int, gx: int, gy: int, gz: int):
+        """Raw frame -> (accel_m_s2, gyro_rad_s, temp_c)."""
+        a = cls._ACCEL_SCALE
+        g = cls._GYRO_SCALE
         # Temperature in C: temp_raw/340 + 36.53
-        temp_c = (temp_raw / 340.0) + 36.53
+        return (ax * a, ay * a, az * a), (gx * g, gy * g, gz * g), (temp_raw / 340.0) + 36.53
+
+    def enable_fifo(self, rate_hz: float) -> float:
+        """Switch to FIFO mode at about rate_hz; returns the actual rate (1 kHz / (1 + div))."""
+        div = max(0, min(255, int(round(1000.0 / max(rate_hz, 1.0))) - 1))
+        self._write_u8(self._REG_CONFIG, self._CONFIG_DLPF_184HZ)
+        self._write_u8(self._REG_SMPLRT_DIV, div)
+        self._write_u8(self._REG_FIFO_EN, self._FIFO_EN_ACCEL_TEMP_GYRO)
+        self.fifo_period = (1 + div) / 1000.0
+        self.reset_fifo()
+        self.fifo_resets = 0
+        return 1.0 / self.fifo_period
+
+    def reset_fifo(self) -> None:
+        """Drop everything queued and restart frame alignment."""
+        self._write_u8(self._REG_USER_CTRL, self._USER_CTRL_FIFO_RESET)
+        self._write_u8(self._REG_USER_CTRL, self._USER_CTRL_FIFO_EN)
+        self.fifo_resets += 1
+
+    def read_fifo(self, max_samples: int = 64) -> Tuple[List[tuple], bool]:
+        """Drain queued frames, oldest first: ([(accel, gyro, temp_c), ...], overflowed).
+
+        A full FIFO has overwritten frames and lost its alignment, so it is
+        reset and ([], True) returned; the caller restarts its timeline.
+        """
+        self._read_into(self._REG_FIFO_COUNTH, self._count_buf)
+        count = self._FIFO_COUNT.unpack(self._count_buf)[0]
+        frame = self._FRAME.size
+        if count > self.fifo_size - frame:
+            self.reset_fifo()
+            return [], True
 
-        return (ax_m, ay_m, az_m), (gx_r, gy_r, gz_r), float(temp_c)
+        n = min(count // frame, max_samples)
+        if n <= 0:
+            return [], False
+
+        buf = bytearray(n * frame)
+        self._read_into(self._REG_FIFO_R_W, buf)  # FIFO_R_W does not auto-increment: one burst
+        scale = self._scale
+        return [scale(*raw) for raw in self._FRAME.iter_unpack(buf)], False
 
 
 # ----------------------------
@@ -154,6 +236,18 @@ class _MPU6xxxCompat:
 
 UDS_PATH = "/run/autoformbot/afb_i2c.sock"
 
+# Shared-memory snapshot of the IPC fields (see _ShmPublisher)
+SHM_PATH = "/dev/shm/afb_i2c_cache"
+
+# Push subscriptions
+SUB_MAX = 8                # subscribers at the same time
+SUB_LEASE_SEC = 5.0        # default lease; clients renew by re-sending subscribe
+SUB_LEASE_MAX_SEC = 60.0
+
+# IMU history ring buffer
+IMU_RING_SIZE = 512        # samples kept (~5 s at SENSOR_HZ_MPU, ~1 s with MPU_FIFO at 500 Hz)
+IMU_HISTORY_MAX = 256      # samples per history reply (a client behind by more asks again)
+
 OLED_WIDTH = 128
 OLED_HEIGHT = 32
 
@@ -162,6 +256,14 @@ OLED_HEIGHT = 32
 SENSOR_HZ_VL53 = 10.0  # Match VL53L1X timing_budget=100ms
 SENSOR_HZ_INA = 10.0
 SENSOR_HZ_MPU = 100.0
+
+# MPU FIFO mode: the MPU samples on its own clock into its FIFO and the loop
+# drains it in burst reads (higher rate, fewer bus transactions per sample,
+# evenly spaced timestamps). Off: one register read per SENSOR_HZ_MPU tick.
+MPU_FIFO = False
+MPU_FIFO_RATE_HZ = 500.0    # 1 kHz / (1 + SMPLRT_DIV): 1000, 500, 333, 250, 200, ...
+MPU_FIFO_DRAIN_HZ = 50.0    # burst reads per second (500 Hz -> ~10 frames / 140 bytes each)
+MPU_FIFO_RESYNC_SEC = 0.01  # re-anchor sample timestamps to the host clock beyond this drift
 OLED_HZ = 2.0
 
 # CSV logging
@@ -372,9 +474,13 @@ def estimate_battery_percent(bus_voltage_v: Optional[float]) -> Optional[int]:
 class SensorCache:
     ts: float = 0.0
     distance_mm: Optional[float] = None
+    distance_ts: float = 0.0  # time of the last new distance sample
+    distance_seq: int = 0     # +1 per new distance sample
     imu_accel_m_s2: Optional[Tuple[float, float, float]] = None
     imu_gyro_rad_s: Optional[Tuple[float, float, float]] = None
     imu_temp_c: Optional[float] = None
+    imu_ts: float = 0.0
+    imu_seq: int = 0
     bus_voltage_v: Optional[float] = None
     bus_voltage_v_raw: Optional[float] = None
     bus_voltage_v_filt: Optional[float] = None
@@ -409,13 +515,216 @@ class SensorCache:
         return {
             "ts": self.ts,
             "distance_mm": self.distance_mm,
+            "distance_ts": self.distance_ts,
+            "distance_seq": self.distance_seq,
             "imu": {
                 "accel_m_s2": self.imu_accel_m_s2,
                 "gyro_rad_s": self.imu_gyro_rad_s,
                 "temp_c": self.imu_temp_c,
+                "ts": self.imu_ts,
+                "seq": self.imu_seq,
             },
         }
 
+    def ipc_values(self) -> Tuple[Any, ...]:
+        """The to_ipc_dict() fields as a flat tuple for _IPC_FIELDS (None -> NaN)."""
+        accel = self.imu_accel_m_s2 or (None, None, None)
+        gyro = self.imu_gyro_rad_s or (None, None, None)
+        return (
+            float(self.ts),
+            _f(self.distance_mm),
+            float(self.distance_ts),
+            _f(accel[0]), _f(accel[1]), _f(accel[2]),
+            _f(gyro[0]), _f(gyro[1]), _f(gyro[2]),
+            _f(self.imu_temp_c),
+            float(self.imu_ts),
+            int(self.distance_seq),
+            int(self.imu_seq),
+        )
+
+
+# ----------------------------
+# Binary layouts (shared memory + binary UDS)
+# ----------------------------
+
+# Keep in sync with afb2/sensor.py (_IPC_FIELDS, _SHM_*, _BIN_*). Little-endian.
+#
+# IPC fields: ts, distance_mm, distance_ts, ax, ay, az, gx, gy, gz, temp_c, imu_ts
+#             (f64, NaN = None), distance_seq, imu_seq (u64)
+_IPC_FIELDS = struct.Struct("<11d2Q")
+
+# Shared memory: header (magic "AFBS", version u32, seq u64) + IPC fields
+_SHM_MAGIC = b"AFBS"
+_SHM_VERSION = 2
+_SHM_HEADER = struct.Struct("<4sIQ")
+_SHM_SEQ = struct.Struct("<Q")
+_SHM_SEQ_OFFSET = 8
+_SHM_SIZE = _SHM_HEADER.size + _IPC_FIELDS.size
+
+# Binary UDS: request  = magic "AFBQ", version u8, cmd u8, reserved u16, id u32
+#             response = magic "AFBR", version u8, status u8, body length u16, id u32
+#                        + IPC fields (status OK only)
+_BIN_REQ_MAGIC = b"AFBQ"
+_BIN_RESP_MAGIC = b"AFBR"
+_BIN_VERSIONS = (1,)
+_BIN_HEADER = struct.Struct("<4sBBHI")
+_BIN_CMD_GET = 0x01
+_BIN_CMD_HISTORY = 0x02    # request header + _BIN_HISTORY_REQ
+_BIN_OK = 0
+_BIN_BAD_VERSION = 1
+_BIN_BAD_CMD = 2
+_BIN_BAD_REQUEST = 3
+
+# History: request  = since_seq u64, max samples u16
+#          response = first_seq u64, count u32, lost u32 + count * _IMU_SAMPLE
+#          _IMU_SAMPLE = ts, ax, ay, az, gx, gy, gz, temp_c (f64, NaN = None); seq = first_seq + i
+_BIN_HISTORY_REQ = struct.Struct("<QH")
+_HISTORY_HEADER = struct.Struct("<QII")
+_IMU_SAMPLE = struct.Struct("<8d")
+
+# Push datagram: magic "AFBP", version u8, kind u8, reserved u16, push seq u32, dropped u32
+#                + IPC fields
+_PUSH_MAGIC = b"AFBP"
+_PUSH_VERSION = 1
+_PUSH_HEADER = struct.Struct("<4sBBHII")
+_PUSH_KINDS = {"distance": 1, "imu": 2}
+
+_NAN = float("nan")
+
+
+def _f(v: Any) -> float:
+    return _NAN if v is None else float(v)
+
+
+@dataclass
+class _Subscriber:
+    kinds: frozenset
+    min_interval: float  # s between pushes of one sensor (0 = every sample)
+    expires: float       # time.monotonic()
+    push_seq: int = 0    # +1 per push attempt (a gap at the client = lost sample)
+    dropped: int = 0     # pushes that did not fit in the client's socket buffer
+    last_push: Dict[int, float] = field(default_factory=dict)  # kind -> time.monotonic()
+
+
+class _ImuRing:
+    """Last `size` IMU samples in one flat array('d') (no per-sample objects).
+
+    Sample seq n lives in slot n % size as FIELDS doubles (_IMU_SAMPLE), so
+    a history reply is one or two slices of the array copied out as bytes.
+    """
+
+    FIELDS = 8  # ts, ax, ay, az, gx, gy, gz, temp_c
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, int(size))
+        self.buf = array("d", bytes(8 * self.FIELDS * self.size))
+        self.last_seq = 0  # newest sample (0 = empty); seqs start at 1
+
+    def append(self, seq: int, ts: float, accel: Tuple[float, float, float], gyro: Tuple[float, float, float], temp_c: Optional[float]) -> None:
+        b = self.buf
+        i = (seq % self.size) * self.FIELDS
+        b[i] = ts
+        b[i + 1], b[i + 2], b[i + 3] = accel
+        b[i + 4], b[i + 5], b[i + 6] = gyro
+        b[i + 7] = _f(temp_c)
+        self.last_seq = seq
+
+    def since(self, since_seq: int, max_n: int) -> Tuple[int, int, int, bytes]:
+        """(first_seq, count, lost, packed samples) for samples newer than since_seq, oldest first.
+
+        lost = samples after since_seq that already left the ring. A since_seq
+        ahead of the newest sample (i2c_manager restarted) starts over.
+        """
+        last = self.last_seq
+        oldest = max(1, last - self.size + 1)
+        if since_seq > last:
+            since_seq = 0
+        first = max(since_seq + 1, oldest)
+        lost = first - (since_seq + 1)
+        count = max(0, min(int(max_n), last - first + 1))
+        if count == 0:
+            return first, 0, lost, b""
+
+        f = self.FIELDS
+        i0 = (first % self.size) * f
+        i1 = i0 + count * f
+        if i1 <= len(self.buf):
+            return first, count, lost, self.buf[i0:i1].tobytes()
+        return first, count, lost, self.buf[i0:].tobytes() + self.buf[: i1 - len(self.buf)].tobytes()
+
+
+def _binary_reply(data: bytes, cache: "SensorCache", imu_ring: _ImuRing) -> bytes:
+    """Answer one binary request datagram (caller holds the lock guarding cache / imu_ring)."""
+    if len(data) < _BIN_HEADER.size:
+        return _BIN_HEADER.pack(_BIN_RESP_MAGIC, 0, _BIN_BAD_REQUEST, 0, 0)
+
+    _magic, version, cmd, _reserved, rid = _BIN_HEADER.unpack_from(data, 0)
+    if version not in _BIN_VERSIONS:
+        return _BIN_HEADER.pack(_BIN_RESP_MAGIC, version, _BIN_BAD_VERSION, 0, rid)
+
+    if cmd == _BIN_CMD_GET:
+        body = _IPC_FIELDS.pack(*cache.ipc_values())
+    elif cmd == _BIN_CMD_HISTORY:
+        if len(data) < _BIN_HEADER.size + _BIN_HISTORY_REQ.size:
+            return _BIN_HEADER.pack(_BIN_RESP_MAGIC, version, _BIN_BAD_REQUEST, 0, rid)
+        since_seq, max_n = _BIN_HISTORY_REQ.unpack_from(data, _BIN_HEADER.size)
+        first, count, lost, samples = imu_ring.since(since_seq, min(max_n, IMU_HISTORY_MAX))
+        body = _HISTORY_HEADER.pack(first, count, lost) + samples
+    else:
+        return _BIN_HEADER.pack(_BIN_RESP_MAGIC, version, _BIN_BAD_CMD, 0, rid)
+
+    return _BIN_HEADER.pack(_BIN_RESP_MAGIC, version, _BIN_OK, len(body), rid) + body
+
+
+# ----------------------------
+# Shared-memory publisher
+# ----------------------------
+
+
+class _ShmPublisher:
+    """Single writer of the shared-memory sensor snapshot (seqlock).
+
+    publish() makes the sequence counter odd, writes the body, then makes it
+    even again. A reader copies the body between two reads of the counter and
+    retries if they differ or are odd, so it never needs a lock or a syscall.
+
+    The file is reused across restarts (same inode), so readers that already
+    mapped it keep working; close() publishes an empty snapshot (ts = 0),
+    which readers treat as stale.
+    """
+
+    def __init__(self, path: str) -> None:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, _SHM_SIZE)
+            try:
+                os.fchmod(fd, 0o644)
+            except Exception:
+                pass
+            self.mm = mmap.mmap(fd, _SHM_SIZE)
+        finally:
+            os.close(fd)
+
+        self.path = path
+        self.seq = (_SHM_SEQ.unpack_from(self.mm, _SHM_SEQ_OFFSET)[0] + 1) & ~1  # keep counting up
+        _SHM_HEADER.pack_into(self.mm, 0, _SHM_MAGIC, _SHM_VERSION, self.seq)
+
+    def publish(self, c: "SensorCache") -> None:
+        """Write the IPC fields of c. Caller holds I2CManager.lock (single writer)."""
+        values = c.ipc_values()
+
+        self.seq += 1
+        _SHM_SEQ.pack_into(self.mm, _SHM_SEQ_OFFSET, self.seq)  # odd: write in progress
+        _IPC_FIELDS.pack_into(self.mm, _SHM_HEADER.size, *values)
+        self.seq += 1
+        _SHM_SEQ.pack_into(self.mm, _SHM_SEQ_OFFSET, self.seq)  # even: consistent
+
+    def close(self) -> None:
+        try:
+            self.publish(SensorCache())
+        finally:
+            self.mm.close()
+
 
 # ----------------------------
 # Main I2C manager
@@ -479,6 +788,12 @@ class I2CManager:
         except Exception:
             self.mpu = None
 
+        if self.mpu is not None and MPU_FIFO:
+            try:
+                self.mpu.enable_fifo(MPU_FIFO_RATE_HZ)
+            except Exception:
+                self.mpu.fifo_period = None  # stay on register polling
+
         self.oled = adafruit_ssd1306.SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, self.i2c)
         self.oled.fill(0)
         self.oled.show()
@@ -517,6 +832,25 @@ class I2CManager:
         except Exception:
             pass
 
+        # Shared-memory snapshot (optional: UDS keeps working without it)
+        self.shm: Optional[_ShmPublisher] = None
+        try:
+            self.shm = _ShmPublisher(SHM_PATH)
+        except Exception as e:
+            print(f"[i2c_manager] shared memory disabled ({SHM_PATH}): {e}", flush=True)
+            self.shm = None
+
+        # Push subscriptions: client address -> _Subscriber.
+        # Pushes go out on their own non-blocking socket so a slow client
+        # can never stall a sensor loop (a full buffer counts as dropped).
+        self._subs: Dict[Any, _Subscriber] = {}
+        self._subs_lock = threading.Lock()
+        self.push_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.push_sock.setblocking(False)
+
+        # IMU history (guarded by self.lock, like the cache)
+        self.imu_ring = _ImuRing(IMU_RING_SIZE)
+
         # EMA state for battery voltage smoothing
         self._bus_v_ema: Optional[float] = None
 
@@ -574,12 +908,24 @@ class I2CManager:
         except Exception:
             pass
 
-        # Close UDS socket and remove socket file
+        # Mark the shared-memory snapshot stale (file is kept for the next start)
+        if self.shm is not None:
+            try:
+                self.shm.close()
+            except Exception:
+                pass
+
+        # Close UDS sockets and remove socket file
         try:
             self.sock.close()
         except Exception:
             pass
 
+        try:
+            self.push_sock.close()
+        except Exception:
+            pass
+
         try:
             if os.path.exists(UDS_PATH):
                 os.unlink(UDS_PATH)
@@ -722,6 +1068,91 @@ class I2CManager:
             dt = time.time() - t0
             time.sleep(max(0.0, period - dt))
 
+    def _publish_locked(self) -> None:
+        """Copy the IPC fields into shared memory. Call with self.lock held."""
+        if self.shm is None:
+            return
+        try:
+            self.shm.publish(self.cache)
+        except Exception:
+            pass
+
+    def _subscribe(self, req: Dict[str, Any], addr: Any) -> Dict[str, Any]:
+        """Register / renew a push subscription for the client at addr."""
+        if not addr:
+            return {"error": "subscribe needs a bound client socket"}
+
+        names = req.get("sensors", ["imu"])
+        if isinstance(names, str):
+            names = [names]
+        unknown = [n for n in names if n not in _PUSH_KINDS]
+        if unknown or not names:
+            return {"error": f"unknown sensors: {unknown}"}
+
+        try:
+            rate_hz = max(0.0, float(req.get("rate_hz", 0.0)))
+            lease = min(SUB_LEASE_MAX_SEC, max(0.5, float(req.get("lease_sec", SUB_LEASE_SEC))))
+        except (TypeError, ValueError):
+            return {"error": "bad rate_hz / lease_sec"}
+
+        expires = time.monotonic() + lease
+        with self._subs_lock:
+            sub = self._subs.get(addr)
+            if sub is None:
+                if len(self._subs) >= SUB_MAX:
+                    return {"error": "too many subscribers"}
+                sub = self._subs[addr] = _Subscriber(kinds=frozenset(), min_interval=0.0, expires=expires)
+            sub.kinds = frozenset(_PUSH_KINDS[n] for n in names)
+            sub.min_interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+            sub.expires = expires
+
+        return {"subscribed": {"sensors": list(names), "rate_hz": rate_hz, "lease_sec": lease, "push": _PUSH_VERSION}}
+
+    def _unsubscribe(self, addr: Any) -> Dict[str, Any]:
+        with self._subs_lock:
+            return {"unsubscribed": self._subs.pop(addr, None) is not None}
+
+    def _history_json(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON form of the IMU history reply (binary clients use _BIN_CMD_HISTORY)."""
+        try:
+            since_seq = max(0, int(req.get("since_seq", 0)))
+            max_n = min(IMU_HISTORY_MAX, max(0, int(req.get("max", IMU_HISTORY_MAX))))
+        except (TypeError, ValueError):
+            return {"error": "bad since_seq / max"}
+
+        with self.lock:
+            first, count, lost, samples = self.imu_ring.since(since_seq, max_n)
+
+        rows = [[None if math.isnan(v) else v for v in row] for row in _IMU_SAMPLE.iter_unpack(samples)]
+        return {"imu_history": {"first_seq": first, "count": count, "lost": lost, "samples": rows}}
+
+    def _push(self, kind: int, values: Tuple[Any, ...]) -> None:
+        """Send one new sample to its subscribers (called by the sensor loops, without self.lock)."""
+        if not self._subs:
+            return
+
+        now = time.monotonic()
+        body = _IPC_FIELDS.pack(*values)
+        with self._subs_lock:
+            for addr, sub in list(self._subs.items()):
+                if now >= sub.expires:
+                    del self._subs[addr]  # lease not renewed
+                    continue
+                if kind not in sub.kinds:
+                    continue
+                if sub.min_interval and now - sub.last_push.get(kind, 0.0) < sub.min_interval:
+                    continue
+
+                sub.push_seq = (sub.push_seq + 1) & 0xFFFFFFFF
+                header = _PUSH_HEADER.pack(_PUSH_MAGIC, _PUSH_VERSION, kind, 0, sub.push_seq, sub.dropped)
+                try:
+                    self.push_sock.sendto(header + body, addr)
+                    sub.last_push[kind] = now
+                except BlockingIOError:
+                    sub.dropped += 1
+                except OSError:
+                    del self._subs[addr]  # client socket closed
+
     # ------------------------
     # Worker loops
     # ------------------------
@@ -732,6 +1163,7 @@ class I2CManager:
             t0 = time.time()
 
             dist = None
+            fresh = False  # a new measurement (not a repeat of the last one)
 
             if self.tof is not None:
                 try:
@@ -740,6 +1172,7 @@ class I2CManager:
                         d_mm = int(self.tof.range)
                         dist = d_mm
                         self._last_distance_mm = dist
+                        fresh = True
 
                     elif self.tof_kind == "l1x":
                         # VL53L1X: distance is reported in cm
@@ -752,6 +1185,7 @@ class I2CManager:
                             if d_cm is not None:
                                 dist = int(d_cm) * 10
                                 self._last_distance_mm = dist
+                                fresh = True
                             else:
                                 dist = None
                         else:
@@ -765,12 +1199,24 @@ class I2CManager:
             with self.lock:
                 self.cache.distance_mm = dist
                 self.cache.ts = time.time()
+                if fresh:
+                    self.cache.distance_ts = self.cache.ts
+                    self.cache.distance_seq += 1
+                    values = self.cache.ipc_values()
+                self._publish_locked()
+
+            if fresh:
+                self._push(_PUSH_KINDS["distance"], values)
 
             dt = time.time() - t0
             time.sleep(max(0.0, period - dt))
 
     def _loop_mpu6050(self) -> None:
         """Read MPU6050 at a higher rate and cache the latest values."""
+        if self.mpu is not None and self.mpu.fifo_period is not None:
+            self._loop_mpu_fifo()
+            return
+
         period = 1.0 / max(SENSOR_HZ_MPU, 1.0)
         while not self.stop_event.is_set():
             t0 = time.time()
@@ -797,10 +1243,89 @@ class I2CManager:
                 # Do not overwrite ts too aggressively if IMU is absent
                 if self.mpu is not None:
                     self.cache.ts = time.time()
+                if accel is not None:
+                    self.cache.imu_ts = self.cache.ts
+                    self.cache.imu_seq += 1
+                    self.imu_ring.append(self.cache.imu_seq, self.cache.imu_ts, accel, gyro, temp_c)
+                    values = self.cache.ipc_values()
+                self._publish_locked()
+
+            if accel is not None:
+                self._push(_PUSH_KINDS["imu"], values)
 
             dt = time.time() - t0
             time.sleep(max(0.0, period - dt))
 
+    def _loop_mpu_fifo(self) -> None:
+        """Drain the MPU FIFO in bursts; every frame becomes one IMU sample.
+
+        Frames are evenly spaced by the MPU's sample clock, so timestamps
+        continue from the previous burst (fifo_period apart) and are only
+        re-anchored to the host clock after an overflow/error or when they
+        drift more than MPU_FIFO_RESYNC_SEC from it.
+        """
+        mpu = self.mpu
+        sample_period = mpu.fifo_period
+        period = 1.0 / max(MPU_FIFO_DRAIN_HZ, 1.0)
+        # Never leave more than half the FIFO behind in one drain
+        max_samples = max(1, mpu.fifo_size // (2 * mpu._FRAME.size))
+        resync = max(MPU_FIFO_RESYNC_SEC, 2 * sample_period)
+        next_ts: Optional[float] = None
+
+        while not self.stop_event.is_set():
+            t0 = time.time()
+
+            try:
+                samples, overflowed = mpu.read_fifo(max_samples)
+                error = False
+            except Exception:
+                samples, overflowed, error = [], True, True
+                try:
+                    mpu.reset_fifo()
+                except Exception:
+                    pass
+            if overflowed:
+                next_ts = None
+
+            pushes = []
+            if samples:
+                now = time.time()
+                n = len(samples)
+                # The newest frame was taken 0..1 sample periods before now
+                drift = now - (next_ts + (n - 1) * sample_period) if next_ts is not None else None
+                if drift is None or not (-sample_period <= drift <= resync):
+                    next_ts = now - (n - 0.5) * sample_period
+
+                with self.lock:
+                    c = self.cache
+                    for accel, gyro, temp_c in samples:
+                        c.imu_accel_m_s2 = accel
+                        c.imu_gyro_rad_s = gyro
+                        c.imu_temp_c = temp_c
+                        c.imu_ts = next_ts
+                        c.imu_seq += 1
+                        self.imu_ring.append(c.imu_seq, next_ts, accel, gyro, temp_c)
+                        pushes.append(c.ipc_values())
+                        next_ts += sample_period
+                    c.ts = now
+                    self._publish_locked()
+
+            elif error:
+                with self.lock:
+                    self.cache.imu_accel_m_s2 = None
+                    self.cache.imu_gyro_rad_s = None
+                    self.cache.imu_temp_c = None
+                    self.cache.ts = time.time()
+                    self._publish_locked()
+
+            for values in pushes:
+                self._push(_PUSH_KINDS["imu"], values)
+
+            dt = time.time() - t0
+            # More frames still queued (hit max_samples): drain again right away
+            if len(samples) < max_samples:
+                time.sleep(max(0.0, period - dt))
+
     def _loop_ina219(self) -> None:
         period = 1.0 / max(SENSOR_HZ_INA, 1.0)
         while not self.stop_event.is_set():
@@ -843,6 +1368,7 @@ class I2CManager:
                 self.cache.power_mW = p_mW
                 self.cache.battery_percent = batt_pct
                 self.cache.ts = time.time()
+                self._publish_locked()
 
             dt = time.time() - t0
             time.sleep(max(0.0, period - dt))
@@ -860,6 +1386,7 @@ class I2CManager:
                 self.cache.ssid = ssid
                 self.cache.ip = ip
                 self.cache.ts = time.time()
+                self._publish_locked()
 
             dt = time.time() - t0
             time.sleep(max(0.0, period - dt))
@@ -919,6 +1446,16 @@ class I2CManager:
             except Exception:
                 continue
 
+            # Binary request: fixed-layout reply, no JSON
+            if data[:4] == _BIN_REQ_MAGIC:
+                with self.lock:
+                    resp = _binary_reply(data, self.cache, self.imu_ring)
+                try:
+                    self.sock.sendto(resp, addr)
+                except Exception:
+                    pass
+                continue
+
             # Default response
             with self.lock:
                 payload = self.cache.to_ipc_dict()
@@ -927,8 +1464,19 @@ class I2CManager:
             try:
                 req = json.loads(data.decode("utf-8", errors="replace")) if data else {}
                 cmd = req.get("cmd", "get")
-                if cmd != "get":
+                if cmd == "caps":
+                    payload = {"caps": {"binary": list(_BIN_VERSIONS), "push": [_PUSH_VERSION]}}
+                elif cmd == "subscribe":
+                    payload = self._subscribe(req, addr)
+                elif cmd == "unsubscribe":
+                    payload = self._unsubscribe(addr)
+                elif cmd == "history":
+                    payload = self._history_json(req)
+                elif cmd != "get":
                     payload["error"] = f"unknown cmd: {cmd}"
+                if "id" in req:
+                    # Echo the request id so a reused client socket can match replies.
+                    payload["id"] = req["id"]
             except Exception:
                 payload["error"] = "bad request"
 
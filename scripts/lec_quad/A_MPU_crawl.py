@@ -23,11 +23,13 @@ import math
 import select
 import termios
 import tty
+import threading
 import afb2
 from dataclasses import dataclass
 from typing import Dict, Tuple
 
 from A_quad_api import make_default_api
+from A_tick_scheduler import TickScheduler
 from A_ik_3dof_a0 import IKError
 
 
@@ -87,6 +89,8 @@ IMU_STANCE_ASSIST_MAX_DZ = 8.0     # mm clamp during stance assist (start small)
 IMU_ALPHA = 0.99          # higher -> trust gyro more (less accel noise)
 IMU_CALIB_SEC = 2.0       # seconds of gyro bias averaging at startup
 IMU_PRINT_HZ = 5.0        # how often to print roll/pitch (Hz)
+IMU_USE_SUBSCRIPTION = True  # filter every sample pushed by i2c_manager (also during crawl_step); False = poll mpu() per loop
+IMU_FIRST_SAMPLE_SEC = 1.0   # wait this long for the first pushed sample, else fall back to polling
 
 # ---- Gait debug logging ----
 GAIT_DEBUG_ENABLE = True
@@ -103,6 +107,7 @@ IMU_G_MAX = 11.5          # m/s^2, upper bound to consider accel tilt reliable
 # Timing
 MOVE_DT = 0.01                     # 100 Hz tick (used by stand IMU stabilization and interpolation)
 # MOVE_DT = 0.04                     # 25 Hz interpolation
+TICK_POLICY = "skip"               # on overrun: "skip" frames (keep phase duration) or "catchup" (see A_tick_scheduler)
 PHASE_T = 0.2                     # seconds for each phase (shift/lift/swing/down/unshift)
 # PHASE_T = 0.45                     # seconds for each phase (shift/lift/swing/down/unshift)
 IDLE_HOLD = 0.35                   # if no key within this time -> cmd becomes 0 (stop)
@@ -200,6 +205,7 @@ class IMUComplementary:
         self.roll = 0.0
         self.pitch = 0.0
         self._t_prev: float | None = None
+        self.last_sample: tuple[float, float, float, float, float, float] | None = None  # (ax, ay, az, gx, gy, gz)
 
     def calibrate_gyro(self, seconds: float = IMU_CALIB_SEC, sample_hz: float = 200.0):
         """Estimate gyro bias while robot is stationary."""
@@ -271,6 +277,17 @@ class IMUComplementary:
         ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
         return self.update(ax, ay, az, gx, gy, gz)
 
+    def update_from_snapshot(self, snap) -> tuple[float, float] | None:
+        """Update from an afb2.sensor.SensorSnapshot (e.g. a Subscription sample).
+
+        Uses the sample time (snap.imu_ts) for dt, so the filter sees the real
+        100 Hz spacing instead of the time this process happened to read it.
+        """
+        if snap.accel_m_s2 is None or snap.gyro_rad_s is None:
+            return None
+        self.last_sample = (*snap.accel_m_s2, *snap.gyro_rad_s)
+        return self.update(*self.last_sample, now=snap.imu_ts)
+
 
 # -------------------------
 # Non-blocking keyboard reader (WASD/QE)
@@ -348,19 +365,49 @@ class CrawlDriver:
         self._dbg_last_t = 0.0
         self._dbg_dt = 1.0 / max(0.1, GAIT_DEBUG_HZ)
 
+        # Fixed-rate ticks on absolute deadlines: IK/SPI/IMU time is not added to MOVE_DT.
+        self.sched = TickScheduler(MOVE_DT, policy=TICK_POLICY)
+
+    def _next_step(self, s: int, steps: int) -> int:
+        """Advance an interpolation index after one tick; the final frame (s == steps) is always sent."""
+        k = self.sched.tick()
+        if s >= steps:
+            return steps + 1
+        return min(s + k, steps)
+
     def _try_set_leg_xyz(self, leg_id: int, x: float, y: float, z: float) -> bool:
         """Set one leg target; return False if IK is unreachable."""
         try:
-            self.api.set_leg_xyz(leg_id, x, y, z, debug=False)
-            return True
+            with self.sched.phase("ik"):
+                angles = self.api.solve_legs_xyz({leg_id: (x, y, z)}, debug=False)
         except IKError as e:
             print(f"[IKError] leg={leg_id} target=({x:.1f},{y:.1f},{z:.1f}) -> {e}")
             return False
+        with self.sched.phase("spi"):
+            self.api.send_angles(angles)
+        return True
+
+    def _try_set_legs_xyz(self, targets: Dict[int, Tuple[float, float, float]]) -> bool:
+        """Set several legs in one batched servo update; return False if any IK is unreachable.
+
+        Nothing is sent when one of the targets is unreachable.
+        """
+        try:
+            with self.sched.phase("ik"):
+                angles = self.api.solve_legs_xyz(targets, debug=False)
+        except IKError as e:
+            tgt = " ".join(f"{leg_id}:({x:.1f},{y:.1f},{z:.1f})" for leg_id, (x, y, z) in targets.items())
+            print(f"[IKError] targets={tgt} -> {e}")
+            return False
+        with self.sched.phase("spi"):
+            self.api.send_angles(angles)
+        return True
 
     def set_pose(self, leg_id: int, x: float, y: float, z: float, duration: float) -> bool:
         x0, y0, z0 = self.foot[leg_id]
         steps = max(1, int(duration / MOVE_DT))
-        for i in range(steps + 1):
+        i = 0
+        while i <= steps:
             u = i / steps
             ue = smoothstep(u)
             xi = lerp(x0, x, ue)
@@ -368,7 +415,7 @@ class CrawlDriver:
             zi = lerp(z0, z, ue)
             if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
                 return False
-            time.sleep(MOVE_DT)
+            i = self._next_step(i, steps)
         self.foot[leg_id] = (x, y, z)
         return True
 
@@ -378,26 +425,29 @@ class CrawlDriver:
         x0 = {i: self.foot[i][0] for i in (0, 1, 2, 3)}
         y0 = {i: self.foot[i][1] for i in (0, 1, 2, 3)}
         z0 = {i: self.foot[i][2] for i in (0, 1, 2, 3)}
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 xi = lerp(x0[leg_id], x, ue)
                 yi = lerp(y0[leg_id], y, ue)
                 zi = lerp(z0[leg_id], z, ue)
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    return False
-            time.sleep(MOVE_DT)
+                frame[leg_id] = (xi, yi, zi)
+            if not self._try_set_legs_xyz(frame):
+                return False
+            s = self._next_step(s, steps)
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = (x, y, z)
         return True
 
     def set_targets(self, targets: Dict[int, Tuple[float, float, float]]) -> bool:
-        """Set multiple legs to explicit (x,y,z) targets (no interpolation)."""
-        ok = True
-        for leg_id, (x, y, z) in targets.items():
-            if not self._try_set_leg_xyz(leg_id, x, y, z):
-                ok = False
+        """Set multiple legs to explicit (x,y,z) targets (no interpolation).
+
+        All legs go out in one batched update; nothing is sent if any target is unreachable.
+        """
+        ok = self._try_set_legs_xyz(targets)
         if ok:
             for leg_id, xyz in targets.items():
                 self.foot[leg_id] = xyz
@@ -638,18 +688,21 @@ class CrawlDriver:
         # interpolate simultaneously
         steps = max(1, int(duration / MOVE_DT))
         start = {i: self.foot[i] for i in (0, 1, 2, 3)}
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 x0, y0, z0 = start[leg_id]
                 xt, yt, zt = targets[leg_id]
                 xi = lerp(x0, xt, ue)
                 yi = lerp(y0, yt, ue)
                 zi = lerp(z0, zt, ue)
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    return
-            time.sleep(MOVE_DT)
+                frame[leg_id] = (xi, yi, zi)
+            if not self._try_set_legs_xyz(frame):
+                return
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = targets[leg_id]
@@ -707,7 +760,7 @@ class CrawlDriver:
                 )
                 self.set_targets(targets)
                 self.dbg_gait("SHIFT_IMU", swing_leg, cmd, dbg=dbg)
-                time.sleep(MOVE_DT)
+                self.sched.tick()
 
         # 2) LIFT swing leg (only z)
         # While lifting, apply IMU z-compensation to STANCE legs (support legs) to reduce tipping.
@@ -721,7 +774,8 @@ class CrawlDriver:
             self._imu_dz_state_stance = {0: 0.0, 1: 0.0, 2: 0.0, 3: 0.0}
 
         self.dbg_gait("LIFT", swing_leg, cmd)
-        for s in range(steps_lift + 1):
+        s = 0
+        while s <= steps_lift:
             u = s / steps_lift
             ue = smoothstep(u)
 
@@ -744,7 +798,7 @@ class CrawlDriver:
                 self.set_targets(targets_sup)
                 self.dbg_gait("LIFT_IMU", swing_leg, cmd, dbg=dbg_sup)
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps_lift)
 
         # finalize swing leg state after lift
         self.foot[swing_leg] = (x0, y0, z_lift)
@@ -770,7 +824,8 @@ class CrawlDriver:
         z_ref_swing: Dict[int, float] = {}
 
         self.dbg_gait("SWING", swing_leg, cmd)
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
@@ -828,7 +883,7 @@ class CrawlDriver:
                         self.go_stand(duration=0.3)
                         return
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         self.foot[swing_leg] = swing_target
         for leg_id in support:
@@ -855,18 +910,21 @@ class CrawlDriver:
             _, y_cur, _ = self.foot[leg_id]
             y_target[leg_id] = y_cur - dy_local_shift
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 x0, y0, z0 = start[leg_id]
                 xi = x0
                 yi = lerp(y0, y_target[leg_id], ue)
                 zi = lerp(z0, sz, ue)
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    self.go_stand(duration=0.3)
-                    return
-            time.sleep(MOVE_DT)
+                frame[leg_id] = (xi, yi, zi)
+            if not self._try_set_legs_xyz(frame):
+                self.go_stand(duration=0.3)
+                return
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             x0, _, _ = self.foot[leg_id]
@@ -891,12 +949,41 @@ def main():
     print(f"[IMU] Gyro bias: gx={imu.gx_bias:+.4f} gy={imu.gy_bias:+.4f} gz={imu.gz_bias:+.4f} (rad/s)")
     print("[IMU] roll/pitch sign: roll>0 right-down, pitch>0 front-down")
 
+    global IMU_LATEST_ROLL_DEG, IMU_LATEST_PITCH_DEG, IMU_ZERO_ROLL_DEG, IMU_ZERO_PITCH_DEG
+
+    # Push stream: the filter runs on every IMU sample as it is produced,
+    # so IMU_LATEST_* stay current while crawl_step() is blocking the main loop.
+    # While subscribed, only the callback thread touches the filter state.
+    imu_sub = None
+    if IMU_USE_SUBSCRIPTION:
+        imu_first = threading.Event()
+
+        def _on_imu_sample(snap):
+            global IMU_LATEST_ROLL_DEG, IMU_LATEST_PITCH_DEG
+            rp = imu.update_from_snapshot(snap)
+            if rp is not None:
+                IMU_LATEST_ROLL_DEG = rad2deg(rp[0])
+                IMU_LATEST_PITCH_DEG = rad2deg(rp[1])
+                imu_first.set()
+
+        try:
+            imu_sub = afb2.sensor.Subscription(("imu",), callback=_on_imu_sample)
+        except Exception as e:
+            print(f"[IMU] Subscription unavailable ({e}), polling afb2.sensor.mpu()")
+
+        if imu_sub is not None:
+            # The zero reference below needs a measured attitude, not the filter's initial value
+            if imu_first.wait(IMU_FIRST_SAMPLE_SEC):
+                print("[IMU] Subscribed to i2c_manager IMU stream")
+            else:
+                print(f"[IMU] No pushed sample within {IMU_FIRST_SAMPLE_SEC:.1f}s, polling afb2.sensor.mpu()")
+                imu_sub.close()
+                imu_sub = None
+
     print("[INFO] Stand pose:", STAND_XYZ)
     print("[INFO] Keys: W/S/A/D/Q/E, other = stop. Ctrl+C to exit.")
     drv.go_stand(duration=0.6)
 
-    global IMU_LATEST_ROLL_DEG, IMU_LATEST_PITCH_DEG, IMU_ZERO_ROLL_DEG, IMU_ZERO_PITCH_DEG
-
     cmd = Cmd(0, 0, 0)
     last_key_t = 0.0
 
@@ -910,8 +997,11 @@ def main():
     s_pitch = 0.0
     n0 = 0
     while (time.time() - t0) < IMU_ZERO_SEC:
-        ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
-        r, p = imu.update(ax, ay, az, gx, gy, gz, now=time.time())
+        if imu_sub is not None:
+            r, p = imu.roll, imu.pitch
+        else:
+            ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
+            r, p = imu.update(ax, ay, az, gx, gy, gz, now=time.time())
         s_roll += rad2deg(r)
         s_pitch += rad2deg(p)
         n0 += 1
@@ -935,10 +1025,15 @@ def main():
                 now = time.time()
 
                 # Read MPU once per loop, use the same sample for filter + debug
-                ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
-                roll, pitch = imu.update(ax, ay, az, gx, gy, gz, now=now)
-                IMU_LATEST_ROLL_DEG = rad2deg(roll)
-                IMU_LATEST_PITCH_DEG = rad2deg(pitch)
+                # (subscribed: the filter is already up to date, reuse its last sample)
+                if imu_sub is not None:
+                    ax, ay, az, gx, gy, gz = imu.last_sample
+                    roll, pitch = imu.roll, imu.pitch
+                else:
+                    ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
+                    roll, pitch = imu.update(ax, ay, az, gx, gy, gz, now=now)
+                    IMU_LATEST_ROLL_DEG = rad2deg(roll)
+                    IMU_LATEST_PITCH_DEG = rad2deg(pitch)
 
                 # Debug: compute accel-only tilt and gating status from the SAME sample
                 amag = (ax * ax + ay * ay + az * az) ** 0.5
@@ -984,7 +1079,7 @@ def main():
                             info = legs.get(leg_id, {})
                             # print(f"[STAB] leg{leg_id} dz_cmd={info.get('dz_cmd', 0.0):+5.2f} dz_s={info.get('dz_s', 0.0):+5.2f}")
 
-                    time.sleep(MOVE_DT)
+                    drv.sched.tick()
                 else:
                     # execute one crawl step
                     drv.crawl_step(cmd)
@@ -993,6 +1088,10 @@ def main():
         except KeyboardInterrupt:
             print("\n[CTRL+C] Exit")
         finally:
+            if imu_sub is not None:
+                print(f"[IMU] stream: {imu_sub.stats()}")
+                imu_sub.close()
+            print(drv.sched.report())
             drv.shutdown()
 
 
@@ -1,8 +1,13 @@
 # calib.py
 import json
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # apply_all() falls back to apply_one() without numpy
+    np = None
 
 
 def clamp(x: float, lo: float, hi: float) -> float:
@@ -17,6 +22,10 @@ class Calibration:
     min_deg: List[float]
     max_deg: List[float]
 
+    # apply_all()용으로 위 리스트들을 numpy 배열로 바꿔 둔 것 (처음 호출 시 생성).
+    # 리스트를 직접 수정했다면 invalidate()를 불러야 다시 만들어진다.
+    _compiled: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
     @staticmethod
     def default(n: int = 12) -> "Calibration":
         return Calibration(
@@ -67,8 +76,61 @@ class Calibration:
         a = clamp(a, lo, hi)
         return int(round(a))
 
+    def invalidate(self) -> None:
+        """Drop the compiled arrays (call after editing the lists in place)."""
+        self._compiled = None
+
+    def _compile(self) -> tuple:
+        off = np.asarray(self.offset_deg, dtype=float)
+        d = np.asarray([1 if int(x) >= 0 else -1 for x in self.direction], dtype=float)
+        center = np.asarray(self.center_deg, dtype=float)
+        lo = np.asarray(self.min_deg, dtype=float)
+        hi = np.asarray(self.max_deg, dtype=float)
+        # out = center + d * ((a + off) - center) = d * a + base
+        base = center + d * (off - center)
+        self._compiled = (d, base, lo, hi)
+        return self._compiled
+
+    def apply_all(self, angles: Sequence[Optional[float]]) -> Tuple[List[Optional[int]], List[bool]]:
+        """Batch apply_one() for every channel.
+
+        angles[ch] is the same input as apply_one(ch, ...); None skips the channel.
+        Returns (int_angles, clamp_mask): int_angles[ch] is None for skipped
+        channels and clamp_mask[ch] is True where the min/max limit was hit.
+        """
+        n = len(self.offset_deg)
+        if len(angles) != n:
+            raise ValueError(f"angles must have length {n}")
+
+        if np is None:
+            outs: List[Optional[int]] = [None] * n
+            mask = [False] * n
+            for ch, a in enumerate(angles):
+                if a is None:
+                    continue
+                outs[ch] = self.apply_one(ch, a)
+                c = float(self.center_deg[ch])
+                raw = c + int(self.direction[ch]) * ((float(a) + float(self.offset_deg[ch])) - c)
+                mask[ch] = raw < float(self.min_deg[ch]) or raw > float(self.max_deg[ch])
+            return outs, mask
+
+        d, base, lo, hi = self._compiled or self._compile()
+        a = np.array([np.nan if v is None else v for v in angles], dtype=float)
+        raw = d * a + base
+        out = np.clip(raw, lo, hi)
+        mask = (raw < lo) | (raw > hi)  # NaN compares False
+
+        ints = np.round(out)
+        valid = ~np.isnan(a)
+        return (
+            [int(v) if ok else None for v, ok in zip(ints.tolist(), valid.tolist())],
+            mask.tolist(),
+        )
+
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        d = asdict(self)
+        d.pop("_compiled", None)
+        return d
 
     @staticmethod
     def from_dict(d: Dict[str, Any], n: int = 12) -> "Calibration":
@@ -83,6 +145,7 @@ class Calibration:
         c.center_deg = [float(x) for x in c.center_deg]
         c.min_deg = [float(x) for x in c.min_deg]
         c.max_deg = [float(x) for x in c.max_deg]
+        c.invalidate()
         return c
 
 
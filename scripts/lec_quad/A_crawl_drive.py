@@ -33,10 +33,11 @@ import select
 import termios
 import tty
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-from A_quad_api import make_default_api
+from A_quad_api import LEG_MAP, make_default_api
 from A_ik_3dof_a0 import IKError
+from A_tick_scheduler import TickScheduler
 import A_ik_3dof_a0 as ikmod
 
 
@@ -124,6 +125,11 @@ PUSH_YAW = 15.0
 # 보간 주기(작을수록 부드럽지만 연산 많아짐)
 MOVE_DT = 0.015
 
+# tick이 MOVE_DT를 넘겨 늦어졌을 때의 처리 (A_tick_scheduler 참고)
+#   "skip"   : 늦은 만큼 보간 프레임을 건너뛰어 동작 시간을 유지
+#   "catchup": 프레임은 모두 보내고, 다음 tick들을 기다리지 않고 바로 진행해 따라잡음
+TICK_POLICY = "skip"
+
 # shift/lift/swing/down/unshift 각 단계 시간
 # 값을 줄이면 보행이 빨라지지만, 너무 낮추면 로봇이 흔들릴 수 있다.
 PHASE_T = 0.14
@@ -131,6 +137,10 @@ PHASE_T = 0.14
 # 일정 시간 입력이 없으면 정지 상태로 바꿈
 IDLE_HOLD = 0.30
 
+# True면 main()에서 A_gait_compiler로 한 스텝의 서보 프레임을 미리 계산해 두고 재생한다.
+# 같은 명령 + 같은 발 위치라면 IK/보간을 다시 하지 않는다.
+USE_GAIT_COMPILER = False
+
 # ------------------------------------------------------------
 # Crawl 순서
 # ------------------------------------------------------------
@@ -139,6 +149,32 @@ IDLE_HOLD = 0.30
 CRAWL_ORDER_FWD = [0, 1, 3, 2]   # 전진 시
 CRAWL_ORDER_BACK = [1, 0, 2, 3]  # 후진 시
 
+# ------------------------------------------------------------
+# 보행 모드 (gait mode)
+# ------------------------------------------------------------
+# "crawl" : 한 발씩 (shift/counter 포함, 가장 안정적) → crawl_step()
+# "trot"  : 대각선 두 다리를 동시에 든다 → trot_step()
+# "wave"  : 한 발씩 들되, 몸은 멈추지 않고 계속 이동 → wave_step()
+# "cpg"   : 전역 위상(phase)으로 발 궤적을 연속 생성 (A_gait_cpg, 해당 모듈을 import하면 등록됨)
+# 실행 중에는 drv.set_gait_mode("trot")로 바꿀 수 있다. (main에서는 숫자키 1/2/3/4)
+GAIT_MODE = "crawl"
+
+# TROT: 반 주기마다 대각선 한 쌍(TROT_PAIRS)이 swing, 나머지 쌍이 지지
+TROT_PAIRS = [(0, 2), (1, 3)]   # (FR, BL), (BR, FL)
+TROT_SWING_T = 0.20             # 반 주기 시간 (swing 쌍이 들렸다 내려오는 시간)
+TROT_LIFT_DZ = 35.0             # swing 중 최대 들어올림 높이
+TROT_STEP_SCALE = 1.0           # 반 주기 보폭 = STEP_FWD/LAT/YAW * 이 값
+
+# WAVE: WAVE_ORDER 순서로 한 다리씩 swing, 지지 다리는 일정 속도로 뒤로 민다
+WAVE_ORDER = [2, 3, 1, 0]       # BL → FL → BR → FR (뒤→앞, 왼쪽→오른쪽)
+WAVE_CYCLE_T = 1.2              # 네 다리가 한 번씩 swing 하는 한 주기 시간
+# duty factor: 한 다리가 바닥에 있는 시간 비율 (0.75 ~ 1.0 미만)
+#   0.75 → 항상 한 다리가 들려 있음 (가장 빠름)
+#   0.85 → swing 사이에 네 발 지지 구간이 생김 (더 안정적)
+WAVE_DUTY = 0.8
+WAVE_LIFT_DZ = LIFT_DZ * 0.6
+WAVE_STEP_SCALE = 1.0           # 한 주기 보폭 = STEP_FWD/LAT/YAW * 이 값
+
 # 오른쪽 다리 / 왼쪽 다리 구분
 RIGHT_LEGS = {0, 1}   # FR, BR
 LEFT_LEGS = {2, 3}    # BL, FL
@@ -396,8 +432,9 @@ class CrawlDriver:
     - IK 에러 발생 시 안전하게 복귀
     """
 
-    def __init__(self):
-        self.api = make_default_api()
+    def __init__(self, api=None):
+        # api를 주지 않으면 기본 QuadLegAPI (A_gait_sim처럼 Flask 없이 만들 때 직접 전달)
+        self.api = api if api is not None else make_default_api()
 
         sx, sy, sz = STAND_XYZ
 
@@ -425,6 +462,113 @@ class CrawlDriver:
         # 직전 이동 명령
         self._last_move_cmd = Cmd(0, 0, 0)
 
+        # 보행 모드 (GAIT_MODES 키) 와 trot/wave 순서 인덱스
+        self.gait_mode = GAIT_MODE
+        self.trot_idx = 0
+        self.wave_idx = 0
+        # 레지스트리에 추가된 보행(A_gait_cpg 등)이 쓰는 상태. get_state()/set_state()에 같이 저장된다.
+        self.gait_state: Dict[str, object] = {}
+
+        # 고정 주기 tick: 매 보간 단계마다 "이전 마감 시각 + MOVE_DT"까지만 기다린다.
+        # (IK/SPI 시간이 주기에 더해지지 않아서 CPU 부하와 관계없이 보행 속도가 일정)
+        self.sched = TickScheduler(MOVE_DT, policy=TICK_POLICY)
+
+        # 녹화 모드(A_gait_compiler용):
+        #   None이 아니면 서보로 보내지 않고, 매 tick의 12채널 각도를 여기에 쌓는다.
+        self._rec_frames: Optional[List[Tuple[Optional[int], ...]]] = None
+        self._rec_frame: List[Optional[int]] = [None] * 12
+        # 녹화 중 단계 표시: {"lift": 다리를 들기 시작하는 프레임 번호}
+        self.rec_marks: Dict[str, int] = {}
+
+    # ------------------------------------------------------------
+    # tick / 녹화 모드
+    # ------------------------------------------------------------
+    # 보행 동작의 모든 서보 출력은 _try_set_leg_xyz / _try_set_legs_xyz 를 거치고,
+    # 한 보간 단계가 끝날 때마다 _tick()을 부른다.
+    # 그래서 녹화 모드에서는 "한 tick = 12채널 프레임 1개"로 궤적 전체를 기록할 수 있다.
+
+    def _tick(self) -> int:
+        """
+        한 보간 단계(MOVE_DT) 끝.
+        평소에는 다음 마감 시각까지 기다리고, 녹화 중이면 기다리지 않고 프레임을 저장한다.
+
+        반환값: 다음에 진행할 보간 단계 수 (보통 1, "skip" 정책에서 늦었으면 그 이상)
+        """
+        if self._rec_frames is None:
+            return self.sched.tick()
+        self._rec_frames.append(tuple(self._rec_frame))
+        self._rec_frame = [None] * 12
+        return 1
+
+    def _next_step(self, s: int, steps: int) -> int:
+        """
+        보간 루프의 다음 인덱스.
+        프레임을 건너뛰더라도 마지막 프레임(s == steps, 목표 위치)은 반드시 보낸다.
+        """
+        k = self._tick()
+        if s >= steps:
+            return steps + 1
+        return min(s + k, steps)
+
+    def start_recording(self):
+        """녹화 시작: 이후 동작은 서보로 나가지 않고 프레임으로 쌓인다."""
+        self._rec_frames = []
+        self._rec_frame = [None] * 12
+        self.rec_marks = {}
+
+    def _mark(self, name: str):
+        """
+        녹화 중이면 지금 프레임 위치를 name으로 기록한다. (평소에는 아무 일도 안 함)
+        예: "lift" 이전 프레임들은 네 발이 모두 바닥에 있으므로 중간에 멈춰도 안전하다.
+        """
+        if self._rec_frames is not None:
+            self.rec_marks.setdefault(name, len(self._rec_frames))
+
+    def stop_recording(self) -> List[Tuple[Optional[int], ...]]:
+        """녹화 종료 후 쌓인 프레임 반환 (마지막 tick 뒤에 남은 출력도 포함)."""
+        frames = self._rec_frames or []
+        if any(a is not None for a in self._rec_frame):
+            frames.append(tuple(self._rec_frame))
+        self._rec_frames = None
+        self._rec_frame = [None] * 12
+        return frames
+
+    def _record(self, angles: List[Optional[int]]):
+        for ch, a in enumerate(angles):
+            if a is not None:
+                self._rec_frame[ch] = a
+
+    def get_state(self) -> dict:
+        """보행 결과에 영향을 주는 내부 상태 전체 (발 위치, 순서 인덱스 등)."""
+        return {
+            "foot": dict(self.foot),
+            "home": dict(self.home),
+            "stand": self.stand,
+            "order_idx": self.order_idx,
+            "crawl_order_key": self._crawl_order_key,
+            "fb_idx": self.fb_idx,
+            "fb_dir": self._fb_dir,
+            "last_move_cmd": (self._last_move_cmd.vx, self._last_move_cmd.vy, self._last_move_cmd.wz),
+            "gait_mode": self.gait_mode,
+            "trot_idx": self.trot_idx,
+            "wave_idx": self.wave_idx,
+            "gait_state": dict(self.gait_state),
+        }
+
+    def set_state(self, st: dict):
+        self.foot = dict(st["foot"])
+        self.home = dict(st["home"])
+        self.stand = st["stand"]
+        self.order_idx = st["order_idx"]
+        self._crawl_order_key = st["crawl_order_key"]
+        self.fb_idx = st["fb_idx"]
+        self._fb_dir = st["fb_dir"]
+        self._last_move_cmd = Cmd(*st["last_move_cmd"])
+        self.gait_mode = st.get("gait_mode", self.gait_mode)
+        self.trot_idx = st.get("trot_idx", 0)
+        self.wave_idx = st.get("wave_idx", 0)
+        self.gait_state = dict(st.get("gait_state", {}))
+
     def _try_set_leg_xyz(self, leg_id: int, x: float, y: float, z: float) -> bool:
         """
         한 다리의 목표 xyz를 실제 API에 전달한다.
@@ -433,12 +577,51 @@ class CrawlDriver:
         IK 도달 불가면 False
         """
         try:
-            self.api.set_leg_xyz(leg_id, x, y, z, debug=False)
-            return True
+            with self.sched.phase("ik"):
+                out = self.api.solve_leg_xyz(leg_id, x, y, z, debug=False)
         except IKError as e:
             print(f"[IKError] leg={leg_id} target=({x:.1f},{y:.1f},{z:.1f}) -> {e}", flush=True)
             return False
 
+        angles: List[Optional[int]] = [None] * 12
+        for ch, a in zip(LEG_MAP[leg_id]["ch"], out):
+            angles[int(ch)] = a
+
+        if self._rec_frames is not None:
+            self._record(angles)
+            return True
+        with self.sched.phase("spi"):
+            self.api.send_angles(angles)
+        return True
+
+    def _try_set_legs_xyz(self, targets: Dict[int, Tuple[float, float, float]]) -> bool:
+        """
+        여러 다리의 목표 xyz를 한 번에 전달한다.
+
+        다리마다 set_leg_xyz()를 부르면 다리당 SPI 패킷 3개가 나가지만,
+        이 함수는 모든 다리의 IK를 먼저 풀고 12채널 각도를 한 번에 보낸다.
+        (batch 프레임을 지원하는 펌웨어라면 SPI 전송 1회)
+
+        성공하면 True
+        어느 한 다리라도 IK 도달 불가면 아무 것도 보내지 않고 False
+        """
+        try:
+            with self.sched.phase("ik"):
+                angles = self.api.solve_legs_xyz(targets, debug=False)
+        except IKError as e:
+            tgt = " ".join(
+                f"{leg_id}:({x:.1f},{y:.1f},{z:.1f})" for leg_id, (x, y, z) in targets.items()
+            )
+            print(f"[IKError] targets={tgt} -> {e}", flush=True)
+            return False
+
+        if self._rec_frames is not None:
+            self._record(angles)
+            return True
+        with self.sched.phase("spi"):
+            self.api.send_angles(angles)
+        return True
+
     def set_pose(self, leg_id: int, x: float, y: float, z: float, duration: float) -> bool:
         """
         한 다리를 현재 위치에서 목표 위치까지 부드럽게 이동시킨다.
@@ -450,7 +633,8 @@ class CrawlDriver:
         x0, y0, z0 = self.foot[leg_id]
         steps = max(1, int(duration / MOVE_DT))
 
-        for i in range(steps + 1):
+        i = 0
+        while i <= steps:
             u = i / steps
             ue = smoothstep(u)
             xi = lerp(x0, x, ue)
@@ -460,7 +644,7 @@ class CrawlDriver:
             if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
                 return False
 
-            time.sleep(MOVE_DT)
+            i = self._next_step(i, steps)
 
         self.foot[leg_id] = (x, y, z)
         return True
@@ -476,19 +660,22 @@ class CrawlDriver:
         y0 = {i: self.foot[i][1] for i in (0, 1, 2, 3)}
         z0 = {i: self.foot[i][2] for i in (0, 1, 2, 3)}
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 xi = lerp(x0[leg_id], x, ue)
                 yi = lerp(y0[leg_id], y, ue)
                 zi = lerp(z0[leg_id], z, ue)
+                frame[leg_id] = (xi, yi, zi)
 
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    return False
+            if not self._try_set_legs_xyz(frame):
+                return False
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = (x, y, z)
@@ -531,10 +718,12 @@ class CrawlDriver:
         steps = max(1, int(duration / MOVE_DT))
         start = {i: self.foot[i] for i in (0, 1, 2, 3)}
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 x0, y0, z0 = start[leg_id]
                 xt, yt, zt = targets[leg_id]
@@ -542,11 +731,12 @@ class CrawlDriver:
                 xi = lerp(x0, xt, ue)
                 yi = lerp(y0, yt, ue)
                 zi = lerp(z0, zt, ue)
+                frame[leg_id] = (xi, yi, zi)
 
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    return
+            if not self._try_set_legs_xyz(frame):
+                return
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = targets[leg_id]
@@ -608,10 +798,12 @@ class CrawlDriver:
         steps = max(1, int(BODYMOVE_T / MOVE_DT))
         start = {i: self.foot[i] for i in (0, 1, 2, 3)}
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 x0p, y0p, z0p = start[leg_id]
                 xtp, ytp, ztp = targets[leg_id]
@@ -619,11 +811,12 @@ class CrawlDriver:
                 xi = lerp(x0p, xtp, ue)
                 yi = lerp(y0p, ytp, ue)
                 zi = lerp(z0p, ztp, ue)
+                frame[leg_id] = (xi, yi, zi)
 
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    return False
+            if not self._try_set_legs_xyz(frame):
+                return False
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = targets[leg_id]
@@ -699,6 +892,7 @@ class CrawlDriver:
         # ----------------------------------------------------
         # 2) LIFT : 선택된 다리를 위로 든다
         # ----------------------------------------------------
+        self._mark("lift")
         x0, y0, _ = self.foot[swing_leg]
         if not self.set_pose(swing_leg, x0, y0, z_lift, PHASE_T):
             return False
@@ -723,7 +917,8 @@ class CrawlDriver:
         swing_start = self.foot[swing_leg]
         support_start = {i: self.foot[i] for i in support}
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
@@ -739,8 +934,7 @@ class CrawlDriver:
             if SWING_ARC_DZ and SWING_ARC_DZ > 0:
                 zi = zi + SWING_ARC_DZ * math.sin(math.pi * ue)
 
-            if not self._try_set_leg_xyz(swing_leg, xi, yi, zi):
-                return False
+            frame = {swing_leg: (xi, yi, zi)}
 
             # 지지 다리도 약간 반대방향으로 이동
             if support_move:
@@ -751,11 +945,12 @@ class CrawlDriver:
                     xj = lerp(xA0, xAt, ue)
                     yj = lerp(yA0, yAt, ue)
                     zj = lerp(zA0, zAt, ue)
+                    frame[leg_id] = (xj, yj, zj)
 
-                    if not self._try_set_leg_xyz(leg_id, xj, yj, zj):
-                        return False
+            if not self._try_set_legs_xyz(frame):
+                return False
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         self.foot[swing_leg] = swing_target
         if support_move:
@@ -796,20 +991,23 @@ class CrawlDriver:
             x_target[leg_id] = x_t
             y_target[leg_id] = y_t
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 x0u, y0u, z0u = start[leg_id]
                 xi = lerp(x0u, x_target[leg_id], ue)
                 yi = lerp(y0u, y_target[leg_id], ue)
                 zi = lerp(z0u, sz, ue)
+                frame[leg_id] = (xi, yi, zi)
 
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    return False
+            if not self._try_set_legs_xyz(frame):
+                return False
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = (x_target[leg_id], y_target[leg_id], sz)
@@ -1004,6 +1202,7 @@ class CrawlDriver:
                 return
 
         # 2) LIFT
+        self._mark("lift")
         x0, y0, _ = self.foot[swing_leg]
         if not self.set_pose(swing_leg, x0, y0, z_lift, PHASE_T):
             self.go_stand(duration=0.3)
@@ -1039,7 +1238,8 @@ class CrawlDriver:
         swing_start = self.foot[swing_leg]
         support_start = {i: self.foot[i] for i in support}
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
@@ -1054,9 +1254,7 @@ class CrawlDriver:
             if SWING_ARC_DZ and SWING_ARC_DZ > 0:
                 zi = zi + SWING_ARC_DZ * math.sin(math.pi * ue)
 
-            if not self._try_set_leg_xyz(swing_leg, xi, yi, zi):
-                self.go_stand(duration=0.3)
-                return
+            frame = {swing_leg: (xi, yi, zi)}
 
             # 지지 다리
             for leg_id in support:
@@ -1066,12 +1264,13 @@ class CrawlDriver:
                 xj = lerp(xA0, xAt, ue)
                 yj = lerp(yA0, yAt, ue)
                 zj = lerp(zA0, zAt, ue)
+                frame[leg_id] = (xj, yj, zj)
 
-                if not self._try_set_leg_xyz(leg_id, xj, yj, zj):
-                    self.go_stand(duration=0.3)
-                    return
+            if not self._try_set_legs_xyz(frame):
+                self.go_stand(duration=0.3)
+                return
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         self.foot[swing_leg] = swing_target
         for leg_id in support:
@@ -1108,25 +1307,229 @@ class CrawlDriver:
             x_target[leg_id] = x_t
             y_target[leg_id] = y_t
 
-        for s in range(steps + 1):
+        s = 0
+        while s <= steps:
             u = s / steps
             ue = smoothstep(u)
 
+            frame = {}
             for leg_id in (0, 1, 2, 3):
                 x0, y0, z0 = start[leg_id]
                 xi = lerp(x0, x_target[leg_id], ue)
                 yi = lerp(y0, y_target[leg_id], ue)
                 zi = lerp(z0, sz, ue)
+                frame[leg_id] = (xi, yi, zi)
 
-                if not self._try_set_leg_xyz(leg_id, xi, yi, zi):
-                    self.go_stand(duration=0.3)
-                    return
+            if not self._try_set_legs_xyz(frame):
+                self.go_stand(duration=0.3)
+                return
 
-            time.sleep(MOVE_DT)
+            s = self._next_step(s, steps)
 
         for leg_id in (0, 1, 2, 3):
             self.foot[leg_id] = (x_target[leg_id], y_target[leg_id], sz)
 
+    # ------------------------------------------------------------
+    # 보행 모드 선택 / trot / wave
+    # ------------------------------------------------------------
+
+    def set_gait_mode(self, name: str):
+        """
+        보행 모드 변경 (GAIT_MODES 에 등록된 이름: "crawl" / "trot" / "wave" / "cpg" 등).
+        발 위치는 그대로 두고 순서 인덱스만 처음으로 되돌린다.
+        """
+        if name not in GAIT_MODES:
+            raise ValueError(f"unknown gait mode {name!r} (available: {', '.join(GAIT_MODES)})")
+        if name == self.gait_mode:
+            return
+        self.gait_mode = name
+        self.order_idx = 0
+        self.fb_idx = 0
+        self._fb_dir = 0
+        self._crawl_order_key = "fwd"
+        self.trot_idx = 0
+        self.wave_idx = 0
+
+    def step(self, cmd: Cmd):
+        """현재 보행 모드(gait_mode)로 한 스텝 수행."""
+        GAIT_MODES[self.gait_mode](self, cmd)
+
+    def _stride_local(self, leg_id: int, cmd: Cmd, scale: float) -> Tuple[float, float]:
+        """cmd에 해당하는 한 보폭을 leg_id의 LOCAL (dx, dy)로 변환."""
+        body_dx = cmd.vx * STEP_FWD * scale
+        body_dy = cmd.vy * STEP_LAT * scale
+        body_dx_yaw = cmd.wz * STEP_YAW * scale
+
+        dx = body_x_to_local_x(leg_id, body_dx + body_dx_yaw * side_sign(leg_id))
+        dy = body_y_to_local_y(leg_id, body_dy)
+        return dx, dy
+
+    def _swing_group(
+        self,
+        swing_legs,
+        cmd: Cmd,
+        *,
+        scale: float,
+        duration: float,
+        lift_dz: float,
+        swing_frac: float = 1.0,
+        stance_frac: float = 1.0,
+        smooth_stance: bool = True,
+    ) -> bool:
+        """
+        trot/wave 공용: swing_legs를 들어서 home + 보폭/2 위치에 내려놓고,
+        같은 시간 동안 바닥에 있는 다리들은 보폭 * stance_frac 만큼 뒤로 민다.
+
+        swing_frac : duration 중 swing이 차지하는 비율 (나머지 시간에는 내려놓은 다리도 같이 민다)
+        smooth_stance : True면 지지 다리도 smoothstep, False면 일정 속도(wave처럼 몸이 계속 움직일 때)
+        """
+        sx, sy, sz = self.stand
+        start = {i: self.foot[i] for i in (0, 1, 2, 3)}
+
+        # 지지 다리가 이번 스텝 동안 미는 양 (LOCAL)
+        push = {}
+        targets: Dict[int, Tuple[float, float, float]] = {}
+        land: Dict[int, Tuple[float, float, float]] = {}
+        for leg_id in (0, 1, 2, 3):
+            dx, dy = self._stride_local(leg_id, cmd, scale)
+            push[leg_id] = (-dx * stance_frac, -dy * stance_frac)
+
+            if leg_id in swing_legs:
+                # swing 목표는 home 기준 → 발 위치가 점점 밀려나지 않는다.
+                hx, hy, _ = self.home.get(leg_id, self.stand)
+                land[leg_id] = (hx + dx / 2.0, hy + dy / 2.0, sz)
+                rest = 1.0 - swing_frac
+                px, py = push[leg_id]
+                targets[leg_id] = (land[leg_id][0] + px * rest, land[leg_id][1] + py * rest, sz)
+            else:
+                x, y, _ = start[leg_id]
+                px, py = push[leg_id]
+                targets[leg_id] = (x + px, y + py, sz)
+
+        steps = max(1, int(duration / MOVE_DT))
+
+        self._mark("lift")
+        s = 0
+        while s <= steps:
+            u = s / steps
+
+            frame = {}
+            for leg_id in (0, 1, 2, 3):
+                x0, y0, z0 = start[leg_id]
+
+                if leg_id in swing_legs:
+                    us = clampf(u / swing_frac, 0.0, 1.0) if swing_frac > 0 else 1.0
+                    ue = smoothstep(us)
+                    xl, yl, zl = land[leg_id]
+                    px, py = push[leg_id]
+                    after = max(0.0, u - swing_frac)  # 내려놓은 뒤 같이 미는 구간
+                    xi = lerp(x0, xl, ue) + px * after
+                    yi = lerp(y0, yl, ue) + py * after
+                    zi = lerp(z0, zl, ue) + lift_dz * math.sin(math.pi * us)
+                else:
+                    ue = smoothstep(u) if smooth_stance else u
+                    xt, yt, zt = targets[leg_id]
+                    xi = lerp(x0, xt, ue)
+                    yi = lerp(y0, yt, ue)
+                    zi = lerp(z0, zt, ue)
+
+                frame[leg_id] = (xi, yi, zi)
+
+            if not self._try_set_legs_xyz(frame):
+                return False
+
+            s = self._next_step(s, steps)
+
+        for leg_id in (0, 1, 2, 3):
+            self.foot[leg_id] = targets[leg_id]
+        return True
+
+    def _settle_home(self, groups, *, duration: float, lift_dz: float):
+        """
+        정지 명령일 때: home에서 벗어난 다리 묶음을 하나씩 들어서 home에 내려놓는다.
+        (바닥에 댄 채로 끌지 않기 위해) 모두 home이면 한 tick만 쉰다.
+        """
+        moved = False
+        for legs in groups:
+            off = any(
+                abs(self.foot[i][0] - self.home[i][0]) > 0.5 or abs(self.foot[i][1] - self.home[i][1]) > 0.5
+                for i in legs
+            )
+            if not off:
+                continue
+            moved = True
+            if not self._swing_group(legs, Cmd(0, 0, 0), scale=0.0, duration=duration, lift_dz=lift_dz):
+                self.go_stand(duration=0.3)
+                return
+
+        if not moved:
+            self._tick()
+
+    def trot_step(self, cmd: Cmd):
+        """
+        Trot 반 주기 한 번 수행.
+
+        대각선 두 다리(TROT_PAIRS)를 동시에 들어 home + 보폭/2 위치로 옮기고,
+        그동안 바닥에 있는 나머지 두 다리는 보폭만큼 뒤로 밀어 몸을 앞으로 보낸다.
+
+        crawl은 한 사이클(다리 4번 + BODYMOVE) 동안 보폭 하나 정도를 가지만,
+        trot은 반 주기마다 보폭 하나를 가므로 같은 시간에 훨씬 멀리 간다.
+        대신 두 발로만 지지하는 순간이 있으므로 TROT_LIFT_DZ는 낮게 둔다.
+        """
+        self._maybe_reset_on_direction_change(cmd)
+
+        if cmd.vx == 0 and cmd.vy == 0 and cmd.wz == 0:
+            self._settle_home(TROT_PAIRS, duration=TROT_SWING_T, lift_dz=TROT_LIFT_DZ)
+            return
+
+        self._last_move_cmd = cmd
+
+        pair = TROT_PAIRS[self.trot_idx % len(TROT_PAIRS)]
+        self.trot_idx += 1
+
+        ok = self._swing_group(pair, cmd, scale=TROT_STEP_SCALE, duration=TROT_SWING_T, lift_dz=TROT_LIFT_DZ)
+        if not ok:
+            self.go_stand(duration=0.3)
+
+    def wave_step(self, cmd: Cmd):
+        """
+        Wave gait 한 슬롯(= 한 주기의 1/4, 한 다리 swing) 수행.
+
+        WAVE_ORDER 순서로 한 다리씩 들고, 나머지 다리는 일정 속도로 계속 뒤로 민다.
+        crawl처럼 멈춰서 shift/counter를 하지 않으므로 몸이 끊기지 않고 이동한다.
+
+        WAVE_DUTY(β) 가 한 다리가 바닥에 있는 시간 비율:
+          - 슬롯 중 swing 시간 = 4 * (1 - β)
+          - 지지 다리는 한 주기의 β 동안 보폭만큼 밀어야 하므로 슬롯마다 보폭 / (4β)
+        """
+        self._maybe_reset_on_direction_change(cmd)
+
+        slot_t = WAVE_CYCLE_T / 4.0
+        if cmd.vx == 0 and cmd.vy == 0 and cmd.wz == 0:
+            self._settle_home([(i,) for i in WAVE_ORDER], duration=slot_t, lift_dz=WAVE_LIFT_DZ)
+            return
+
+        self._last_move_cmd = cmd
+
+        # 후진이면 앞 → 뒤 순서
+        order = WAVE_ORDER if cmd.vx >= 0 else WAVE_ORDER[::-1]
+        swing_leg = order[self.wave_idx % len(order)]
+        self.wave_idx += 1
+
+        duty = clampf(WAVE_DUTY, 0.75, 0.95)
+        ok = self._swing_group(
+            (swing_leg,),
+            cmd,
+            scale=WAVE_STEP_SCALE,
+            duration=slot_t,
+            lift_dz=WAVE_LIFT_DZ,
+            swing_frac=4.0 * (1.0 - duty),
+            stance_frac=1.0 / (4.0 * duty),
+            smooth_stance=False,
+        )
+        if not ok:
+            self.go_stand(duration=0.3)
+
     def reset(self):
         """
         GPIO/보드 리셋.
@@ -1191,6 +1594,8 @@ class CrawlDriver:
         self.order_idx = 0
         self._fb_dir = 0
         self._crawl_order_key = "fwd"
+        self.trot_idx = 0
+        self.wave_idx = 0
 
         # print(
         #     f"[RESET] cmd change {prev.vx:+d},{prev.vy:+d},{prev.wz:+d} -> "
@@ -1200,6 +1605,31 @@ class CrawlDriver:
         self.go_stand(duration=0.25)
 
 
+# ------------------------------------------------------------
+# 보행 모드 레지스트리
+# ------------------------------------------------------------
+# 이름 -> "한 스텝 수행" 함수 (drv, cmd). drv.step(cmd)가 drv.gait_mode로 골라 부른다.
+# 새 보행을 추가하려면 register_gait("이름", 함수)를 부르면 된다.
+GAIT_MODES: Dict[str, Callable[[CrawlDriver, Cmd], None]] = {
+    "crawl": CrawlDriver.crawl_step,
+    "trot": CrawlDriver.trot_step,
+    "wave": CrawlDriver.wave_step,
+}
+
+# main()에서 보행 모드를 바꾸는 숫자키
+GAIT_KEYS = {"1": "crawl", "2": "trot", "3": "wave", "4": "cpg"}
+
+
+def gait_keys_help() -> str:
+    """GAIT_KEYS 안내 문자열 ("1=crawl 2=trot ...")."""
+    return " ".join(f"{k}={name}" for k, name in GAIT_KEYS.items())
+
+
+def register_gait(name: str, fn: Callable[[CrawlDriver, Cmd], None]):
+    """보행 모드 추가 (같은 이름이 있으면 덮어쓴다)."""
+    GAIT_MODES[name] = fn
+
+
 # ============================================================
 # 6. 메인 함수
 # ============================================================
@@ -1212,7 +1642,7 @@ def main():
       1) CrawlDriver 생성
       2) 하드웨어 reset
       3) stand 자세로 이동
-      4) 키 입력을 계속 읽으면서 crawl_step 실행
+      4) 키 입력을 계속 읽으면서 drv.step() 실행 (보행 모드는 숫자키로 선택)
       5) Ctrl+C 시 종료 자세로 복귀
     """
     drv = CrawlDriver()
@@ -1220,9 +1650,21 @@ def main():
 
     print("[INFO] Stand pose:", STAND_XYZ)
     print("[INFO] Keys: W/S/A/D/Q/E, other = stop. Ctrl+C to exit.")
+    print(f"[INFO] Gait: {gait_keys_help()} (now: {drv.gait_mode})")
 
     drv.go_stand(duration=0.6)
 
+    # "cpg" 보행 등록 (이 파일을 직접 실행하면 모듈 이름이 __main__ 이라서 여기서 등록한다)
+    from A_gait_cpg import cpg_step
+
+    register_gait("cpg", cpg_step)
+
+    stepper = drv.step
+    if USE_GAIT_COMPILER:
+        from A_gait_compiler import GaitCompiler
+
+        stepper = GaitCompiler(drv).step
+
     cmd = Cmd(0, 0, 0)
     last_key_t = 0.0
 
@@ -1233,7 +1675,11 @@ def main():
                 k = kr.drain_last_key()
                 now = time.time()
 
-                if k is not None:
+                if k is not None and k in GAIT_KEYS:
+                    # 숫자키: 보행 모드 변경
+                    drv.set_gait_mode(GAIT_KEYS[k])
+                    print(f"[GAIT] mode={drv.gait_mode}", flush=True)
+                elif k is not None:
                     cmd = key_to_cmd(k)
                     last_key_t = now
 
@@ -1242,12 +1688,13 @@ def main():
                     cmd = Cmd(0, 0, 0)
 
                 # 현재 명령 기준으로 한 스텝 수행
-                drv.crawl_step(cmd)
+                stepper(cmd)
 
         except KeyboardInterrupt:
             print("\n[CTRL+C] Exit")
 
         finally:
+            print(drv.sched.report())
             drv.shutdown()
 
 
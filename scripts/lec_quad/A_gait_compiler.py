@@ -0,0 +1,173 @@
+# A_gait_compiler.py
+# ------------------------------------------------------------
+# Crawl gait 한 스텝을 "미리 계산된 서보 프레임 배열"로 바꿔서 재생하는 모듈
+#
+# CrawlDriver.step() (crawl/trot/wave)은 매 tick(MOVE_DT)마다
+# smoothstep/lerp → IK → 캘리브레이션을 다시 계산한다.
+# 그런데 같은 명령(Cmd) + 같은 발 위치/순서 상태라면 결과 궤적은 항상 같다.
+#
+# 그래서:
+#   1) compile : 드라이버를 녹화 모드로 돌려 한 스텝을 실행하고
+#                tick마다의 12채널 각도(프레임)와 스텝이 끝난 뒤의 상태를 저장
+#   2) 캐시    : (명령, 양자화된 발 위치, 순서 인덱스 ...)를 키로 LRU에 보관
+#   3) play    : 저장된 프레임을 afb2.quad.pose()로 MOVE_DT 간격(TickScheduler)으로 흘려보냄
+#
+# 재생할 때는 IK/보간 계산이 없으므로 tick 타이밍이 일정하고 CPU가 남는다.
+#
+# 사용:
+#   from A_gait_compiler import GaitCompiler
+#   comp = GaitCompiler(drv)
+#   comp.step(cmd)           # drv.step(cmd) 대신
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import afb2
+
+from A_crawl_drive import CRAWL_ORDER_FWD, MOVE_DT, TROT_PAIRS, WAVE_ORDER, Cmd, CrawlDriver
+from A_tick_scheduler import TickScheduler
+
+Frame = Tuple[Optional[int], ...]  # 12채널, None = 이 tick에 보내지 않는 채널
+
+# 발 위치 양자화 단위(mm). 컴파일 전에 발 위치를 이 격자에 맞춰서
+# 거의 같은 상태가 같은 캐시 항목을 쓰도록 한다.
+FOOT_QUANTUM_MM = 0.5
+
+# 캐시에 보관할 최대 스텝 수
+CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    frames: Tuple[Frame, ...]  # tick 순서대로의 12채널 프레임
+    end_state: dict            # 스텝이 끝난 뒤 CrawlDriver 상태 (get_state())
+    # 이 프레임 번호 전까지는 네 발이 모두 바닥에 있음 (다리를 들지 않는 스텝이면 len(frames))
+    # → 그 전에 명령이 바뀌면 스텝을 중단해도 안전하다 (A_gait_engine)
+    abortable_until: int = 0
+
+
+def _q(v: float, quantum: float) -> float:
+    return round(v / quantum) * quantum
+
+
+def play_frames(frames: Sequence[Frame], sched: Optional[TickScheduler] = None) -> None:
+    """
+    프레임을 MOVE_DT 간격으로 서보에 보낸다.
+
+    sched(TickScheduler)의 절대 마감 시각에 맞춰 보내므로 pose() 전송 시간이
+    늘어나도 전체 재생 시간이 밀리지 않는다. "skip" 정책에서 늦어지면
+    중간 프레임을 건너뛰지만 마지막 프레임(목표 자세)은 항상 보낸다.
+    """
+    if sched is None:
+        sched = TickScheduler(MOVE_DT)
+    n = len(frames)
+    k = 0
+    carry: List[Optional[int]] = [None] * 12  # 건너뛴 프레임에만 있던 채널 값
+    while k < n:
+        out = [a if a is not None else c for a, c in zip(frames[k], carry)]
+        with sched.phase("spi"):
+            afb2.quad.pose(out)
+        step = sched.tick()
+
+        nxt = min(k + step, n - 1) if k < n - 1 else n
+        # 건너뛴 프레임의 각도를 다음 프레임에 합쳐서, 그 프레임에서만 움직인 다리가
+        # 중간 위치에 멈춰 있지 않게 한다 (같은 채널은 나중 값 우선).
+        carry = [None] * 12
+        for f in frames[k + 1:nxt]:
+            for ch, a in enumerate(f):
+                if a is not None:
+                    carry[ch] = a
+        k = nxt
+
+
+class GaitCompiler:
+    def __init__(self, drv: CrawlDriver, *, maxsize: int = CACHE_SIZE, quantum: float = FOOT_QUANTUM_MM):
+        self.drv = drv
+        self.maxsize = max(1, int(maxsize))
+        self.quantum = float(quantum)
+        self._cache: "OrderedDict[tuple, CompiledStep]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------
+    # 캐시 키
+    # ------------------------------------------------------------
+    def _quantize_state(self):
+        """드라이버의 발/home 위치를 격자에 맞추고 순서 인덱스를 정리한다 (키와 실제 상태를 일치시키기 위해)."""
+        q = self.quantum
+        d = self.drv
+        d.foot = {i: tuple(_q(v, q) for v in xyz) for i, xyz in d.foot.items()}
+        d.home = {i: tuple(_q(v, q) for v in xyz) for i, xyz in d.home.items()}
+        # 순서 인덱스는 계속 증가하므로 주기로 나눈 나머지만 남긴다 (동작은 같고 캐시가 재사용됨)
+        d.order_idx %= len(CRAWL_ORDER_FWD)
+        d.fb_idx %= 6  # fb_step()의 seq 길이
+        d.trot_idx %= len(TROT_PAIRS)
+        d.wave_idx %= len(WAVE_ORDER)
+
+    def _key(self, cmd: Cmd) -> tuple:
+        st = self.drv.get_state()
+        return (
+            (cmd.vx, cmd.vy, cmd.wz),
+            tuple(st["foot"][i] for i in (0, 1, 2, 3)),
+            tuple(st["home"][i] for i in (0, 1, 2, 3)),
+            st["stand"],
+            st["order_idx"],
+            st["crawl_order_key"],
+            st["fb_idx"],
+            st["fb_dir"],
+            st["last_move_cmd"],
+            st["gait_mode"],
+            st["trot_idx"],
+            st["wave_idx"],
+            tuple(sorted(st["gait_state"].items())),
+        )
+
+    # ------------------------------------------------------------
+    # compile / step
+    # ------------------------------------------------------------
+    def compile(self, cmd: Cmd) -> CompiledStep:
+        """
+        현재 드라이버 상태에서 cmd 한 스텝을 녹화한다. (서보 출력 없음)
+        드라이버 상태는 컴파일 전 상태로 되돌려 놓는다.
+        """
+        self._quantize_state()
+        key = self._key(cmd)
+
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return hit
+
+        self.misses += 1
+        before = self.drv.get_state()
+        self.drv.start_recording()
+        try:
+            self.drv.step(cmd)
+        finally:
+            frames = self.drv.stop_recording()
+        after = self.drv.get_state()
+        self.drv.set_state(before)
+
+        lift_at = self.drv.rec_marks.get("lift", len(frames))
+        comp = CompiledStep(frames=tuple(frames), end_state=after, abortable_until=lift_at)
+        self._cache[key] = comp
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return comp
+
+    def step(self, cmd: Cmd) -> None:
+        """drv.step(cmd)와 같은 동작을, 미리 계산된 프레임 재생으로 수행한다."""
+        comp = self.compile(cmd)
+        play_frames(comp.frames, self.drv.sched)
+        self.drv.set_state(comp.end_state)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,183 @@
+# A_gait_cpg.py
+# ------------------------------------------------------------
+# 위상(phase) 기반 연속 보행 생성기 (central pattern generator 방식)
+#
+# crawl_step()은 SHIFT → COUNTER → LIFT → SWING → TOUCHDOWN → UNSHIFT → BODYMOVE
+# 단계를 하나씩 차례로 실행한다. 각 단계가 PHASE_T/BODYMOVE_T 동안 끝까지 기다리므로
+# 몸을 기울이는 동안 다리는 멈춰 있고, 다리를 드는 동안 몸은 멈춰 있다.
+#
+# 여기서는 전역 위상 φ (0 ~ 1, 한 보행 주기) 하나만 시간에 따라 돌리고,
+# 각 다리의 발 위치를 φ의 함수로 계산한다:
+#
+#   다리 위상  φ_i = (φ + offset_i) mod 1
+#   stance   (φ_i < duty)  : 발이 home + 보폭/2 → home - 보폭/2 로 일정 속도로 이동 (몸이 전진)
+#   swing    (φ_i >= duty) : 발을 들어서 home - 보폭/2 → home + 보폭/2 로 이동 (sin 궤적)
+#   body shift             : swing 중인 다리 반대쪽으로 몸을 기울이는 양을 φ에 대한
+#                            부드러운 창(window)으로 계산 → 다음 다리의 shift가 swing과 겹친다.
+#
+# 단계 사이의 대기 시간이 없으므로 같은 보폭에서 더 높은 주기로 걸을 수 있고,
+# 주기(CPG_FREQ_HZ)는 연속적인 값으로 바꿀 수 있다. (set_cpg_freq)
+#
+# CrawlDriver의 보행 레지스트리에 "cpg"로 등록된다:
+#   import A_gait_cpg                 # 등록
+#   drv.set_gait_mode("cpg")
+#   A_gait_cpg.set_cpg_freq(drv, 1.5)
+#   drv.step(cmd)                     # 한 번에 1/CPG_SEGMENTS 주기씩 진행
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from A_crawl_drive import (
+    LIFT_DZ,
+    MOVE_DT,
+    RIGHT_LEGS,
+    SHIFT_MAG,
+    WAVE_ORDER,
+    Cmd,
+    CrawlDriver,
+    body_y_to_local_y,
+    clampf,
+    lerp,
+    register_gait,
+    smoothstep,
+)
+
+# 한 주기 주파수 (Hz, 1초에 몇 주기). 실행 중 set_cpg_freq()로 바꿀 수 있다.
+CPG_FREQ_HZ = 1.0
+CPG_FREQ_MIN = 0.2
+CPG_FREQ_MAX = 3.0
+
+# duty factor (한 다리가 바닥에 있는 시간 비율, 0.75 이상이면 항상 세 발 이상 지지)
+CPG_DUTY = 0.8
+
+# swing 순서 (주기 안에서 1/4씩 어긋나게)
+CPG_ORDER = WAVE_ORDER
+
+CPG_LIFT_DZ = LIFT_DZ * 0.6
+CPG_STEP_SCALE = 1.0            # 한 주기 보폭 = STEP_FWD/LAT/YAW * 이 값
+
+# body shift 크기와, swing 전후로 얼마나 미리/늦게 기울일지 (위상 단위)
+CPG_SHIFT_MAG = SHIFT_MAG
+CPG_SHIFT_LEAD = 0.12
+
+# drv.step() 한 번에 진행하는 주기 비율 = 1 / CPG_SEGMENTS
+# (GaitEngine이 새 명령을 반영하는 단위, A_gait_compiler 캐시 단위)
+CPG_SEGMENTS = 4
+
+
+@dataclass
+class PhaseGait:
+    duty: float = CPG_DUTY
+    order: List[int] = field(default_factory=lambda: list(CPG_ORDER))
+    lift_dz: float = CPG_LIFT_DZ
+    step_scale: float = CPG_STEP_SCALE
+    shift_mag: float = CPG_SHIFT_MAG
+    shift_lead: float = CPG_SHIFT_LEAD
+
+    def offsets(self) -> Dict[int, float]:
+        """order[k] 다리가 φ = k / n 에서 swing을 시작하도록 하는 위상 오프셋."""
+        n = len(self.order)
+        return {leg_id: (self.duty - k / n) % 1.0 for k, leg_id in enumerate(self.order)}
+
+    def body_shift(self, phi: float) -> float:
+        """
+        φ에서의 BODY y shift (+ = 왼쪽). crawl의 SHIFT와 같은 부호:
+        오른쪽 다리가 swing이면 +, 왼쪽 다리면 -.
+        각 다리의 swing 중심에서 최대가 되는 raised-cosine 창을 더한다.
+        """
+        half = (1.0 - self.duty) / 2.0 + self.shift_lead
+        center = self.duty + (1.0 - self.duty) / 2.0
+        out = 0.0
+        for leg_id, off in self.offsets().items():
+            d = abs((phi + off) % 1.0 - center)
+            d = min(d, 1.0 - d)
+            if d < half:
+                w = 0.5 * (1.0 + math.cos(math.pi * d / half))
+                out += w if leg_id in RIGHT_LEGS else -w
+        return self.shift_mag * clampf(out, -1.0, 1.0)
+
+    def foot_offset(self, phi_i: float, stride: Tuple[float, float]) -> Tuple[float, float, float]:
+        """다리 위상 φ_i에서 home 기준 발 위치 (dx, dy, dz). stride = 한 주기 보폭 (LOCAL)."""
+        sx, sy = stride
+        if phi_i < self.duty:
+            p = phi_i / self.duty
+            k = 0.5 - p
+            return (sx * k, sy * k, 0.0)
+
+        q = (phi_i - self.duty) / (1.0 - self.duty)
+        k = -0.5 + smoothstep(q)
+        return (sx * k, sy * k, self.lift_dz * math.sin(math.pi * q))
+
+    def targets(self, drv: CrawlDriver, cmd: Cmd, phi: float) -> Dict[int, Tuple[float, float, float]]:
+        """φ에서 네 다리의 목표 xyz (LOCAL)."""
+        _, _, sz = drv.stand
+        shift = self.body_shift(phi)
+        out = {}
+        for leg_id, off in self.offsets().items():
+            hx, hy, _ = drv.home.get(leg_id, drv.stand)
+            stride = drv._stride_local(leg_id, cmd, self.step_scale)
+            dx, dy, dz = self.foot_offset((phi + off) % 1.0, stride)
+            out[leg_id] = (hx + dx, hy + dy + body_y_to_local_y(leg_id, shift), sz + dz)
+        return out
+
+
+CPG = PhaseGait()
+
+
+def set_cpg_freq(drv: CrawlDriver, hz: float):
+    """보행 주기 주파수 변경 (CPG_FREQ_MIN ~ CPG_FREQ_MAX). 다음 drv.step()부터 반영."""
+    drv.gait_state["cpg_freq"] = clampf(float(hz), CPG_FREQ_MIN, CPG_FREQ_MAX)
+
+
+def cpg_step(drv: CrawlDriver, cmd: Cmd):
+    """
+    "cpg" 보행의 한 스텝: 위상을 1/CPG_SEGMENTS 주기만큼 진행하면서 매 tick 네 다리를 보낸다.
+
+    명령(보폭)이 바뀌면 φ에서 계산한 위치와 실제 발 위치가 어긋나므로,
+    그 차이를 이번 구간 동안 smoothstep으로 줄여서 튀지 않게 이어 붙인다.
+    """
+    drv._maybe_reset_on_direction_change(cmd)
+
+    phi0 = float(drv.gait_state.get("cpg_phase", 0.0))
+    freq = float(drv.gait_state.get("cpg_freq", CPG_FREQ_HZ))
+    seg_t = 1.0 / (freq * CPG_SEGMENTS)
+
+    # 정지: 벗어난 다리를 하나씩 home에 내려놓는다 (바닥에서 끌지 않게)
+    if cmd.vx == 0 and cmd.vy == 0 and cmd.wz == 0:
+        drv._settle_home([(i,) for i in CPG.order], duration=seg_t, lift_dz=CPG.lift_dz)
+        return
+
+    drv._last_move_cmd = cmd
+
+    start = {i: drv.foot[i] for i in (0, 1, 2, 3)}
+    ref0 = CPG.targets(drv, cmd, phi0)
+    err = {i: tuple(a - b for a, b in zip(start[i], ref0[i])) for i in (0, 1, 2, 3)}
+
+    dphi = 1.0 / CPG_SEGMENTS
+    steps = max(1, int(round(seg_t / MOVE_DT)))
+
+    drv._mark("lift")
+    frame: Dict[int, Tuple[float, float, float]] = start
+    s = 0
+    while s <= steps:
+        u = s / steps
+        keep = 1.0 - smoothstep(u)
+        ref = CPG.targets(drv, cmd, phi0 + dphi * u)
+        frame = {i: tuple(r + e * keep for r, e in zip(ref[i], err[i])) for i in (0, 1, 2, 3)}
+
+        if not drv._try_set_legs_xyz(frame):
+            drv.go_stand(duration=0.3)
+            return
+
+        s = drv._next_step(s, steps)
+
+    drv.foot.update(frame)
+    # 구간 경계는 1/CPG_SEGMENTS 격자에 맞춰 둔다 (부동소수 누적 방지 + 컴파일 캐시 재사용)
+    drv.gait_state["cpg_phase"] = (round((phi0 + dphi) * CPG_SEGMENTS) % CPG_SEGMENTS) / CPG_SEGMENTS
+
+
+register_gait("cpg", cpg_step)
@@ -0,0 +1,286 @@
+# A_gait_engine.py
+# ------------------------------------------------------------
+# 명령 입력과 분리되어 백그라운드 스레드에서 도는 보행 엔진
+#
+# A_crawl_drive.main()은 crawl_step()이 한 스텝(약 1초)을 다 끝낼 때까지
+# 키 입력을 읽지 못한다. GaitEngine은:
+#   - 보행을 별도 스레드에서 tick(MOVE_DT) 단위로 재생하고
+#   - 언제든 set_command(vx, vy, wz)로 바뀐 속도 명령을 받아서
+#   - 다리를 들기 전(네 발이 모두 바닥에 있는 구간)이면 그 자리에서 스텝을 중단하고
+#     새 명령의 스텝으로 서보 각도를 부드럽게 이어 붙인다(blend).
+#   - 다리를 든 뒤라면 그 스텝을 끝낸 다음 새 명령을 반영한다.
+#
+# 키보드(main), Flask(/gait), 비전 루프 어디서든 같은 API를 쓴다:
+#   eng = GaitEngine(drv); eng.start()
+#   eng.set_command(1, 0, 0)   # 전진
+#   eng.set_gait_mode("trot")  # 보행 모드 변경
+#   eng.stop()                 # 정지 (엔진은 계속 동작)
+#   eng.close()                # 스레드 종료
+#
+# 실행:
+#   python3 A_gait_engine.py
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import afb2
+
+from A_crawl_drive import GAIT_KEYS, GAIT_MODES, IDLE_HOLD, STAND_XYZ, Cmd, CrawlDriver, KeyReader, gait_keys_help, key_to_cmd
+from A_gait_compiler import CompiledStep, GaitCompiler
+from A_gait_cpg import set_cpg_freq  # "cpg" 보행도 GAIT_MODES에 등록된다
+
+# 속도 명령 양자화 단위. (vx, vy, wz는 -1.0 ~ +1.0)
+# 컴파일된 스텝 캐시가 너무 커지지 않게 이 단위로 반올림한다.
+CMD_QUANTUM = 0.25
+
+# 스텝을 중단하고 새 스텝으로 넘어갈 때, 현재 각도에서 새 스텝 첫 프레임까지 이어 붙이는 tick 수
+BLEND_TICKS = 4
+
+
+def _quantize_cmd(vx: float, vy: float, wz: float) -> Cmd:
+    def q(v: float) -> float:
+        v = max(-1.0, min(1.0, float(v)))
+        v = round(v / CMD_QUANTUM) * CMD_QUANTUM
+        return int(v) if v == int(v) else v
+
+    return Cmd(q(vx), q(vy), q(wz))
+
+
+def _is_zero(cmd: Cmd) -> bool:
+    return cmd.vx == 0 and cmd.vy == 0 and cmd.wz == 0
+
+
+class GaitEngine:
+    def __init__(self, drv: CrawlDriver, compiler: Optional[GaitCompiler] = None):
+        self.drv = drv
+        self.compiler = compiler or GaitCompiler(drv)
+
+        self._lock = threading.Lock()
+        self._cmd = Cmd(0, 0, 0)
+        self._cmd_t = 0.0          # set_command() 시각 (지연 측정용)
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._need_blend = False
+        self._pending_mode: Optional[str] = None
+        self._pending_freq: Optional[float] = None
+
+        # 통계
+        self.steps = 0
+        self.aborts = 0
+        self.max_latency_s = 0.0   # set_command() → 새 명령의 첫 프레임까지 걸린 최대 시간
+        self._pending_latency_t: Optional[float] = None
+
+    # ------------------------------------------------------------
+    # 외부 API (어느 스레드에서 불러도 됨)
+    # ------------------------------------------------------------
+    def set_command(self, vx: float = 0.0, vy: float = 0.0, wz: float = 0.0):
+        """속도 명령 갱신. vx: 전/후, vy: 좌/우, wz: 회전 (각각 -1.0 ~ +1.0)"""
+        cmd = _quantize_cmd(vx, vy, wz)
+        with self._lock:
+            if (cmd.vx, cmd.vy, cmd.wz) != (self._cmd.vx, self._cmd.vy, self._cmd.wz):
+                self._cmd = cmd
+                self._cmd_t = time.perf_counter()
+                self._pending_latency_t = self._cmd_t
+
+    def stop(self):
+        """보행 정지 (제자리에 선다). 엔진 스레드는 계속 돈다."""
+        self.set_command(0, 0, 0)
+
+    def set_gait_mode(self, name: str):
+        """보행 모드 변경 (GAIT_MODES 에 등록된 이름). 엔진 스레드가 다음 스텝 전에 반영한다."""
+        if name not in GAIT_MODES:
+            raise ValueError(f"unknown gait mode {name!r} (available: {', '.join(GAIT_MODES)})")
+        with self._lock:
+            self._pending_mode = name
+
+    def set_cpg_freq(self, hz: float):
+        """"cpg" 보행의 주기 주파수(Hz) 변경. 엔진 스레드가 다음 스텝 전에 반영한다."""
+        with self._lock:
+            self._pending_freq = float(hz)
+
+    def get_command(self) -> Cmd:
+        with self._lock:
+            return self._cmd
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="gait-engine", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 3.0):
+        """엔진 스레드 종료. 진행 중인 스텝은 다리를 내릴 때까지 마친 뒤 끝난다."""
+        self._stop_evt.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def attach_flask(self):
+        """afb2.flask의 POST /gait (vx, vy, wz) 요청을 이 엔진으로 연결한다."""
+        afb2.flask.set_gait_handler(self.set_command)
+
+    def stats(self) -> Dict[str, object]:
+        c = self.get_command()
+        return {
+            "cmd": (c.vx, c.vy, c.wz),
+            "gait_mode": self.drv.gait_mode,
+            "steps": self.steps,
+            "aborts": self.aborts,
+            "max_latency_ms": self.max_latency_s * 1000.0,
+            "compiler": self.compiler.stats(),
+            "tick": self.drv.sched.stats(),
+        }
+
+    # ------------------------------------------------------------
+    # 엔진 스레드
+    # ------------------------------------------------------------
+    def _run(self):
+        drv = self.drv
+        drv.sched.start()
+        resting = False
+
+        while not self._stop_evt.is_set():
+            with self._lock:
+                mode, self._pending_mode = self._pending_mode, None
+                freq, self._pending_freq = self._pending_freq, None
+            if freq is not None:
+                set_cpg_freq(drv, freq)
+            if mode is not None and mode != drv.gait_mode:
+                drv.set_gait_mode(mode)
+                resting = False
+
+            cmd = self.get_command()
+
+            # 정지 명령이고 이미 서 있으면 tick만 돌면서 다음 명령을 기다린다.
+            if _is_zero(cmd) and resting:
+                self._note_latency()
+                drv.sched.tick()
+                continue
+
+            comp = self.compiler.compile(cmd)
+            if self._play(comp, cmd):
+                drv.set_state(comp.end_state)
+                self.steps += 1
+                resting = _is_zero(cmd)
+            else:
+                # 중단: 드라이버 상태는 스텝 시작 전 그대로 (compile()이 되돌려 둠)
+                self.aborts += 1
+                self._need_blend = True
+                resting = False
+
+    def _note_latency(self):
+        t = self._pending_latency_t
+        if t is not None:
+            self._pending_latency_t = None
+            lat = time.perf_counter() - t
+            if lat > self.max_latency_s:
+                self.max_latency_s = lat
+
+    def _send(self, angles: List[Optional[int]]):
+        with self.drv.sched.phase("spi"):
+            afb2.quad.pose(angles)
+
+    def _blend_to(self, frame) -> None:
+        """현재 서보 각도에서 frame까지 BLEND_TICKS 동안 각도 공간에서 보간한다."""
+        cur = afb2.quad.getAngle()
+        target = [a if a is not None else c for a, c in zip(frame, cur)]
+        for j in range(1, BLEND_TICKS + 1):
+            u = j / BLEND_TICKS
+            out: List[Optional[int]] = []
+            for c, t in zip(cur, target):
+                if c is None or t is None:
+                    out.append(t)
+                else:
+                    out.append(int(round(c + (t - c) * u)))
+            self._send(out)
+            self.drv.sched.tick()
+
+    def _play(self, comp: CompiledStep, cmd: Cmd) -> bool:
+        """스텝 재생. 끝까지 재생하면 True, 명령이 바뀌어 중단하면 False."""
+        frames = comp.frames
+        n = len(frames)
+        if n == 0:
+            return True
+
+        k = 0
+        if self._need_blend:
+            self._need_blend = False
+            self._blend_to(frames[0])
+            k = 1
+
+        carry: List[Optional[int]] = [None] * 12
+        while k < n:
+            out = [a if a is not None else c for a, c in zip(frames[k], carry)]
+            self._send(out)
+            self._note_latency()
+            step = self.drv.sched.tick()
+
+            nxt = min(k + step, n - 1) if k < n - 1 else n
+
+            # 다리를 들기 전이면 새 명령/종료 요청에 바로 반응
+            if nxt < comp.abortable_until:
+                if self._stop_evt.is_set() or self.get_command() != cmd:
+                    return False
+
+            carry = [None] * 12
+            for f in frames[k + 1:nxt]:
+                for ch, a in enumerate(f):
+                    if a is not None:
+                        carry[ch] = a
+            k = nxt
+        return True
+
+
+# ============================================================
+# 키보드 데모
+# ============================================================
+
+def main():
+    drv = CrawlDriver()
+    drv.reset()
+
+    print("[INFO] Stand pose:", STAND_XYZ)
+    print("[INFO] Keys: W/S/A/D/Q/E, other = stop. Ctrl+C to exit.")
+    print(f"[INFO] Gait: {gait_keys_help()} (now: {drv.gait_mode})")
+    drv.go_stand(duration=0.6)
+
+    eng = GaitEngine(drv)
+    eng.attach_flask()
+    eng.start()
+
+    last_key_t = 0.0
+    with KeyReader() as kr:
+        try:
+            while True:
+                k = kr.drain_last_key()
+                now = time.time()
+
+                if k is not None and k in GAIT_KEYS:
+                    eng.set_gait_mode(GAIT_KEYS[k])
+                    print(f"[GAIT] mode={GAIT_KEYS[k]}", flush=True)
+                elif k is not None:
+                    c = key_to_cmd(k)
+                    eng.set_command(c.vx, c.vy, c.wz)
+                    last_key_t = now
+
+                if (now - last_key_t) > IDLE_HOLD:
+                    eng.stop()
+
+                time.sleep(0.01)
+
+        except KeyboardInterrupt:
+            print("\n[CTRL+C] Exit")
+
+        finally:
+            eng.close()
+            print(eng.stats())
+            drv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
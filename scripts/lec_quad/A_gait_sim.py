@@ -0,0 +1,129 @@
+# A_gait_sim.py
+# ------------------------------------------------------------
+# 하드웨어 없이(spidev/STM32 없이) CrawlDriver 보행을 돌려 성능을 재는 하네스
+#
+# afb2._spi_bus의 전송 backend를 _spi_sim.SimStm32(가상 STM32)로 바꾸고
+# 보행 모드별로 몇 스텝을 실제 시간 그대로 실행한 뒤 다음을 출력한다:
+#   - 달성한 tick 속도 (목표 1/MOVE_DT Hz), 놓친 마감 / 건너뛴 프레임
+#   - 스텝당 SPI 패킷 수, CMD별 패킷 수, 가상 STM32가 놓친 패킷(파싱 중 도착)
+#   - tick당 IK 시간 / SPI 시간
+#
+# 개발 PC에서 보행 코드를 고친 뒤 돌려 보고, 숫자가 나빠졌으면 보드에 올리기 전에 잡는다.
+#
+# 실행:
+#   python3 A_gait_sim.py                       # crawl/trot/wave/cpg 각 8 스텝, 전진
+#   python3 A_gait_sim.py --gait trot --steps 20 --cmd q
+#   python3 A_gait_sim.py --compiled --json     # A_gait_compiler 재생 경로, JSON 출력
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Dict
+
+os.environ.setdefault("AFB_SPI_BACKEND", "sim")
+
+import afb2
+from afb2._spi_sim import SimStm32
+
+from A_crawl_drive import GAIT_MODES, MOVE_DT, CrawlDriver, key_to_cmd
+from A_quad_api import make_default_api
+import A_gait_cpg  # noqa: F401  ("cpg" 보행 등록)
+
+
+def run_gait(drv: CrawlDriver, sim: SimStm32, mode: str, cmd, steps: int, compiled: bool) -> Dict[str, object]:
+    spi_bus = afb2._spi_bus
+
+    drv.set_gait_mode(mode)
+    drv.go_stand(duration=0.3)
+
+    stepper = drv.step
+    if compiled:
+        from A_gait_compiler import GaitCompiler
+
+        stepper = GaitCompiler(drv).step
+
+    drv.sched.reset_stats()
+    spi_bus.reset_stats()
+    afb2.quad.resetTxStats()
+    sim.reset_stats()
+
+    drv.sched.start()
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        stepper(cmd)
+    wall = time.perf_counter() - t0
+
+    tick = drv.sched.stats()
+    spi = spi_bus.get_stats()
+    phases = tick["phases"]
+    frames = spi["frames"]
+    return {
+        "gait": mode,
+        "steps": steps,
+        "wall_s": wall,
+        "step_ms": wall / steps * 1000.0,
+        "ticks": tick["ticks"],
+        "tick_hz": tick["ticks"] / wall if wall > 0 else 0.0,
+        "target_hz": 1.0 / MOVE_DT,
+        "missed": tick["missed"],
+        "skipped_frames": tick["skipped_frames"],
+        "max_late_ms": tick["max_late_ms"],
+        "spi_frames": frames,
+        "spi_per_step": frames / steps,
+        "spi_per_tick": frames / tick["ticks"] if tick["ticks"] else 0.0,
+        "spi_cmd": spi["cmd"],
+        "ik_ms_per_tick": phases.get("ik", {}).get("per_tick_ms", 0.0),
+        "ik_ms_max": phases.get("ik", {}).get("max_ms", 0.0),
+        "spi_ms_per_tick": phases.get("spi", {}).get("per_tick_ms", 0.0),
+        "sim_dropped": sim.dropped,
+        "sim_bad": sim.bad,
+        "quad_tx": afb2.quad.getTxStats(),
+    }
+
+
+def format_result(r: Dict[str, object]) -> str:
+    return (
+        f"[SIM] {r['gait']:<5} steps={r['steps']} step={r['step_ms']:.0f}ms "
+        f"tick={r['tick_hz']:.1f}/{r['target_hz']:.1f}Hz missed={r['missed']} skipped={r['skipped_frames']} "
+        f"late_max={r['max_late_ms']:.2f}ms\n"
+        f"[SIM]       spi={r['spi_frames']} ({r['spi_per_step']:.1f}/step, {r['spi_per_tick']:.2f}/tick) "
+        f"cmd={r['spi_cmd']} dropped={r['sim_dropped']} bad={r['sim_bad']}\n"
+        f"[SIM]       ik={r['ik_ms_per_tick']:.3f}ms/tick (max {r['ik_ms_max']:.2f}ms) "
+        f"spi={r['spi_ms_per_tick']:.3f}ms/tick"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run CrawlDriver gaits against a simulated STM32 and report timing.")
+    ap.add_argument("--gait", action="append", choices=sorted(GAIT_MODES), help="gait mode (repeatable, default: all)")
+    ap.add_argument("--steps", type=int, default=8, help="steps per gait")
+    ap.add_argument("--cmd", default="w", help="key for the command: w/s/a/d/q/e")
+    ap.add_argument("--compiled", action="store_true", help="play steps through A_gait_compiler")
+    ap.add_argument("--parse-us", type=float, default=60.0, help="simulated STM32 parse time per frame (us)")
+    ap.add_argument("--no-batch", action="store_true", help="simulate firmware without CMD 0x05 batch frames")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+
+    sim = SimStm32(parse_us=args.parse_us, batch=not args.no_batch)
+    afb2._spi_bus.set_transport(sim)
+
+    drv = CrawlDriver(api=make_default_api(enable_flask_stream=False))
+    cmd = key_to_cmd(args.cmd)
+
+    results = []
+    for mode in args.gait or list(GAIT_MODES):
+        r = run_gait(drv, sim, mode, cmd, args.steps, args.compiled)
+        results.append(r)
+        if not args.json:
+            print(format_result(r), flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,12 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:  # numpy is only needed for the batched solver
+    np = None
 
 
 @dataclass(frozen=True)
@@ -121,4 +126,95 @@ def fk_leg_a0(
     y = r * math.sin(a0)
 
     z = z1 - geo.Z_OFF + geo.DZ_A0_A1
-    return (x, y, z)
\ No newline at end of file
+    return (x, y, z)
+
+
+# -----------------------------
+# Batched (NumPy) IK / FK
+# -----------------------------
+@dataclass(frozen=True)
+class IKBatch:
+    angles: "np.ndarray"                 # [N,3] (a0, a1, a2_bend) deg, NaN where unreachable
+    reachable: "np.ndarray"              # [N] bool
+    fk_xyz: Optional["np.ndarray"] = None  # [N,3] FK of angles (only if with_fk=True)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy is required for ik_legs_xyz / fk_legs_a0")
+
+
+def ik_legs_xyz(
+    xyz,
+    geo: LegGeometry,
+    *,
+    elbow: str = "down",
+    with_fk: bool = False,
+) -> IKBatch:
+    """Vectorized ik_leg_a0_xyz() for any number of targets.
+
+    xyz: array-like [N,3] (or [...,3], flattened to N rows), A0 frame, mm.
+    Same math as ik_leg_a0_xyz(), but unreachable targets do not raise IKError:
+    they are reported as False in `reachable` and their angles are NaN.
+    FK validation is skipped unless with_fk=True.
+    """
+    _require_numpy()
+    if elbow not in ("down", "up"):
+        raise ValueError("elbow must be 'down' or 'up'")
+
+    p = np.asarray(xyz, dtype=float).reshape(-1, 3)
+    x, y, z = p[:, 0], p[:, 1], p[:, 2]
+    A = float(geo.A)
+    B = float(geo.B)
+    C = float(geo.C)
+
+    a0 = np.arctan2(y, x)
+
+    r1 = np.hypot(x, y) - A
+    z1 = (z + geo.Z_OFF) - geo.DZ_A0_A1
+
+    D = np.hypot(r1, z1)
+    reachable = (D <= (B + C) + 1e-6) & (D >= abs(B - C) - 1e-6)
+
+    # D == 0 only happens for unreachable targets (B == C is not a real leg);
+    # avoid the division warning and let the mask sort it out.
+    D_safe = np.where(D > 0.0, D, 1.0)
+
+    cos_k = np.clip((B * B + C * C - D * D) / (2.0 * B * C), -1.0, 1.0)
+    a2_bend = math.pi - np.arccos(cos_k)
+
+    alpha = np.arctan2(z1, r1)
+    cos_b = np.clip((B * B + D_safe * D_safe - C * C) / (2.0 * B * D_safe), -1.0, 1.0)
+    beta = np.arccos(cos_b)
+
+    if elbow == "down":
+        a1 = alpha + beta
+    else:
+        a1 = alpha - beta
+        a2_bend = -a2_bend
+
+    angles = np.degrees(np.stack((a0, a1, a2_bend), axis=1))
+    angles[~reachable] = np.nan
+
+    fk = fk_legs_a0(angles, geo) if with_fk else None
+    return IKBatch(angles=angles, reachable=reachable, fk_xyz=fk)
+
+
+def fk_legs_a0(angles, geo: LegGeometry) -> "np.ndarray":
+    """Vectorized fk_leg_a0(). angles: [N,3] deg -> [N,3] (x,y,z) in A0 frame."""
+    _require_numpy()
+    a = np.radians(np.asarray(angles, dtype=float).reshape(-1, 3))
+    a0, a1, a2b = a[:, 0], a[:, 1], a[:, 2]
+    A = float(geo.A)
+    B = float(geo.B)
+    C = float(geo.C)
+
+    shank_angle = a1 - a2b
+    r1 = B * np.cos(a1) + C * np.cos(shank_angle)
+    z1 = B * np.sin(a1) + C * np.sin(shank_angle)
+
+    r = r1 + A
+    return np.stack(
+        (r * np.cos(a0), r * np.sin(a0), z1 - geo.Z_OFF + geo.DZ_A0_A1),
+        axis=1,
+    )
@@ -0,0 +1,291 @@
+# A_ik_lut.py
+"""Grid-based IK lookup table for one LegGeometry.
+
+The table stores (a0, a1, a2_bend) in degrees on a regular x/y/z grid
+(A0 frame, mm) and is solved once with the batched ik_legs_xyz(). Lookups
+use trilinear interpolation; cells that touch an unreachable grid point are
+reported as misses so the caller can fall back to the analytic solver.
+
+Tables are saved as plain .npy files (loaded with mmap_mode="r") next to a
+small .json with the grid parameters and the error report. The file name
+contains a hash of geometry + grid + elbow, so a changed LegGeometry never
+picks up a stale table.
+
+Usage:
+    lut = IKLut.load_or_build(GEO_DEFAULT)
+    print(lut.report)                 # error vs. analytic solver
+    a0, a1, a2 = lut.lookup(60, 120, -50)   # IKError on miss
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from A_ik_3dof_a0 import IKError, LegGeometry, ik_legs_xyz
+
+
+# (x_min, x_max, y_min, y_max, z_min, z_max) in mm, covers the crawl gaits' foot targets
+LUT_BOUNDS_DEFAULT = (-100.0, 200.0, 0.0, 220.0, -130.0, 60.0)
+LUT_STEP_DEFAULT = 5.0  # grid resolution (mm)
+# Grid points whose angle differs from a neighbour by more than this are dropped
+# (yaw wrap near r=0, elbow flips at the workspace edge): interpolating across
+# such a jump would be wildly wrong, so those cells fall back to analytic IK.
+LUT_MAX_JUMP_DEG = 15.0
+LUT_DIR_DEFAULT = Path(__file__).resolve().with_name("ik_lut")
+
+
+def lut_key(geo: LegGeometry, bounds: Sequence[float], step: float, elbow: str) -> str:
+    """Short hash identifying a table (geometry + grid + elbow)."""
+    desc = json.dumps(
+        {
+            "geo": [geo.A, geo.B, geo.C, geo.Z_OFF, geo.DZ_A0_A1],
+            "bounds": [float(b) for b in bounds],
+            "step": float(step),
+            "elbow": elbow,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(desc.encode("utf-8")).hexdigest()[:16]
+
+
+def _drop_discontinuities(table: np.ndarray, max_jump_deg: float) -> np.ndarray:
+    """NaN out grid points next to a jump larger than max_jump_deg (any axis, any joint)."""
+    bad = np.zeros(table.shape[:3], dtype=bool)
+    for axis in range(3):
+        d = np.abs(np.diff(table, axis=axis)).max(axis=-1)
+        jump = d > max_jump_deg  # NaN compares False; NaN points are already misses
+        lo = [slice(None)] * 3
+        hi = [slice(None)] * 3
+        lo[axis] = slice(0, -1)
+        hi[axis] = slice(1, None)
+        bad[tuple(lo)] |= jump
+        bad[tuple(hi)] |= jump
+
+    out = table.copy()
+    out[bad] = np.nan
+    return out
+
+
+class IKLut:
+    def __init__(
+        self,
+        table: np.ndarray,
+        geo: LegGeometry,
+        bounds: Sequence[float],
+        step: float,
+        elbow: str = "down",
+        report: Optional[Dict[str, object]] = None,
+    ):
+        self.table = table  # [nx, ny, nz, 3] float32, NaN = unreachable
+        self.geo = geo
+        self.bounds = tuple(float(b) for b in bounds)
+        self.step = float(step)
+        self.elbow = elbow
+        self.report = report or {}
+
+        self.origin = (self.bounds[0], self.bounds[2], self.bounds[4])
+        self.shape = tuple(int(n) for n in table.shape[:3])
+        self.hits = 0
+        self.misses = 0
+
+    # -----------------------------
+    # build / save / load
+    # -----------------------------
+    @classmethod
+    def build(
+        cls,
+        geo: LegGeometry,
+        bounds: Sequence[float] = LUT_BOUNDS_DEFAULT,
+        step: float = LUT_STEP_DEFAULT,
+        *,
+        elbow: str = "down",
+        max_jump_deg: float = LUT_MAX_JUMP_DEG,
+        report_samples: int = 20000,
+    ) -> "IKLut":
+        x0, x1, y0, y1, z0, z1 = (float(b) for b in bounds)
+        step = float(step)
+        nx = int(round((x1 - x0) / step)) + 1
+        ny = int(round((y1 - y0) / step)) + 1
+        nz = int(round((z1 - z0) / step)) + 1
+
+        gx = x0 + step * np.arange(nx)
+        gy = y0 + step * np.arange(ny)
+        gz = z0 + step * np.arange(nz)
+        grid = np.stack(np.meshgrid(gx, gy, gz, indexing="ij"), axis=-1)
+
+        res = ik_legs_xyz(grid.reshape(-1, 3), geo, elbow=elbow)
+        table = res.angles.reshape(nx, ny, nz, 3)
+        table = _drop_discontinuities(table, max_jump_deg).astype(np.float32)
+
+        lut = cls(table, geo, (x0, x1, y0, y1, z0, z1), step, elbow)
+        lut.report = lut.error_report(report_samples)
+        return lut
+
+    def save(self, directory: Path = LUT_DIR_DEFAULT) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        key = lut_key(self.geo, self.bounds, self.step, self.elbow)
+
+        npy = directory / f"ik_lut_{key}.npy"
+        np.save(npy, self.table)
+        meta = {
+            "key": key,
+            "geo": [self.geo.A, self.geo.B, self.geo.C, self.geo.Z_OFF, self.geo.DZ_A0_A1],
+            "bounds": list(self.bounds),
+            "step": self.step,
+            "elbow": self.elbow,
+            "shape": list(self.table.shape),
+            "report": self.report,
+        }
+        npy.with_suffix(".json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+        return npy
+
+    @classmethod
+    def load(
+        cls,
+        geo: LegGeometry,
+        bounds: Sequence[float] = LUT_BOUNDS_DEFAULT,
+        step: float = LUT_STEP_DEFAULT,
+        *,
+        elbow: str = "down",
+        directory: Path = LUT_DIR_DEFAULT,
+    ) -> Optional["IKLut"]:
+        """Memory-map a saved table, or None if there is none for this key."""
+        key = lut_key(geo, bounds, step, elbow)
+        npy = Path(directory) / f"ik_lut_{key}.npy"
+        if not npy.exists():
+            return None
+
+        table = np.load(npy, mmap_mode="r")
+        report = {}
+        meta_path = npy.with_suffix(".json")
+        if meta_path.exists():
+            report = json.loads(meta_path.read_text(encoding="utf-8")).get("report", {})
+        return cls(table, geo, bounds, step, elbow, report)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        geo: LegGeometry,
+        bounds: Sequence[float] = LUT_BOUNDS_DEFAULT,
+        step: float = LUT_STEP_DEFAULT,
+        *,
+        elbow: str = "down",
+        directory: Path = LUT_DIR_DEFAULT,
+    ) -> "IKLut":
+        lut = cls.load(geo, bounds, step, elbow=elbow, directory=directory)
+        if lut is None:
+            lut = cls.build(geo, bounds, step, elbow=elbow)
+            lut.save(directory)
+        return lut
+
+    # -----------------------------
+    # lookup
+    # -----------------------------
+    def lookup(self, x: float, y: float, z: float) -> Tuple[float, float, float]:
+        """Trilinear lookup. Raises IKError outside the box or near unreachable cells."""
+        fx = (float(x) - self.origin[0]) / self.step
+        fy = (float(y) - self.origin[1]) / self.step
+        fz = (float(z) - self.origin[2]) / self.step
+        nx, ny, nz = self.shape
+
+        if not (0.0 <= fx <= nx - 1 and 0.0 <= fy <= ny - 1 and 0.0 <= fz <= nz - 1):
+            self.misses += 1
+            raise IKError("Target outside IK LUT bounds")
+
+        i = min(int(fx), nx - 2)
+        j = min(int(fy), ny - 2)
+        k = min(int(fz), nz - 2)
+        tx, ty, tz = fx - i, fy - j, fz - k
+
+        # Scalar math on item() reads: much cheaper than NumPy ops on 2x2x2 slices.
+        T = self.table.item
+        sx, sy, sz = 1.0 - tx, 1.0 - ty, 1.0 - tz
+        out = []
+        for q in range(3):
+            c0 = (T(i, j, k, q) * sx + T(i + 1, j, k, q) * tx) * sy + (
+                T(i, j + 1, k, q) * sx + T(i + 1, j + 1, k, q) * tx
+            ) * ty
+            c1 = (T(i, j, k + 1, q) * sx + T(i + 1, j, k + 1, q) * tx) * sy + (
+                T(i, j + 1, k + 1, q) * sx + T(i + 1, j + 1, k + 1, q) * tx
+            ) * ty
+            v = c0 * sz + c1 * tz
+            if v != v:  # NaN
+                self.misses += 1
+                raise IKError("Target near the edge of the reachable workspace (LUT miss)")
+            out.append(v)
+
+        self.hits += 1
+        return (out[0], out[1], out[2])
+
+    def lookup_many(self, xyz) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized lookup: returns (angles[N,3], ok[N]); misses are NaN / False."""
+        p = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        f = (p - np.asarray(self.origin)) / self.step
+        hi = np.asarray(self.shape) - 1
+
+        inside = np.all((f >= 0.0) & (f <= hi), axis=1)
+        f = np.clip(f, 0.0, hi)
+        idx = np.minimum(f.astype(int), hi - 1)
+        t = f - idx
+
+        i, j, k = idx[:, 0], idx[:, 1], idx[:, 2]
+        tx, ty, tz = t[:, 0:1], t[:, 1:2], t[:, 2:3]
+        T = self.table
+        c00 = T[i, j, k] * (1 - tx) + T[i + 1, j, k] * tx
+        c10 = T[i, j + 1, k] * (1 - tx) + T[i + 1, j + 1, k] * tx
+        c01 = T[i, j, k + 1] * (1 - tx) + T[i + 1, j, k + 1] * tx
+        c11 = T[i, j + 1, k + 1] * (1 - tx) + T[i + 1, j + 1, k + 1] * tx
+        c0 = c00 * (1 - ty) + c10 * ty
+        c1 = c01 * (1 - ty) + c11 * ty
+        angles = c0 * (1 - tz) + c1 * tz
+
+        ok = inside & ~np.isnan(angles).any(axis=1)
+        angles[~ok] = np.nan
+        return angles, ok
+
+    # -----------------------------
+    # accuracy
+    # -----------------------------
+    def error_report(self, n_samples: int = 20000, seed: int = 0) -> Dict[str, object]:
+        """Compare interpolated angles against ik_legs_xyz() at random points.
+
+        Only points that are reachable AND covered by the table count towards
+        the error; `coverage` is the fraction of reachable points the table
+        covers (the rest fall back to the analytic solver).
+        """
+        rng = np.random.default_rng(seed)
+        x0, x1, y0, y1, z0, z1 = self.bounds
+        pts = rng.uniform((x0, y0, z0), (x1, y1, z1), size=(int(n_samples), 3))
+
+        ref = ik_legs_xyz(pts, self.geo, elbow=self.elbow)
+        got, ok = self.lookup_many(pts)
+        both = ok & ref.reachable
+
+        n_reach = int(ref.reachable.sum())
+        out: Dict[str, object] = {
+            "samples": int(n_samples),
+            "reachable": n_reach,
+            "coverage": (int(both.sum()) / n_reach) if n_reach else 0.0,
+        }
+        if both.any():
+            err = np.abs(got[both] - ref.angles[both])
+            out["max_err_deg"] = [float(v) for v in err.max(axis=0)]
+            out["mean_err_deg"] = [float(v) for v in err.mean(axis=0)]
+            out["p99_err_deg"] = [float(v) for v in np.percentile(err, 99, axis=0)]
+        return out
+
+
+if __name__ == "__main__":
+    from A_ik_3dof_a0 import LegGeometry as _G
+
+    # Same numbers as A_quad_api.GEO_DEFAULT (importing it would start afb2).
+    geo = _G(A=48, B=64, C=114, Z_OFF=0, DZ_A0_A1=25.0)
+    lut = IKLut.build(geo)
+    path = lut.save()
+    print(f"[LUT] saved {path} shape={lut.table.shape}")
+    print(json.dumps(lut.report, indent=2))
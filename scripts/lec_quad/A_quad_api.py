@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 import time
 
-from A_ik_3dof_a0 import LegGeometry, ik_leg_a0_xyz, fk_leg_a0
-from A_calib import load_calibration, clamp, Calibration
+from A_ik_3dof_a0 import IKError, LegGeometry, ik_leg_a0_xyz, fk_leg_a0
+from A_calib import load_calibration, Calibration
 
 import afb2
 import logging
@@ -38,7 +38,7 @@ class IKResult:
     a1: float
     a2: float
     a1_servo: float
-    fk_xyz: Tuple[float, float, float]
+    fk_xyz: Optional[Tuple[float, float, float]]
 
 
 class QuadLegAPI:
@@ -50,59 +50,42 @@ class QuadLegAPI:
         a1_ref_deg: float = 90.0,
         enable_flask_stream: bool = True,
         quiet_werkzeug: bool = True,
+        lut=None,
     ):
         self.geo = geo
         self.calib = calib
         self.a1_ref_deg = float(a1_ref_deg)
+        # 선택: A_ik_lut.IKLut (같은 geo로 만든 표). 범위 밖/경계 근처는 해석적 IK로 계산
+        if lut is not None and lut.geo != geo:
+            raise ValueError("lut was built for a different LegGeometry")
+        self.lut = lut
 
         if quiet_werkzeug:
             logging.getLogger("werkzeug").setLevel(logging.ERROR)
         if enable_flask_stream:
             afb2.flask.startServer()
 
-    # -----------------------------
-    # calibration helper
-    # -----------------------------
-    def apply_one_debug(self, ch: int, delta_deg: float) -> Tuple[int, float, bool]:
-        center = float(self.calib.center_deg[ch])
-        req = center + float(delta_deg)
-
-        off = float(self.calib.offset_deg[ch])
-        d = int(self.calib.direction[ch])
-        lo = float(self.calib.min_deg[ch])
-        hi = float(self.calib.max_deg[ch])
-
-        out_float = center + d * ((req + off) - center)
-        out_clamped = clamp(out_float, lo, hi)
-        did_clamp = abs(out_clamped - out_float) > 1e-9
-
-        out_int = self.calib.apply_one(ch, req)
-        return out_int, out_float, did_clamp
-
     # -----------------------------
     # IK
     # -----------------------------
-    def ik(self, x: float, y: float, z: float, *, elbow: str = "down") -> IKResult:
-        a0, a1, a2 = ik_leg_a0_xyz(x, y, z, self.geo, elbow=elbow)
-        fx, fy, fz = fk_leg_a0(a0, a1, a2, self.geo)
+    def ik(self, x: float, y: float, z: float, *, elbow: str = "down", with_fk: bool = True) -> IKResult:
+        a0 = None
+        if self.lut is not None and self.lut.elbow == elbow:
+            try:
+                a0, a1, a2 = self.lut.lookup(x, y, z)
+            except IKError:
+                a0 = None
+        if a0 is None:
+            a0, a1, a2 = ik_leg_a0_xyz(x, y, z, self.geo, elbow=elbow)
+        fk_xyz = fk_leg_a0(a0, a1, a2, self.geo) if with_fk else None
 
         a1_servo = self.a1_ref_deg - a1
-        return IKResult(a0=a0, a1=a1, a2=a2, a1_servo=a1_servo, fk_xyz=(fx, fy, fz))
+        return IKResult(a0=a0, a1=a1, a2=a2, a1_servo=a1_servo, fk_xyz=fk_xyz)
 
     # -----------------------------
     # 핵심: 문자열 입력 지원
     # -----------------------------
-    def set_leg_xyz(
-        self,
-        leg_id,
-        x: float,
-        y: float,
-        z: float,
-        *,
-        elbow: str = "down",
-        debug: bool = False,
-    ) -> Tuple[int, int, int]:
-
+    def _resolve_leg_id(self, leg_id) -> int:
         # ⭐ 문자열 처리 (소문자 포함)
         if isinstance(leg_id, str):
             leg_key = leg_id.strip().upper()
@@ -113,31 +96,137 @@ class QuadLegAPI:
 
         if leg_id not in LEG_MAP:
             raise ValueError("leg_id must be 0=FR,1=BR,2=BL,3=FL")
+        return leg_id
+
+    def solve_leg_xyz(
+        self,
+        leg_id,
+        x: float,
+        y: float,
+        z: float,
+        *,
+        elbow: str = "down",
+        debug: bool = False,
+    ) -> Tuple[int, int, int]:
+        """IK + calibration for one leg, without sending anything.
+
+        Returns the calibrated servo angles for the leg's (ch0, ch1, ch2).
+        Raises IKError if the target is unreachable.
+        """
+        leg_id = self._resolve_leg_id(leg_id)
 
         info = LEG_MAP[leg_id]
         leg_name = str(info["name"])
-        leg_idx = int(info["leg_idx"])
         ch0, ch1, ch2 = info["ch"]
         ch0, ch1, ch2 = int(ch0), int(ch1), int(ch2)
 
-        r = self.ik(x, y, z, elbow=elbow)
+        r = self.ik(x, y, z, elbow=elbow, with_fk=False)
 
-        out0, raw0, c0 = self.apply_one_debug(ch0, r.a0)
-        out1, raw1, c1 = self.apply_one_debug(ch1, r.a1_servo)
-        out2, raw2, c2 = self.apply_one_debug(ch2, r.a2)
+        # 이 다리의 3채널만 채우고 나머지 9채널은 None (solve_legs_xyz 와 같은 보정 경로)
+        req: List[Optional[float]] = [None] * 12
+        center = self.calib.center_deg
+        req[ch0] = center[ch0] + r.a0
+        req[ch1] = center[ch1] + r.a1_servo
+        req[ch2] = center[ch2] + r.a2
+        angles, clamped = self.calib.apply_all(req)
+        out0, out1, out2 = angles[ch0], angles[ch1], angles[ch2]
 
         if debug:
+            flags = "".join("C" if clamped[ch] else "-" for ch in (ch0, ch1, ch2))
             print(f"[IK] a0={r.a0:.2f}, a1={r.a1:.2f}, a2={r.a2:.2f}")
-            print(f"[SERVO] {out0}, {out1}, {out2}")
+            print(f"[SERVO] {out0}, {out1}, {out2} clamp={flags}")
             print(f"[LEG] {leg_name}")
 
+        return out0, out1, out2
+
+    def set_leg_xyz(
+        self,
+        leg_id,
+        x: float,
+        y: float,
+        z: float,
+        *,
+        elbow: str = "down",
+        debug: bool = False,
+    ) -> Tuple[int, int, int]:
+        leg_id = self._resolve_leg_id(leg_id)
+        out0, out1, out2 = self.solve_leg_xyz(leg_id, x, y, z, elbow=elbow, debug=debug)
+
+        leg_idx = int(LEG_MAP[leg_id]["leg_idx"])
         afb2.quad.leg(leg_idx, out0, out1, out2)
         return out0, out1, out2
 
+    def solve_legs_xyz(
+        self,
+        targets: Dict[object, Tuple[float, float, float]],
+        *,
+        elbow: str = "down",
+        debug: bool = False,
+    ) -> List[Optional[int]]:
+        """IK + calibration for several legs, without sending anything.
+
+        Returns a 12-channel list for afb2.quad.pose(): angles[ch] for the
+        channels of the given legs, None for every other channel.
+        Raises IKError if any target is unreachable.
+        """
+        # IK per leg, then one batched calibration pass for all 12 channels
+        req: List[Optional[float]] = [None] * 12
+        center = self.calib.center_deg
+        for leg_id, (x, y, z) in targets.items():
+            leg_id = self._resolve_leg_id(leg_id)
+            r = self.ik(x, y, z, elbow=elbow, with_fk=False)
+            ch0, ch1, ch2 = LEG_MAP[leg_id]["ch"]
+            req[ch0] = center[ch0] + r.a0
+            req[ch1] = center[ch1] + r.a1_servo
+            req[ch2] = center[ch2] + r.a2
+            if debug:
+                print(f"[IK] a0={r.a0:.2f}, a1={r.a1:.2f}, a2={r.a2:.2f}")
+
+        angles, clamped = self.calib.apply_all(req)
+
+        if debug:
+            for leg_id in targets:
+                leg_id = self._resolve_leg_id(leg_id)
+                chs = LEG_MAP[leg_id]["ch"]
+                flags = "".join("C" if clamped[ch] else "-" for ch in chs)
+                print(f"[SERVO] {', '.join(str(angles[ch]) for ch in chs)} clamp={flags}")
+                print(f"[LEG] {LEG_MAP[leg_id]['name']}")
+        return angles
+
+    def send_angles(self, angles: List[Optional[int]]) -> None:
+        """Send a 12-channel list from solve_legs_xyz() (None = keep that channel)."""
+        afb2.quad.pose(angles)
+
+    def set_legs_xyz(
+        self,
+        targets: Dict[object, Tuple[float, float, float]],
+        *,
+        elbow: str = "down",
+        debug: bool = False,
+    ) -> Dict[int, Tuple[int, int, int]]:
+        """Set several legs with a single batched servo update.
+
+        targets: {leg_id: (x, y, z)}, leg_id as in set_leg_xyz().
+
+        Every leg is solved first, so an IKError leaves all legs untouched.
+        The resulting angles are sent together via afb2.quad.pose() instead of
+        three packets per leg.
+        """
+        angles = self.solve_legs_xyz(targets, elbow=elbow, debug=debug)
+
+        outs: Dict[int, Tuple[int, int, int]] = {}
+        for leg_id in targets:
+            leg_id = self._resolve_leg_id(leg_id)
+            c0, c1, c2 = LEG_MAP[leg_id]["ch"]
+            outs[leg_id] = (angles[int(c0)], angles[int(c1)], angles[int(c2)])
+
+        if outs:
+            afb2.quad.pose(angles)
+        return outs
+
     # -----------------------------
     def set_all_legs_xyz(self, x: float, y: float, z: float, *, debug: bool = False):
-        for leg_id in (0, 1, 2, 3):
-            self.set_leg_xyz(leg_id, x, y, z, debug=debug)
+        self.set_legs_xyz({leg_id: (x, y, z) for leg_id in (0, 1, 2, 3)}, debug=debug)
 
     # -----------------------------
     def go_center_pose(self, *, debug: bool = True, duration: float = 0.6, steps: int = 20):
@@ -161,13 +250,15 @@ class QuadLegAPI:
 
         for i in range(1, steps + 1):
             ratio = i / steps
+            angles: List[Optional[int]] = [None] * 12
             for leg_idx, center0, center1, center2 in targets:
                 # 시작점을 센터보다 약간 안쪽으로 둔 가상의 위치로 잡고 센터까지 보간한다.
                 # 실제 현재 각도를 모르는 상황에서도 단발 명령보다 부드럽게 들어간다.
-                a0 = int(round(center0))
-                a1 = int(round(center1))
-                a2 = int(round(center2))
-                afb2.quad.leg(leg_idx, a0, a1, a2)
+                base = leg_idx * 3
+                angles[base + 0] = int(round(center0))
+                angles[base + 1] = int(round(center1))
+                angles[base + 2] = int(round(center2))
+            afb2.quad.pose(angles)
             if dt > 0:
                 time.sleep(dt)
 
@@ -189,9 +280,15 @@ CALIB_PATH = Path(__file__).resolve().with_name("calib_quad.json")
 CALIB_DEFAULT = load_calibration(str(CALIB_PATH))
 
 
-def make_default_api():
+def make_default_api(*, use_lut: bool = False, enable_flask_stream: bool = True):
     print(f"[CALIB] using {CALIB_PATH}")
-    return QuadLegAPI(geo=GEO_DEFAULT, calib=CALIB_DEFAULT)
+    lut = None
+    if use_lut:
+        from A_ik_lut import IKLut  # needs numpy
+
+        lut = IKLut.load_or_build(GEO_DEFAULT)
+        print(f"[LUT] {lut.shape} step={lut.step}mm report={lut.report}")
+    return QuadLegAPI(geo=GEO_DEFAULT, calib=CALIB_DEFAULT, lut=lut, enable_flask_stream=enable_flask_stream)
 
 
 # -----------------------------
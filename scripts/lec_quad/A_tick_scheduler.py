@@ -0,0 +1,151 @@
+# A_tick_scheduler.py
+"""Fixed-rate tick scheduler for the quad gait loops.
+
+`time.sleep(MOVE_DT)` after the work makes the real period
+MOVE_DT + IK + SPI time, so gaits slow down under CPU load. TickScheduler
+keeps an absolute deadline grid instead (deadline_k = t0 + k * period):
+tick() only sleeps for what is left of the current period.
+
+When the work overruns a deadline the policy decides what happens:
+  "skip"    : jump to the next future grid point and return how many frames
+              the caller should advance (1 + skipped), so a trajectory keeps
+              its wall-clock duration and simply drops frames.
+  "catchup" : keep the grid; the following ticks return immediately until
+              the schedule is met again (every frame is sent, briefly faster).
+
+A gap much longer than an overrun (idle between motions, a blocking call)
+is treated as a fresh start instead of hundreds of missed deadlines, see
+resync_s.
+
+Usage:
+    sched = TickScheduler(MOVE_DT)
+    s = 0
+    while s <= steps:
+        with sched.phase("ik"):
+            ...
+        s += sched.tick()
+    print(sched.report())
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class TickScheduler:
+    def __init__(self, period: float, *, policy: str = "skip", resync_s: float = 0.25):
+        if policy not in ("skip", "catchup"):
+            raise ValueError("policy must be 'skip' or 'catchup'")
+        self.period = float(period)
+        self.policy = policy
+        self.resync_s = float(resync_s)
+        self._deadline = None  # type: float | None
+        self.reset_stats()
+
+    # -----------------------------
+    # timing
+    # -----------------------------
+    def start(self) -> None:
+        """Begin a new deadline grid one period from now."""
+        self._deadline = time.perf_counter() + self.period
+
+    def tick(self) -> int:
+        """Wait for the current deadline. Returns frames to advance (>= 1)."""
+        now = time.perf_counter()
+        if self._deadline is None or (now - self._deadline) > self.resync_s:
+            if self._deadline is not None:
+                self.resyncs += 1
+            self._deadline = now
+        self.ticks += 1
+
+        late = now - self._deadline
+        if late <= 0.0:
+            time.sleep(-late)
+            woke = time.perf_counter()
+            self._add_phase("wait", woke - now)
+            self._record_late(woke - self._deadline)
+            self._deadline += self.period
+            return 1
+
+        # overrun
+        self.missed += 1
+        self._record_late(late)
+        if self.policy == "catchup":
+            self._deadline += self.period
+            return 1
+
+        skipped = int(late / self.period)
+        self.skipped_frames += skipped
+        self._deadline += (skipped + 1) * self.period
+        return 1 + skipped
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Accumulate the time spent in a named part of the tick."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_phase(name, time.perf_counter() - t0)
+
+    # -----------------------------
+    # stats
+    # -----------------------------
+    def _record_late(self, late: float) -> None:
+        if late > self.max_late_s:
+            self.max_late_s = late
+        self.sum_late_s += max(0.0, late)
+
+    def _add_phase(self, name: str, dt: float) -> None:
+        p = self.phases.get(name)
+        if p is None:
+            p = self.phases[name] = [0, 0.0, 0.0]  # count, total_s, max_s
+        p[0] += 1
+        p[1] += dt
+        if dt > p[2]:
+            p[2] = dt
+
+    def reset_stats(self) -> None:
+        self.ticks = 0
+        self.missed = 0
+        self.skipped_frames = 0
+        self.resyncs = 0
+        self.max_late_s = 0.0
+        self.sum_late_s = 0.0
+        self.phases: Dict[str, list] = {}
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "period_ms": self.period * 1000.0,
+            "policy": self.policy,
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "skipped_frames": self.skipped_frames,
+            "resyncs": self.resyncs,
+            "max_late_ms": self.max_late_s * 1000.0,
+            "mean_late_ms": (self.sum_late_s / self.ticks * 1000.0) if self.ticks else 0.0,
+            "phases": {
+                name: {
+                    "count": c,
+                    "mean_ms": (tot / c * 1000.0) if c else 0.0,
+                    "max_ms": mx * 1000.0,
+                    "per_tick_ms": (tot / self.ticks * 1000.0) if self.ticks else 0.0,
+                }
+                for name, (c, tot, mx) in self.phases.items()
+            },
+        }
+
+    def report(self) -> str:
+        st = self.stats()
+        lines = [
+            f"[TICK] period={st['period_ms']:.1f}ms policy={st['policy']} ticks={st['ticks']} "
+            f"missed={st['missed']} skipped={st['skipped_frames']} resync={st['resyncs']} "
+            f"late(max/mean)={st['max_late_ms']:.2f}/{st['mean_late_ms']:.2f}ms"
+        ]
+        for name, p in st["phases"].items():
+            lines.append(
+                f"[TICK]   {name:<6} per_tick={p['per_tick_ms']:.2f}ms "
+                f"mean={p['mean_ms']:.2f}ms max={p['max_ms']:.2f}ms n={p['count']}"
+            )
+        return "\n".join(lines)
@@ -75,6 +75,7 @@ class IMUFilter:
         self.gz_bias = 0
 
         self.prev = None
+        self.last_seq = 0   # 마지막으로 적분한 IMU 샘플 seq
 
 
     def calibrate(self):
@@ -102,9 +103,30 @@ class IMUFilter:
 
     def update(self):
 
-        ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
+        # i2c_manager 링 버퍼에서 지난 호출 이후 샘플을 한 번에 가져온다
+        # (루프가 IMU 보다 느려도 샘플을 빠뜨리지 않음)
+        hist = afb2.sensor.imu_history(self.last_seq)
 
-        now = time.time()
+        if hist is None:
+            # history 를 지원하지 않는 i2c_manager: 최신 값 1개만 사용
+            ax, ay, az, gx, gy, gz = afb2.sensor.mpu()
+            return self.step(time.time(), ax, ay, az, gx, gy, gz)
+
+        return self.update_batch(hist)
+
+
+    def update_batch(self, hist):
+
+        for ts, ax, ay, az, gx, gy, gz, _temp in hist.samples:
+            self.step(ts, ax, ay, az, gx, gy, gz)
+
+        if hist.samples:
+            self.last_seq = hist.last_seq
+
+        return self.roll, self.pitch
+
+
+    def step(self, now, ax, ay, az, gx, gy, gz):
 
         if self.prev is None:
             self.prev = now
@@ -114,6 +136,7 @@ class IMUFilter:
 
             return self.roll, self.pitch
 
+        # 샘플마다 자기 타임스탬프로 dt 계산
         dt = now - self.prev
         self.prev = now
 
@@ -12,6 +12,50 @@ Packet format (6 bytes):
   [4] DATA1
   [5] CHECKSUM = CMD ^ LEN ^ DATA0 ^ DATA1 (only for present bytes)
 
+Batch servo packet (variable length, CMD 0x05):
+  [0] 0xAA (header)
+  [1] 0x05
+  [2] LEN (= 2 * N, N = 1..12 servos)
+  [3..3+LEN-1] CH0, ANGLE0, CH1, ANGLE1, ...
+  [3+LEN] CHECKSUM = CMD ^ LEN ^ every DATA byte
+
+  Only firmware that advertises CAP_SERVO_BATCH in its CMD 0x0E (caps)
+  reply understands this frame. Otherwise servo_batch_set() falls back to
+  one CMD 0x02 packet per servo.
+
+Background servo writer (optional, see writer_start()):
+  A daemon thread owns servo traffic and drains a 12-slot mailbox at a fixed
+  rate. writer_submit() only stores the latest angle per channel and returns
+  immediately, so control loops never block on SPI and intermediate angles
+  that were overwritten before the next drain are dropped, not queued.
+
+Inter-packet pacing:
+  The earliest start of the next frame is stored as an absolute deadline
+  (end of previous transfer + SPI_PACKET_GAP_SEC) and waited for according
+  to SPI_PACING. The wake-up error against that deadline is recorded in a
+  fixed-bucket histogram, see pacing_stats().
+
+Link speed:
+  probe_link_speed() steps the clock through SPI_PROBE_SPEEDS_HZ with ping
+  bursts and saves the highest clean speed per board (Pi serial) to
+  SPI_LINK_CONFIG_PATH; get_spi() opens the bus at that speed when present.
+
+Responses:
+  Every rx is parsed (parse_response()) and valid replies are cached per
+  echoed CMD, so the firmware's latest reported state is tracked without
+  extra transfers (last_response(), firmware_state(), query()).
+  send_pipelined() returns the reply that acknowledges the previous command.
+
+Transports:
+  get_spi() opens the backend named by SPI_BACKEND (env AFB_SPI_BACKEND):
+  "spidev" (the real bus), "recorder" or "sim" (see _spi_sim.py). Any object
+  with xfer2()/close()/max_speed_hz/mode can be installed with
+  set_transport(), so the gait code runs headless on a dev box.
+
+Statistics:
+  Every frame updates per-CMD counters, lock-wait / gap-wait / xfer2 time
+  histograms and a reply checksum tally, see get_stats().
+
 Notes:
 - This module does NOT do any interactive I/O.
 - Higher-level modules (car.py / quad.py) should call these functions.
@@ -19,43 +63,136 @@ Notes:
 
 from __future__ import annotations
 
+import json
+import os
 import threading
 import time
-from typing import Iterable, List, Optional, Sequence
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-import spidev
+try:
+    import spidev
+except Exception:  # not a Pi: only the "recorder"/"sim" transports are available
+    spidev = None
 
 # -------------------- SPI config --------------------
+# SPI 전송 backend: "spidev"(실제 보드) / "recorder"(전송 기록만) / "sim"(STM32 시뮬레이터)
+SPI_BACKEND = os.environ.get("AFB_SPI_BACKEND", "spidev")
+
 SPI_BUS = 0
 SPI_DEVICE = 0  # CE0
 SPI_MAX_SPEED_HZ = 500_000
 SPI_MODE = 0  # SPI_MODE0
 
+# probe_link_speed()가 보드별로 저장한 최고 안정 클럭을 get_spi()에서 사용할지 여부.
+# 저장된 값이 없으면 SPI_MAX_SPEED_HZ 사용. 환경변수 AFB_SPI_CONFIG 로 파일 경로 변경 가능.
+SPI_USE_SAVED_SPEED = True
+SPI_LINK_CONFIG_PATH = os.environ.get(
+    "AFB_SPI_CONFIG", os.path.expanduser("~/.config/autoformbot/spi_link.json")
+)
+SPI_PROBE_SPEEDS_HZ = (1_000_000, 2_000_000, 4_000_000, 8_000_000)
+SPI_PROBE_BURST = 50  # 속도별 ping 횟수
+
 # STM32가 SPI 패킷을 파싱할 시간을 확보하기 위한 패킷 간 최소 간격.
 # 많은 서보 명령이 연속으로 나갈 때 STM32 수신 파서가 밀리거나 꼬이는 것을 줄인다.
 SPI_PACKET_GAP_SEC = 0.0015
+
+# 패킷 간격을 기다리는 방식.
+#   "sleep"  : time.sleep(남은 시간) (기존 동작, 부하가 있으면 1~2ms 대기가 50~100% 늘어날 수 있음)
+#   "precise": 마감 시각 직전까지 sleep 후 나머지는 perf_counter_ns 로 spin (CPU 사용 증가)
+SPI_PACING = "sleep"
+
+# "precise" 모드에서 마감 시각 이만큼 전부터는 sleep 대신 spin.
+SPI_SPIN_THRESHOLD_SEC = 0.0004
+
+# 12채널 서보 각도를 한 번의 xfer2로 보내는 batch 프레임 사용 여부.
+#   "auto": 펌웨어 caps 응답으로 지원 여부를 한 번 확인한 뒤 결정
+#   "on"  : 항상 batch 프레임 사용 (지원 펌웨어임을 알고 있을 때)
+#   "off" : 항상 기존 servo_set() 경로 사용
+SPI_BATCH_MODE = "auto"
+
+# 백그라운드 서보 writer(writer_start())가 mailbox를 비우는 주기(Hz).
+SERVO_WRITER_HZ = 100.0
 # ---------------------------------------------------
 
-_spi: Optional[spidev.SpiDev] = None
+CMD_GET_MODE = 0x00
+CMD_MOTOR_SPEED = 0x01
+CMD_SERVO_SET = 0x02
+CMD_STATUS = 0x03
+CMD_SERVO_BATCH = 0x05
+CMD_CAPS = 0x0E
+CMD_PING = 0x0F
+
+# Capability bits reported in DATA0 of the CMD_CAPS reply.
+CAP_SERVO_BATCH = 0x01
+
+SERVO_BATCH_MAX = 12
+
+_spi = None  # spidev.SpiDev or a transport from set_transport() / _spi_sim
 _lock = threading.Lock()
-_last_packet_t = 0.0
+_next_packet_ns = 0  # absolute perf_counter_ns() before which no frame may start
 
+# Firmware capability bits (None = not probed yet).
+_caps: Optional[int] = None
+_prev_tx_cmd: Optional[int] = None  # CMD of the previous frame (the one the next rx answers)
 
-def get_spi() -> spidev.SpiDev:
-    """Get (or create) a singleton spidev instance."""
+
+def _open_backend(name: str):
+    if name == "sim":
+        from ._spi_sim import SimStm32
+
+        return SimStm32()
+    if name == "recorder":
+        from ._spi_sim import RecorderTransport
+
+        return RecorderTransport()
+    if name != "spidev":
+        raise ValueError(f"unknown SPI backend {name!r} (spidev / recorder / sim)")
+    if spidev is None:
+        raise RuntimeError(
+            "spidev is not installed; set AFB_SPI_BACKEND=sim (or recorder) to run without hardware"
+        )
+    s = spidev.SpiDev()
+    s.open(SPI_BUS, SPI_DEVICE)
+    return s
+
+
+def get_spi():
+    """Get (or create) the singleton transport (spidev.SpiDev unless SPI_BACKEND says otherwise)."""
     global _spi
     if _spi is None:
-        s = spidev.SpiDev()
-        s.open(SPI_BUS, SPI_DEVICE)
-        s.max_speed_hz = SPI_MAX_SPEED_HZ
+        speed = SPI_MAX_SPEED_HZ
+        if SPI_USE_SAVED_SPEED and SPI_BACKEND == "spidev":
+            speed = load_link_speed() or SPI_MAX_SPEED_HZ
+        s = _open_backend(SPI_BACKEND)
+        s.max_speed_hz = speed
         s.mode = SPI_MODE
         _spi = s
     return _spi
 
 
+def set_transport(transport) -> None:
+    """Replace the SPI transport (e.g. _spi_sim.SimStm32()); the old one is closed.
+
+    Cached firmware caps and the reply pipeline state are reset, since they
+    belong to the previous peer.
+    """
+    global _spi, _caps, _prev_tx_cmd, _last_reply
+    writer_stop()
+    with _lock:
+        old, _spi = _spi, transport
+        _caps = None
+        _prev_tx_cmd = None
+        _last_reply = None
+        _responses.clear()
+    if old is not None and old is not transport:
+        old.close()
+
+
 def close() -> None:
-    """Close the singleton SPI instance."""
+    """Close the singleton SPI instance (stops the servo writer first)."""
     global _spi
+    writer_stop()
     with _lock:
         if _spi is not None:
             try:
@@ -96,6 +233,29 @@ def build_packet(cmd: int, data_bytes: Sequence[int] | None = None) -> List[int]
     return packet
 
 
+def build_batch_packet(pairs: Sequence[Tuple[int, int]]) -> List[int]:
+    """Build a variable-length CMD 0x05 packet from (channel, angle) pairs."""
+    n = len(pairs)
+    if n < 1 or n > SERVO_BATCH_MAX:
+        raise ValueError(f"pairs length must be 1..{SERVO_BATCH_MAX}")
+
+    length = (2 * n) & 0xFF
+    packet = [0xAA, CMD_SERVO_BATCH, length]
+    checksum = CMD_SERVO_BATCH ^ length
+
+    for ch, angle in pairs:
+        if angle < 0 or angle > 180:
+            raise ValueError("angle must be 0..180")
+        b_ch = int(ch) & 0xFF
+        b_ang = int(angle) & 0xFF
+        packet.append(b_ch)
+        packet.append(b_ang)
+        checksum ^= b_ch ^ b_ang
+
+    packet.append(checksum & 0xFF)
+    return packet
+
+
 def send_packet(cmd: int, data_bytes: Sequence[int] | None = None) -> List[int]:
     """Send a packet and return the 6-byte response.
 
@@ -103,33 +263,247 @@ def send_packet(cmd: int, data_bytes: Sequence[int] | None = None) -> List[int]:
     여기에서 패킷 간 최소 간격을 보장하면 servo_set(), leg_set(), crawl_step()
     어느 경로로 호출되더라도 STM32에 너무 빠르게 명령이 몰리지 않는다.
     """
-    global _last_packet_t
+    return _transfer(build_packet(cmd, data_bytes))
+
+
+class _Histogram:
+    """Fixed-bucket histogram (values in microseconds). Not thread-safe by itself."""
+
+    def __init__(self, bounds_us: Sequence[float]) -> None:
+        self.bounds_us = tuple(bounds_us)
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds_us) + 1)  # last bucket = overflow
+        self.count = 0
+        self.total = 0.0
+        self.min = None  # type: Optional[float]
+        self.max = None  # type: Optional[float]
+
+    def add(self, value_us: float) -> None:
+        i = 0
+        for b in self.bounds_us:
+            if value_us < b:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value_us
+        if self.min is None or value_us < self.min:
+            self.min = value_us
+        if self.max is None or value_us > self.max:
+            self.max = value_us
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "bounds_us": list(self.bounds_us),
+            "counts": list(self.counts),
+            "count": self.count,
+            "min_us": self.min,
+            "max_us": self.max,
+            "mean_us": (self.total / self.count) if self.count else None,
+        }
+
+
+# Wake-up error vs. the gap deadline (positive = late).
+_JITTER_BOUNDS_US = (10, 25, 50, 100, 250, 500, 1000, 2000)
+_pacing_hist = _Histogram(_JITTER_BOUNDS_US)
+_pacing_counts = {"waited": 0, "no_wait": 0}
+
+
+def _wait_until_ns(deadline_ns: int, mode: str) -> int:
+    """Block until perf_counter_ns() >= deadline_ns. Returns the wake-up time."""
+    now = time.perf_counter_ns()
+    if mode == "precise":
+        spin_ns = int(SPI_SPIN_THRESHOLD_SEC * 1e9)
+        coarse = deadline_ns - now - spin_ns
+        if coarse > 0:
+            time.sleep(coarse / 1e9)
+        now = time.perf_counter_ns()
+        while now < deadline_ns:
+            now = time.perf_counter_ns()
+        return now
+
+    if deadline_ns > now:
+        time.sleep((deadline_ns - now) / 1e9)
+        now = time.perf_counter_ns()
+    return now
+
+
+# Transport statistics (protected by _lock, see get_stats()).
+_DURATION_BOUNDS_US = (10, 50, 100, 250, 500, 1000, 1500, 2000, 5000, 10000)
+_lock_wait_hist = _Histogram(_DURATION_BOUNDS_US)
+_gap_wait_hist = _Histogram(_DURATION_BOUNDS_US)
+_xfer_hist = _Histogram(_DURATION_BOUNDS_US)
+_cmd_counts: Dict[int, int] = {}
+_rx_counts = {"ok": 0, "checksum_fail": 0, "no_header": 0}
+
+
+@dataclass(frozen=True)
+class SpiResponse:
+    """Parsed full-duplex reply: [0xAA, CMD echo, LEN, D0, D1, CHECKSUM].
+
+    Because the STM32 answers during the *next* transfer, a reply normally
+    belongs to the frame sent before the one that clocked it in. `for_cmd`
+    is that previous CMD (None if unknown) and `acked` is True when the echo
+    matches it.
+    """
+
+    raw: Tuple[int, ...]
+    header_ok: bool
+    checksum_ok: bool
+    cmd: int
+    length: int
+    data: Tuple[int, ...]
+    for_cmd: Optional[int] = None
+    t_ns: int = 0  # perf_counter_ns() when the reply was clocked in
+
+    @property
+    def valid(self) -> bool:
+        return self.header_ok and self.checksum_ok
+
+    @property
+    def acked(self) -> bool:
+        return self.valid and self.for_cmd is not None and self.cmd == self.for_cmd
 
-    tx = build_packet(cmd, data_bytes)
 
+def parse_response(rx: Sequence[int], for_cmd: Optional[int] = None, t_ns: int = 0) -> SpiResponse:
+    """Parse the first 6 bytes of an rx buffer into a SpiResponse."""
+    raw = tuple(int(b) & 0xFF for b in rx)
+    if len(raw) < 6 or raw[0] != 0xAA:
+        return SpiResponse(raw, False, False, 0, 0, (), for_cmd, t_ns)
+
+    cmd, length = raw[1], raw[2]
+    checksum_ok = ((raw[1] ^ raw[2] ^ raw[3] ^ raw[4]) & 0xFF) == raw[5]
+    data = raw[3:3 + min(length, 2)]
+    return SpiResponse(raw, True, checksum_ok, cmd, length, data, for_cmd, t_ns)
+
+
+# Latest valid reply per echoed CMD, updated by every transfer (see last_response()).
+_responses: Dict[int, SpiResponse] = {}
+_last_reply: Optional[SpiResponse] = None
+_ack_counts = {"acked": 0, "mismatch": 0}
+
+
+def _transfer(tx: List[int]) -> List[int]:
+    """Clock one frame out (any length) and return the raw rx bytes."""
+    return list(_xfer(tx).raw)
+
+
+def _xfer(tx: List[int]) -> SpiResponse:
+    """Clock one frame out while enforcing the inter-packet gap; parse the rx."""
+    global _next_packet_ns, _prev_tx_cmd
+
+    t_req = time.perf_counter_ns()
     with _lock:
-        now = time.monotonic()
-        remain = SPI_PACKET_GAP_SEC - (now - _last_packet_t)
-        if remain > 0:
-            time.sleep(remain)
+        now = time.perf_counter_ns()
+        _lock_wait_hist.add((now - t_req) / 1000.0)
+
+        if now < _next_packet_ns:
+            woke = _wait_until_ns(_next_packet_ns, SPI_PACING)
+            _pacing_counts["waited"] += 1
+            _pacing_hist.add((woke - _next_packet_ns) / 1000.0)
+            _gap_wait_hist.add((woke - now) / 1000.0)
+        else:
+            _pacing_counts["no_wait"] += 1
+            _gap_wait_hist.add(0.0)
 
         spi = get_spi()
+        t_x = time.perf_counter_ns()
         rx = spi.xfer2(tx)
-        _last_packet_t = time.monotonic()
+        t_end = time.perf_counter_ns()
+        _next_packet_ns = t_end + int(SPI_PACKET_GAP_SEC * 1e9)
+
+        _xfer_hist.add((t_end - t_x) / 1000.0)
+        cmd = tx[1]
+        _cmd_counts[cmd] = _cmd_counts.get(cmd, 0) + 1
+        resp = parse_response(rx, _prev_tx_cmd, t_end)  # also normalizes to ints
+        _track_reply(resp)
+        _prev_tx_cmd = cmd
+
+    return resp
+
+
+def _track_reply(resp: SpiResponse) -> None:
+    """Update reply counters and the per-CMD state cache (caller holds _lock)."""
+    global _last_reply
+
+    _last_reply = resp
+    if not resp.header_ok:
+        _rx_counts["no_header"] += 1
+        return
+    if not resp.checksum_ok:
+        _rx_counts["checksum_fail"] += 1
+        return
+
+    _rx_counts["ok"] += 1
+    _responses[resp.cmd] = resp
+    if resp.for_cmd is not None:
+        if resp.acked:
+            _ack_counts["acked"] += 1
+        else:
+            _ack_counts["mismatch"] += 1
+
+
+def get_stats() -> Dict[str, object]:
+    """Transport counters and histograms (durations in us) since the last reset.
+
+    - cmd: frames sent per CMD byte (hex string keys)
+    - lock_wait / gap_wait / xfer: time waiting for _lock, for the inter-packet
+      gap, and inside spi.xfer2()
+    - rx: replies with a valid checksum, a bad checksum, or no 0xAA header
+    - ack: valid replies whose echo did / did not match the previous CMD
+    """
+    with _lock:
+        return {
+            "frames": sum(_cmd_counts.values()),
+            "cmd": {f"0x{c:02X}": n for c, n in sorted(_cmd_counts.items())},
+            "lock_wait": _lock_wait_hist.snapshot(),
+            "gap_wait": _gap_wait_hist.snapshot(),
+            "xfer": _xfer_hist.snapshot(),
+            "rx": dict(_rx_counts),
+            "ack": dict(_ack_counts),
+        }
+
+
+def reset_stats() -> None:
+    with _lock:
+        _lock_wait_hist.reset()
+        _gap_wait_hist.reset()
+        _xfer_hist.reset()
+        _cmd_counts.clear()
+        for k in _rx_counts:
+            _rx_counts[k] = 0
+        for k in _ack_counts:
+            _ack_counts[k] = 0
+
+
+def pacing_stats() -> Dict[str, object]:
+    """Inter-packet gap wait statistics (histogram of wake-up lateness in us)."""
+    with _lock:
+        out = _pacing_hist.snapshot()
+        out.update(_pacing_counts)
+    out["mode"] = SPI_PACING
+    out["gap_us"] = SPI_PACKET_GAP_SEC * 1e6
+    return out
+
 
-    # Ensure python list[int]
-    return [int(b) & 0xFF for b in rx]
+def reset_pacing_stats() -> None:
+    with _lock:
+        _pacing_hist.reset()
+        _pacing_counts["waited"] = 0
+        _pacing_counts["no_wait"] = 0
 
 
 # -------------------- Convenience commands --------------------
 
 def ping() -> List[int]:
-    return send_packet(0x0F, [])
+    return send_packet(CMD_PING, [])
 
 
 def get_mode() -> List[int]:
     """Set firmware mode: 0=CAR, 1=QUAD (per current firmware spec)."""
-    return send_packet(0x00, [])
+    return send_packet(CMD_GET_MODE, [])
 
 
 def motor_speed(speed: int) -> List[int]:
@@ -137,19 +511,169 @@ def motor_speed(speed: int) -> List[int]:
     if speed < -255 or speed > 255:
         raise ValueError("speed must be -255..255")
     data = [speed & 0xFF, (speed >> 8) & 0xFF]
-    return send_packet(0x01, data)
+    return send_packet(CMD_MOTOR_SPEED, data)
 
 
 def servo_set(ch: int, angle: int) -> List[int]:
     """Set servo channel (0..255) and angle (0..180) via CMD 0x02."""
     if angle < 0 or angle > 180:
         raise ValueError("angle must be 0..180")
-    return send_packet(0x02, [ch & 0xFF, angle & 0xFF])
+    return send_packet(CMD_SERVO_SET, [ch & 0xFF, angle & 0xFF])
 
 
 def status_request() -> List[int]:
     """Request status via CMD 0x03."""
-    return send_packet(0x03, [])
+    return send_packet(CMD_STATUS, [])
+
+
+# -------------------- Responses / pipelined commands --------------------
+
+def send_pipelined(cmd: int, data_bytes: Sequence[int] | None = None) -> SpiResponse:
+    """Send one command and return the parsed reply clocked in with it.
+
+    The reply belongs to the *previous* command (command N is acknowledged
+    during command N+1), so a control loop gets acknowledgement of its last
+    write for free with every new write: check `resp.acked` / `resp.for_cmd`.
+    """
+    return _xfer(build_packet(cmd, data_bytes))
+
+
+def last_response(cmd: Optional[int] = None, max_age_s: Optional[float] = None) -> Optional[SpiResponse]:
+    """Return the latest valid reply (optionally for a given echoed CMD).
+
+    Returns None if there is none, or if it is older than max_age_s.
+    """
+    with _lock:
+        resp = _last_reply if cmd is None else _responses.get(cmd)
+    if resp is None or (cmd is None and not resp.valid):
+        return None
+    if max_age_s is not None and (time.perf_counter_ns() - resp.t_ns) > max_age_s * 1e9:
+        return None
+    return resp
+
+
+def firmware_state() -> Dict[int, Tuple[int, ...]]:
+    """Latest reported DATA bytes per echoed CMD (tracked from every transfer)."""
+    with _lock:
+        return {c: r.data for c, r in _responses.items()}
+
+
+def query(cmd: int, *, max_age_s: float = 0.0, settle_s: float = 0.005) -> SpiResponse:
+    """Get the firmware's reply to `cmd`, reusing a tracked one if fresh enough.
+
+    If the latest reply for `cmd` is newer than max_age_s no SPI traffic is
+    generated. Otherwise `cmd` is sent, then CMD_STATUS after settle_s to clock
+    the reply in (two transfers, as before) and that parsed rx is returned;
+    check `resp.acked` before trusting its data.
+    """
+    if max_age_s > 0:
+        resp = last_response(cmd, max_age_s)
+        if resp is not None:
+            return resp
+
+    send_packet(cmd, [])
+    if settle_s > 0:
+        time.sleep(settle_s)
+    return _xfer(build_packet(CMD_STATUS, []))
+
+
+# -------------------- Link speed negotiation --------------------
+
+def board_id() -> str:
+    """Raspberry Pi serial number from /proc/cpuinfo ("unknown" if unavailable)."""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Serial"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return "unknown"
+
+
+def _read_link_config() -> Dict[str, Dict[str, float]]:
+    try:
+        with open(SPI_LINK_CONFIG_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def load_link_speed() -> Optional[int]:
+    """Return the saved link speed (Hz) for this board, or None."""
+    entry = _read_link_config().get(board_id())
+    if not isinstance(entry, dict):
+        return None
+    try:
+        speed = int(entry.get("max_speed_hz", 0))
+    except (TypeError, ValueError):
+        return None
+    return speed if speed > 0 else None
+
+
+def save_link_speed(speed_hz: int) -> None:
+    """Persist the link speed for this board (other boards' entries are kept)."""
+    data = _read_link_config()
+    data[board_id()] = {"max_speed_hz": int(speed_hz), "probed_at": time.time()}
+
+    d = os.path.dirname(SPI_LINK_CONFIG_PATH)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = SPI_LINK_CONFIG_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, SPI_LINK_CONFIG_PATH)
+
+
+def _set_speed(speed_hz: int) -> None:
+    spi = get_spi()
+    with _lock:
+        spi.max_speed_hz = int(speed_hz)
+
+
+def _ping_burst(n: int) -> bool:
+    """Send n pings; True if every reply after the first is a valid ping ack."""
+    ping()  # the reply to this one still belongs to the frame before the switch
+    for _ in range(n):
+        if not send_pipelined(CMD_PING).acked:
+            return False
+    return True
+
+
+def probe_link_speed(
+    speeds_hz: Sequence[int] = SPI_PROBE_SPEEDS_HZ,
+    *,
+    burst: int = SPI_PROBE_BURST,
+    persist: bool = True,
+) -> Optional[int]:
+    """Step the SPI clock up and keep the highest speed with clean ping bursts.
+
+    SPI_MAX_SPEED_HZ (base) is checked first: if even that does not produce
+    valid echoed replies (e.g. firmware without reply support), nothing is
+    changed and None is returned. Otherwise speeds are tried in ascending
+    order until the first failure; the bus is left at the best speed, which
+    is also saved for this board when persist=True.
+    """
+    base = int(SPI_MAX_SPEED_HZ)
+    _set_speed(base)  # re-probe from the safe default, not from a saved speed
+    if not _ping_burst(burst):
+        return None
+
+    best = base
+    for speed in sorted(int(x) for x in speeds_hz):
+        if speed <= best:
+            continue
+        _set_speed(speed)
+        if not _ping_burst(burst):
+            break
+        best = speed
+
+    _set_speed(best)
+    if persist:
+        save_link_speed(best)
+    return best
 
 
 def leg_set(leg: int, a1: int, a2: int, a3: int, *, sleep_s: float = 0.0) -> None:
@@ -175,4 +699,263 @@ def leg_set(leg: int, a1: int, a2: int, a3: int, *, sleep_s: float = 0.0) -> Non
         ch = base_ch + i
         servo_set(ch, int(ang))
         if sleep_s > 0:
-            time.sleep(float(sleep_s))
\ No newline at end of file
+            time.sleep(float(sleep_s))
+
+
+# -------------------- Batch servo commands --------------------
+
+def probe_caps() -> int:
+    """Ask the firmware which optional commands it supports.
+
+    The STM32 answers a command during the *next* transfer, so CMD_CAPS is
+    followed by a ping whose rx carries the reply:
+      [0xAA, CMD_CAPS, LEN, CAPS, 0, CHECKSUM]
+
+    Legacy firmware does not know CMD_CAPS and never echoes it, which is
+    reported as 0 (no optional features). The result is cached for
+    batch_supported().
+    """
+    global _caps
+
+    send_packet(CMD_CAPS, [])
+    rx = ping()
+
+    resp = parse_response(rx)
+    caps = resp.data[0] if (resp.valid and resp.cmd == CMD_CAPS and resp.data) else 0
+
+    _caps = caps
+    return caps
+
+
+def batch_supported() -> bool:
+    """Return True if CMD 0x05 batch frames should be used (see SPI_BATCH_MODE)."""
+    if SPI_BATCH_MODE == "on":
+        return True
+    if SPI_BATCH_MODE == "off":
+        return False
+
+    caps = _caps
+    if caps is None:
+        try:
+            caps = probe_caps()
+        except Exception:
+            return False
+    return bool(caps & CAP_SERVO_BATCH)
+
+
+def servo_batch_set(pairs: Iterable[Tuple[int, int]]) -> List[int]:
+    """Set several servos at once.
+
+    With batch-capable firmware, all (channel, angle) pairs go out in a single
+    CMD 0x05 frame (one xfer2, one inter-packet gap). Otherwise each pair is
+    sent with servo_set() as before.
+
+    Returns:
+        The response of the last transfer (empty list if `pairs` is empty).
+    """
+    items = [(int(ch), int(angle)) for ch, angle in pairs]
+    if not items:
+        return []
+
+    for _ch, angle in items:
+        if angle < 0 or angle > 180:
+            raise ValueError("angle must be 0..180")
+
+    if batch_supported():
+        rx: List[int] = []
+        for i in range(0, len(items), SERVO_BATCH_MAX):
+            rx = _transfer(build_batch_packet(items[i:i + SERVO_BATCH_MAX]))
+        return rx
+
+    rx = []
+    for ch, angle in items:
+        rx = servo_set(ch, angle)
+    return rx
+
+
+
+# -------------------- Background servo writer --------------------
+
+class _ServoWriter:
+    """Fixed-rate servo transmitter with a latest-value-wins mailbox."""
+
+    def __init__(self, rate_hz: float) -> None:
+        self.period = 1.0 / max(float(rate_hz), 1.0)
+        self._cv = threading.Condition()
+        self._slots: List[Optional[int]] = [None] * 12
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters (protected by _cv)
+        self.submitted = 0       # channel writes accepted by submit()
+        self.coalesced = 0       # writes that overwrote a not-yet-sent value
+        self.frames = 0          # drain cycles that sent something
+        self.channels_sent = 0   # channel writes that reached the bus
+        self.ticks = 0           # drain cycles (including idle ones)
+        self.missed = 0          # periods skipped because a drain overran
+        self.max_late_s = 0.0    # worst wake-up lateness vs. the deadline
+        self.errors = 0          # SPI exceptions raised while draining
+        self.flush_skipped = 0   # stop(flush=True) calls that found the thread still busy
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="afb-servo-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: float = 1.0) -> None:
+        with self._cv:
+            self._stop = True
+            self._cv.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                # Still inside a transfer: a second drain here could put the
+                # newer frame on the bus before the thread's older one.
+                if flush:
+                    with self._cv:
+                        self.flush_skipped += 1
+                return
+        if flush:
+            self._drain()
+
+    def submit(self, pairs: Iterable[Tuple[int, int]]) -> None:
+        # Validate everything first: a bad pair must not leave half a pose queued
+        items = [(int(ch), int(angle)) for ch, angle in pairs]
+        for ch, angle in items:
+            if not (0 <= ch < 12):
+                raise ValueError("ch must be 0..11")
+            if angle < 0 or angle > 180:
+                raise ValueError("angle must be 0..180")
+
+        with self._cv:
+            for ch, angle in items:
+                if self._slots[ch] is not None:
+                    self.coalesced += 1
+                self._slots[ch] = angle
+                self.submitted += 1
+
+    def _drain(self) -> int:
+        with self._cv:
+            pairs = [(ch, a) for ch, a in enumerate(self._slots) if a is not None]
+            self._slots = [None] * 12
+        if not pairs:
+            return 0
+        try:
+            servo_batch_set(pairs)
+        except Exception:
+            with self._cv:
+                self.errors += 1
+                # Retry next tick, unless a newer angle was submitted meanwhile
+                for ch, angle in pairs:
+                    if self._slots[ch] is None:
+                        self._slots[ch] = angle
+            return 0
+        with self._cv:
+            self.frames += 1
+            self.channels_sent += len(pairs)
+        return len(pairs)
+
+    def _run(self) -> None:
+        period_ns = int(self.period * 1e9)
+        deadline = time.perf_counter_ns() + period_ns
+        while True:
+            # Coarse wait on the condition (so stop() can interrupt it), then let
+            # the shared pacing helper finish the last stretch in "precise" mode.
+            spin_ns = int(SPI_SPIN_THRESHOLD_SEC * 1e9) if SPI_PACING == "precise" else 0
+            with self._cv:
+                if self._stop:
+                    return
+                remain = deadline - spin_ns - time.perf_counter_ns()
+                if remain > 0:
+                    self._cv.wait(timeout=remain / 1e9)
+                    if self._stop:
+                        return
+            woke = _wait_until_ns(deadline, SPI_PACING)
+
+            late = (woke - deadline) / 1e9
+            self._drain()
+
+            now = time.perf_counter_ns()
+            with self._cv:
+                self.ticks += 1
+                if late > self.max_late_s:
+                    self.max_late_s = late
+
+                # Absolute deadlines: the next tick is one period after the previous
+                # deadline, not after the (variable) end of this drain. If the drain
+                # overran whole periods, skip them instead of bursting to catch up.
+                deadline += period_ns
+                if now > deadline:
+                    skipped = (now - deadline) // period_ns + 1
+                    self.missed += skipped
+                    deadline += skipped * period_ns
+
+    def stats(self) -> Dict[str, float]:
+        with self._cv:
+            return {
+                "rate_hz": 1.0 / self.period,
+                "pending": sum(1 for a in self._slots if a is not None),
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "frames": self.frames,
+                "channels_sent": self.channels_sent,
+                "ticks": self.ticks,
+                "missed": self.missed,
+                "max_late_ms": self.max_late_s * 1000.0,
+                "errors": self.errors,
+                "flush_skipped": self.flush_skipped,
+            }
+
+
+_writer: Optional[_ServoWriter] = None
+_writer_lock = threading.Lock()
+
+
+def writer_start(rate_hz: float = SERVO_WRITER_HZ) -> None:
+    """Start the background servo writer (no-op if already running)."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            return
+        w = _ServoWriter(rate_hz)
+        w.start()
+        _writer = w
+
+
+def writer_stop(flush: bool = True) -> None:
+    """Stop the background servo writer; pending angles are sent if flush=True."""
+    global _writer
+    with _writer_lock:
+        w = _writer
+        _writer = None
+    if w is not None:
+        w.stop(flush=flush)
+
+
+def writer_running() -> bool:
+    return _writer is not None
+
+
+def writer_submit(pairs: Iterable[Tuple[int, int]]) -> None:
+    """Queue (channel, angle) pairs for the writer thread. Never blocks on SPI.
+
+    A channel written again before the next drain keeps only the latest angle.
+    Falls back to a synchronous servo_batch_set() if the writer is not running.
+    """
+    items = [(int(ch), int(angle)) for ch, angle in pairs]
+    for _ch, angle in items:
+        if angle < 0 or angle > 180:
+            raise ValueError("angle must be 0..180")
+
+    w = _writer
+    if w is None:
+        servo_batch_set(items)
+        return
+    w.submit(items)
+
+
+def writer_stats() -> Optional[Dict[str, float]]:
+    """Return writer counters, or None if the writer is not running."""
+    w = _writer
+    if w is None:
+        return None
+    return w.stats()
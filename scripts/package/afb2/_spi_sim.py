@@ -0,0 +1,222 @@
+# _spi_sim.py
+"""Hardware-free SPI transports for afb2._spi_bus.
+
+Both classes implement the small part of spidev.SpiDev that _spi_bus uses
+(xfer2(), close(), max_speed_hz, mode), so they can be installed with
+_spi_bus.set_transport() or selected with AFB_SPI_BACKEND=recorder|sim.
+
+RecorderTransport
+  Keeps every tx frame in memory (with a perf_counter_ns timestamp) and
+  answers with zeros, or forwards to an inner transport and records that.
+
+SimStm32
+  Models the STM32 side of the link: validates header/checksum, applies
+  servo/motor commands, answers each command during the next transfer
+  ([0xAA, CMD, LEN, D0, D1, CHK]) and advertises CAP_SERVO_BATCH.
+  Every accepted frame keeps the simulated parser busy for
+  parse_us + parse_us_per_byte * len(frame); a frame that arrives while the
+  parser is still busy is counted as dropped and gets no reply, which is
+  what SPI_PACKET_GAP_SEC is there to prevent on the real board.
+
+Usage:
+    from afb2 import _spi_bus
+    from afb2._spi_sim import SimStm32
+
+    sim = SimStm32()
+    _spi_bus.set_transport(sim)
+    ...
+    print(sim.angles(), sim.stats())
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RecorderTransport:
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.max_speed_hz = 500_000
+        self.mode = 0
+        self.frames: List[Tuple[int, List[int]]] = []  # (perf_counter_ns, tx)
+
+    def xfer2(self, tx: Sequence[int]) -> List[int]:
+        tx = [int(b) & 0xFF for b in tx]
+        self.frames.append((time.perf_counter_ns(), tx))
+        if self.inner is not None:
+            self.inner.max_speed_hz = self.max_speed_hz
+            return list(self.inner.xfer2(tx))
+        return [0] * len(tx)
+
+    def close(self) -> None:
+        if self.inner is not None:
+            self.inner.close()
+
+    def cmd_counts(self) -> Dict[int, int]:
+        out: Dict[int, int] = {}
+        for _, tx in self.frames:
+            if len(tx) > 1:
+                out[tx[1]] = out.get(tx[1], 0) + 1
+        return out
+
+    def clear(self) -> None:
+        self.frames.clear()
+
+
+class SimStm32:
+    # CMD bytes (same values as _spi_bus; duplicated to keep this module standalone)
+    CMD_GET_MODE = 0x00
+    CMD_MOTOR_SPEED = 0x01
+    CMD_SERVO_SET = 0x02
+    CMD_STATUS = 0x03
+    CMD_SERVO_BATCH = 0x05
+    CMD_CAPS = 0x0E
+    CMD_PING = 0x0F
+
+    CAP_SERVO_BATCH = 0x01
+
+    def __init__(
+        self,
+        *,
+        mode: int = 1,
+        batch: bool = True,
+        parse_us: float = 60.0,
+        parse_us_per_byte: float = 4.0,
+        realtime: bool = False,
+        channels: int = 16,
+    ):
+        self.max_speed_hz = 500_000
+        self.spi_mode = 0
+        self.fw_mode = int(mode)
+        self.caps = self.CAP_SERVO_BATCH if batch else 0
+        self.parse_us = float(parse_us)
+        self.parse_us_per_byte = float(parse_us_per_byte)
+        self.realtime = bool(realtime)  # sleep for the wire time of each frame
+
+        self.servo: List[Optional[int]] = [None] * int(channels)
+        self.motor = 0
+        self._reply: List[int] = []
+        self._busy_until_ns = 0
+        self.reset_stats()
+
+    # spidev uses .mode for the SPI mode; keep that name for compatibility
+    @property
+    def mode(self) -> int:
+        return self.spi_mode
+
+    @mode.setter
+    def mode(self, v: int) -> None:
+        self.spi_mode = int(v)
+
+    # -----------------------------
+    # transport
+    # -----------------------------
+    def xfer2(self, tx: Sequence[int]) -> List[int]:
+        tx = [int(b) & 0xFF for b in tx]
+        n = len(tx)
+
+        rx = (self._reply + [0] * n)[:n]
+        self._reply = []
+
+        wire_ns = int(n * 8 * 1e9 / max(1, int(self.max_speed_hz)))
+        t0 = time.perf_counter_ns()
+        if self.realtime:
+            time.sleep(wire_ns / 1e9)
+        arrival = t0 + wire_ns
+
+        self.frames += 1
+        self.bytes += n
+        if arrival < self._busy_until_ns:
+            self.dropped += 1
+            return rx
+
+        self._busy_until_ns = arrival + int((self.parse_us + self.parse_us_per_byte * n) * 1000)
+        self._parse(tx)
+        return rx
+
+    def close(self) -> None:
+        pass
+
+    # -----------------------------
+    # firmware model
+    # -----------------------------
+    def _parse(self, tx: List[int]) -> None:
+        if len(tx) < 4 or tx[0] != 0xAA:
+            self.bad += 1
+            return
+        cmd, length = tx[1], tx[2]
+        if len(tx) < 3 + length + 1:
+            self.bad += 1
+            return
+        data = tx[3:3 + length]
+        chk = cmd ^ length
+        for b in data:
+            chk ^= b
+        # 6-byte frames always carry the checksum in byte 5 (unused data bytes are 0)
+        chk_at = 5 if cmd != self.CMD_SERVO_BATCH else 3 + length
+        if tx[chk_at] != (chk & 0xFF):
+            self.bad += 1
+            return
+
+        self.cmd_counts[cmd] = self.cmd_counts.get(cmd, 0) + 1
+        reply: List[int] = []
+        if cmd == self.CMD_SERVO_SET and length == 2:
+            self._set_servo(data[0], data[1])
+            reply = [data[0], data[1]]
+        elif cmd == self.CMD_SERVO_BATCH:
+            for i in range(0, length - 1, 2):
+                self._set_servo(data[i], data[i + 1])
+            reply = [length // 2]
+        elif cmd == self.CMD_MOTOR_SPEED:
+            self.motor = data[0] if data else 0
+            reply = list(data[:1])
+        elif cmd == self.CMD_GET_MODE:
+            reply = [self.fw_mode]
+        elif cmd == self.CMD_STATUS:
+            reply = [self.fw_mode, 0]
+        elif cmd == self.CMD_CAPS:
+            reply = [self.caps]
+        elif cmd == self.CMD_PING:
+            reply = []
+        else:
+            return  # unknown command: no echo, like legacy firmware
+
+        self._reply = self._frame(cmd, reply)
+
+    def _set_servo(self, ch: int, angle: int) -> None:
+        if 0 <= ch < len(self.servo) and 0 <= angle <= 180:
+            self.servo[ch] = angle
+            self.servo_writes += 1
+
+    @staticmethod
+    def _frame(cmd: int, data: List[int]) -> List[int]:
+        d0 = data[0] if len(data) > 0 else 0
+        d1 = data[1] if len(data) > 1 else 0
+        chk = cmd ^ len(data) ^ d0 ^ d1
+        return [0xAA, cmd, len(data), d0, d1, chk & 0xFF]
+
+    # -----------------------------
+    # inspection
+    # -----------------------------
+    def angles(self, n: int = 12) -> List[Optional[int]]:
+        """Servo angles the simulated firmware has applied (None = never set)."""
+        return list(self.servo[:n])
+
+    def reset_stats(self) -> None:
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.bad = 0
+        self.servo_writes = 0
+        self.cmd_counts: Dict[int, int] = {}
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "dropped": self.dropped,
+            "bad": self.bad,
+            "servo_writes": self.servo_writes,
+            "cmd": {f"0x{c:02X}": n for c, n in sorted(self.cmd_counts.items())},
+        }
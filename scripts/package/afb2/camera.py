@@ -4,12 +4,15 @@ import cv2
 import time
 import sys
 sys.path.append("/usr/lib/python3/dist-packages")  # Add system packages path
-from picamera2 import Picamera2
 
 _picam2 = None
 
 def init(width=640, height=480, framerate=30):
     global _picam2
+    # Imported here so `import afb2` works on machines without a camera stack
+    # (e.g. running the gait code against the SPI simulator).
+    from picamera2 import Picamera2
+
     if _picam2 is not None:
         _picam2.stop()
     _picam2 = Picamera2()
@@ -182,35 +182,49 @@ def angles_view():
 def sensors_api_json():
     """Return sensor readings as JSON for debugging/UI.
 
-    Expected sensor API:
-    - afb2.sensor.distance() -> int mm
-    - afb2.sensor.mpu() -> list/tuple of 6 floats (or values), missing values may be None
+    Distance and IMU come from one afb2.sensor.snapshot() (same instant).
+    - distance_mm: int mm or None
+    - mpu: [ax, ay, az, gx, gy, gz], missing values are None
+    - ts / age_sec / distance_seq / imu_seq: cache time, its age, per-sensor sample counters
     """
-    distance_mm = None
-    mpu = [None] * 6
+    out = {"distance_mm": None, "mpu": [None] * 6, "ts": None, "age_sec": None, "distance_seq": None, "imu_seq": None}
 
-    # Distance
     try:
-        d = afb2.sensor.distance()
-        if d is not None:
-            distance_mm = int(d)
+        snap = afb2.sensor.snapshot()
     except Exception:
-        distance_mm = None
+        snap = None
 
-    # MPU (6-axis)
-    try:
-        vals = afb2.sensor.mpu()
-        if vals is not None:
-            vals = list(vals)
-            if len(vals) < 6:
-                vals = vals + [None] * (6 - len(vals))
-            elif len(vals) > 6:
-                vals = vals[:6]
-            mpu = vals
-    except Exception:
-        mpu = [None] * 6
+    if snap is not None:
+        out["distance_mm"] = snap.distance_mm
+        out["mpu"] = snap.mpu() or [None] * 6
+        out["ts"] = snap.ts
+        out["age_sec"] = snap.age_sec
+        out["distance_seq"] = snap.distance_seq
+        out["imu_seq"] = snap.imu_seq
+
+    return jsonify(out)
+
+# --- SPI stats endpoint ---
+@app.route('/spi_stats.json')
+def spi_stats_api_json():
+    """Return SPI transport / pacing / servo writer statistics as JSON.
+
+    Add ?reset=1 to clear the counters after reading them.
+    """
+    spi_bus = afb2._spi_bus
+    out = {
+        "spi": spi_bus.get_stats(),
+        "pacing": spi_bus.pacing_stats(),
+        "writer": spi_bus.writer_stats(),
+        "quad_tx": afb2.quad.getTxStats(),
+    }
+
+    if request.args.get('reset') == '1':
+        spi_bus.reset_stats()
+        spi_bus.reset_pacing_stats()
+        afb2.quad.resetTxStats()
 
-    return jsonify({"distance_mm": distance_mm, "mpu": mpu})
+    return jsonify(out)
 
 #
 # Each slot keeps the latest *already encoded* JPEG to avoid per-client re-encode.
@@ -628,6 +642,34 @@ def key_control():
             servo_angle = 90
     return ('', 204)
 
+# --- Gait command endpoint ---
+# A gait engine registers itself here (e.g. GaitEngine.attach_flask() in
+# lec_quad/A_gait_engine.py); the handler is called as handler(vx, vy, wz).
+gait_handler = None
+
+def set_gait_handler(fn) -> None:
+    """Route POST /gait velocity commands to fn(vx, vy, wz). None detaches."""
+    global gait_handler
+    gait_handler = fn
+
+@app.route('/gait', methods=['POST'])
+def gait_command():
+    """Update the gait velocity command: form or JSON fields vx, vy, wz (-1.0 .. 1.0)."""
+    handler = gait_handler
+    if handler is None:
+        return ('no gait engine attached', 503)
+
+    src = request.get_json(silent=True) or request.form
+    try:
+        vx = float(src.get('vx', 0))
+        vy = float(src.get('vy', 0))
+        wz = float(src.get('wz', 0))
+    except (TypeError, ValueError):
+        return ('vx, vy, wz must be numbers', 400)
+
+    handler(vx, vy, wz)
+    return ('', 204)
+
 def imwrite():
     global latest_frame
     if latest_frame is not None:
@@ -11,6 +11,7 @@ import os
 import struct
 import time
 from . import _spi_bus
+from . import quad
 
 # ================== Configuration ==================
 # BCM pin connected to STM32 NRST
@@ -110,6 +111,8 @@ def reset() -> None:
             lgpio.gpio_free(h, NRST_GPIO)
             lgpio.gpio_claim_input(h, NRST_GPIO)
 
+            # STM32 restarted: servo outputs no longer match the last-sent cache.
+            quad.clearAngle()
             return
         finally:
             lgpio.gpiochip_close(h)
@@ -225,6 +228,9 @@ def reset() -> None:
         # 5) Release NRST line (High-Z)
         _gpio_set_input(mem, NRST_GPIO)
 
+        # STM32 restarted: servo outputs no longer match the last-sent cache.
+        quad.clearAngle()
+
     except PermissionError as e:
         raise PermissionError(
             "GPIO mmap failed due to insufficient permissions. "
@@ -245,13 +251,14 @@ def reset() -> None:
             os.close(fd)
 
 
-def getMode():
-    """Deprecated. GPIO-based mode detection is no longer used."""
-    _spi_bus.get_mode()
-    time.sleep(float(0.005))
-    rx=_spi_bus.status_request()
-    
-    return rx
+def getMode(max_age_s: float = 0.5):
+    """Deprecated. GPIO-based mode detection is no longer used.
+
+    Returns the raw 6-byte reply to CMD_GET_MODE. A reply tracked within
+    max_age_s is reused without SPI traffic; otherwise GET_MODE + STATUS are sent.
+    """
+    resp = _spi_bus.query(_spi_bus.CMD_GET_MODE, max_age_s=max_age_s, settle_s=0.005)
+    return list(resp.raw)
 
 def stm_release():
     _spi_bus.close()
\ No newline at end of file
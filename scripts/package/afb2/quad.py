@@ -7,56 +7,129 @@ It does NOT open SPI directly; all SPI configuration lives in `_spi_bus.py`.
 Public API:
 - servo(ch, angle): set each servo angle
 - leg(ch, angle0, angle1, angle2): set leg angle
+- pose(angles12): set all 12 servo angles in one SPI transfer
 
 Notes:
+- Writes are delta-suppressed: a channel whose angle equals the last sent
+  angle is skipped (see SKIP_UNCHANGED / FORCE_REFRESH_SEC).
+- getTxStats() reports how many channel writes were sent vs skipped.
+- If the `_spi_bus` servo writer thread is running (startWriter()), leg() and
+  pose() only post angles to its mailbox and return without touching SPI.
 """
 
 from __future__ import annotations
 
 import threading
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from . import _spi_bus
 
-# Last-sent servo angles cache (debug purpose).
+# Skip the SPI write for a channel whose angle did not change since it was last sent.
+SKIP_UNCHANGED = True
+
+# Resend an unchanged channel anyway once this many seconds have passed since it was
+# last sent, so a STM32 reset/brown-out cannot leave a servo stale forever.
+# 0 disables the periodic refresh.
+FORCE_REFRESH_SEC = 1.0
+
+# Last-sent servo angles cache (UI display + delta suppression).
 # Index: channel 0..11, Value: angle int (0..180) or None if never sent.
 _last_angles: List[Optional[int]] = [None] * 12
 _last_angles_lock = threading.Lock()
 
+# time.monotonic() of the last real send per channel (0.0 = never).
+_last_sent_t: List[float] = [0.0] * 12
+
+# Channel-write counters (protected by _last_angles_lock).
+_tx_counts = {"sent": 0, "skipped": 0}
+
+# Held from selection through the send to the cache update, so concurrent
+# callers (gait loop, Flask /key, ...) cannot record angles in a different
+# order than they reached the bus. Taken before _last_angles_lock.
+_send_lock = threading.Lock()
+
 
 def _cache_set_one(ch: int, angle: int) -> None:
     """Update cache for a single channel.
 
-    This is based on 'send attempt' semantics (we cache the value before sending).
+    Called once the value has been sent (or handed to the writer thread), so a
+    failed transfer is retried by the next identical write instead of skipped.
     """
     if 0 <= ch < 12:
         _last_angles[ch] = int(angle)
 
 
-def _cache_set_leg(leg_idx: int, a0: int, a1: int, a2: int) -> None:
-    """Update cache for a leg (3 channels) atomically as one bundle."""
-    base = int(leg_idx) * 3
-    if 0 <= base < 12:
-        # Update all three under one lock so readers see a consistent snapshot.
-        _cache_set_one(base + 0, a0)
-        _cache_set_one(base + 1, a1)
-        _cache_set_one(base + 2, a2)
+def _select_changed(pairs: List[Tuple[int, int]], force: bool = False) -> List[Tuple[int, int]]:
+    """Return the (ch, angle) pairs that must actually be sent.
+
+    Must be called with _last_angles_lock held. Only counts skipped writes; the
+    cache, send time and sent counter are updated by _mark_sent() after the send.
+    """
+    now = time.monotonic()
+    out: List[Tuple[int, int]] = []
 
+    for ch, angle in pairs:
+        if 0 <= ch < 12 and not force and SKIP_UNCHANGED and _last_angles[ch] == angle:
+            stale = FORCE_REFRESH_SEC > 0 and (now - _last_sent_t[ch]) >= FORCE_REFRESH_SEC
+            if not stale:
+                _tx_counts["skipped"] += 1
+                continue
 
-def _servo_set_cached(ch: int, angle: int) -> List[int]:
-    """Cache angle (send-attempt semantics) then send via SPI."""
-    with _last_angles_lock:
-        _cache_set_one(int(ch), int(angle))
-    return _spi_bus.servo_set(int(ch), int(angle))
+        out.append((ch, angle))
 
+    return out
 
-def servo(ch, angle) -> List[int]:
+
+def _mark_sent(pairs: List[Tuple[int, int]]) -> None:
+    """Record pairs as sent: cache, per-channel send time, sent counter."""
+    now = time.monotonic()
+    with _last_angles_lock:
+        for ch, angle in pairs:
+            _cache_set_one(ch, angle)
+            if 0 <= ch < 12:
+                _last_sent_t[ch] = now
+            _tx_counts["sent"] += 1
+
+
+def _send(pairs: List[Tuple[int, int]], force: bool = False) -> None:
+    """Send the changed pairs: to the writer thread if running, else now."""
+    with _send_lock:
+        with _last_angles_lock:
+            todo = _select_changed(pairs, force=force)
+        if not todo:
+            return
+        if _spi_bus.writer_running():
+            _spi_bus.writer_submit(todo)
+        else:
+            _spi_bus.servo_batch_set(todo)
+        _mark_sent(todo)
+
+
+def _servo_set_cached(ch: int, angle: int, force: bool = False) -> List[int]:
+    """Send via SPI unless unchanged, then update the cache."""
+    with _send_lock:
+        with _last_angles_lock:
+            todo = _select_changed([(int(ch), int(angle))], force=force)
+        if not todo:
+            return []
+        if _spi_bus.writer_running():
+            _spi_bus.writer_submit(todo)
+            rx: List[int] = []
+        else:
+            rx = _spi_bus.servo_set(int(ch), int(angle))
+        _mark_sent(todo)
+        return rx
+
+
+def servo(ch, angle, force: bool = False) -> List[int]:
     """Set a single servo channel angle.
 
-    This updates the last-sent cache before attempting the SPI transfer.
+    The last-sent cache is updated once the SPI transfer succeeded.
+    If the angle equals the last sent angle the transfer is skipped and an empty
+    list is returned (pass force=True to always send).
     """
-    return _servo_set_cached(ch, angle)
+    return _servo_set_cached(ch, angle, force=force)
 
 
 def getAngle() -> List[Optional[int]]:
@@ -66,63 +139,113 @@ def getAngle() -> List[Optional[int]]:
 
 
 def clearAngle() -> None:
-    """Clear the last-sent angles cache (set all to None)."""
+    """Clear the last-sent angles cache (set all to None).
+
+    The next write to every channel is sent unconditionally.
+    """
     with _last_angles_lock:
         for i in range(12):
             _last_angles[i] = None
+            _last_sent_t[i] = 0.0
+
+
+def startWriter(rate_hz: float = _spi_bus.SERVO_WRITER_HZ) -> None:
+    """Route servo()/leg()/pose() through the background SPI writer thread."""
+    _spi_bus.writer_start(rate_hz)
+
+
+def stopWriter() -> None:
+    """Stop the background writer (pending angles are flushed synchronously)."""
+    _spi_bus.writer_stop(flush=True)
+
+
+def getTxStats() -> Dict[str, int]:
+    """Return channel-write counters: {"sent": n, "skipped": m}."""
+    with _last_angles_lock:
+        return dict(_tx_counts)
+
+
+def resetTxStats() -> None:
+    """Reset the sent/skipped counters."""
+    with _last_angles_lock:
+        _tx_counts["sent"] = 0
+        _tx_counts["skipped"] = 0
 
 
 # Motor direction + speed
-def leg(ch, a0, a1, a2) -> None:
+def leg(ch, a0, a1, a2, force: bool = False) -> None:
     """Set a 3-DOF leg (3 channels).
 
     Cache update is done as a single bundle so the UI sees all three values together.
-    SPI transfers are still sent sequentially.
+    Only channels whose angle changed are sent (all three with force=True).
     """
     leg_idx = int(ch)
     a0 = int(a0)
     a1 = int(a1)
     a2 = int(a2)
 
-    with _last_angles_lock:
-        _cache_set_leg(leg_idx, a0, a1, a2)
+    for ang in (a0, a1, a2):
+        if ang < 0 or ang > 180:
+            raise ValueError("angles must be 0..180")
+
+    base = leg_idx * 3
+    _send([(base + 0, a0), (base + 1, a1), (base + 2, a2)], force=force)
+
+
+def pose(angles: Sequence[Optional[int]], force: bool = False) -> None:
+    """Set all 12 servo channels at once.
+
+    `angles[ch]` is the angle for channel ch (0..11). A None entry leaves that
+    channel untouched, so a caller can update only some legs.
+
+    With batch-capable firmware the whole pose goes out in a single SPI
+    transfer; otherwise `_spi_bus` falls back to one packet per servo.
+    Unchanged channels are skipped unless force=True.
+    """
+    if len(angles) != 12:
+        raise ValueError("angles must have length 12")
+
+    pairs = [(ch, int(a)) for ch, a in enumerate(angles) if a is not None]
+    for _ch, a in pairs:
+        if a < 0 or a > 180:
+            raise ValueError("angles must be 0..180")
 
-    _spi_bus.leg_set(leg_idx, a0, a1, a2)
+    _send(pairs, force=force)
 
 def legReset() -> None:
 
     time.sleep(0.5)
-    _servo_set_cached(0, 40)
-    _servo_set_cached(3, 135)
-    _servo_set_cached(6, 40)
-    _servo_set_cached(9, 135)
+    _servo_set_cached(0, 40, force=True)
+    _servo_set_cached(3, 135, force=True)
+    _servo_set_cached(6, 40, force=True)
+    _servo_set_cached(9, 135, force=True)
     time.sleep(0.5)
-    _servo_set_cached(1, 0)
-    _servo_set_cached(4, 180)
-    _servo_set_cached(7, 0)
-    _servo_set_cached(10, 180)
+    _servo_set_cached(1, 0, force=True)
+    _servo_set_cached(4, 180, force=True)
+    _servo_set_cached(7, 0, force=True)
+    _servo_set_cached(10, 180, force=True)
     time.sleep(0.5)
-    _servo_set_cached(2, 180)
-    _servo_set_cached(5, 0)
-    _servo_set_cached(8, 180)
-    _servo_set_cached(11, 0)
+    _servo_set_cached(2, 180, force=True)
+    _servo_set_cached(5, 0, force=True)
+    _servo_set_cached(8, 180, force=True)
+    _servo_set_cached(11, 0, force=True)
     time.sleep(0.5)
 
 def stand() -> None:
 
     time.sleep(0.5)
-    _servo_set_cached(0, 90)
-    _servo_set_cached(3, 90)
-    _servo_set_cached(6, 90)
-    _servo_set_cached(9, 90)
+    _servo_set_cached(0, 90, force=True)
+    _servo_set_cached(3, 90, force=True)
+    _servo_set_cached(6, 90, force=True)
+    _servo_set_cached(9, 90, force=True)
     time.sleep(0.5)
-    _servo_set_cached(1, 60)
-    _servo_set_cached(4, 140)
-    _servo_set_cached(7, 40)
-    _servo_set_cached(10, 120)
+    _servo_set_cached(1, 60, force=True)
+    _servo_set_cached(4, 140, force=True)
+    _servo_set_cached(7, 40, force=True)
+    _servo_set_cached(10, 120, force=True)
     time.sleep(0.5)
-    _servo_set_cached(2, 70)
-    _servo_set_cached(5, 110)
-    _servo_set_cached(8, 70)
-    _servo_set_cached(11, 110)
+    _servo_set_cached(2, 70, force=True)
+    _servo_set_cached(5, 110, force=True)
+    _servo_set_cached(8, 70, force=True)
+    _servo_set_cached(11, 110, force=True)
     time.sleep(0.5)
\ No newline at end of file
@@ -2,12 +2,23 @@
 
 """afb.sensor
 
-Real-time I2C sensor access via i2c_manager's Unix Domain Socket (UDS).
+Real-time I2C sensor access via i2c_manager's shared memory / Unix Domain Socket (UDS).
 
 The i2c_manager (systemd service) is the single owner of /dev/i2c-* and publishes
-latest cached readings over a Unix domain *datagram* socket.
+latest cached readings to a shared-memory segment (/dev/shm/afb_i2c_cache) and
+over a Unix domain *datagram* socket.
 
 Public API:
+  - snapshot() -> Optional[SensorSnapshot]
+      Distance + IMU from one fetch (same instant), with sample times, age and
+      per-sensor sequence numbers. Prefer this in control loops that need both.
+  - Subscription(sensors=("imu",), rate_hz=0, callback=None)
+      Every new sample pushed by i2c_manager as it is produced (iterator or
+      callback), with sequence numbers and drop counters. Use it for filters
+      that must see each IMU sample exactly once.
+  - imu_history(since_seq=0) -> Optional[ImuHistory]
+      Every IMU sample newer than since_seq from i2c_manager's ring buffer in
+      one reply, for loops slower than the IMU rate.
   - distance() -> Optional[int]
       Returns distance in millimeters as an int.
   - mpu() -> Optional[list[float]]
@@ -16,89 +27,784 @@ Public API:
 Notes:
   - Returns None if the sensor is not connected, no reading is available yet,
     or UDS IPC fails.
+  - The shared-memory snapshot is preferred: reading it is a few struct
+    unpacks (no syscall, no round trip). The UDS is used when the segment is
+    missing, has another layout version, or is older than SHM_STALE_SEC.
+  - One datagram client socket per process is bound once (abstract namespace)
+    and reused by every call; it is closed at exit and re-created after fork().
+  - Over UDS the readings use i2c_manager's binary protocol (fixed struct
+    layout, negotiated once per socket with {"cmd":"caps"}) and fall back to
+    JSON for older i2c_manager versions. UDS_BINARY = False forces JSON.
   - This module has no dependency on I2C libraries.
 
 """
 
 from __future__ import annotations
 
+import atexit
 import json
+import math
+import mmap
 import os
 import socket
+import struct
+import threading
 import time
-from typing import Any, Dict, Optional
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
 
 
 # Default UDS path used by i2c_manager.py
 DEFAULT_UDS_PATH = "/run/autoformbot/afb_i2c.sock"
 DEFAULT_TIMEOUT_SEC = 0.25
 
+# Shared-memory snapshot written by i2c_manager.py
+DEFAULT_SHM_PATH = "/dev/shm/afb_i2c_cache"
+SHM_STALE_SEC = 1.0   # older snapshot -> ask over UDS instead
+SHM_RETRY_SEC = 1.0   # how often to look for a missing segment again
+
+# Layouts (little-endian). Keep in sync with i2c_manager.py (_IPC_FIELDS, _SHM_*, _BIN_*).
+#
+# IPC fields: ts, distance_mm, distance_ts, ax, ay, az, gx, gy, gz, temp_c, imu_ts
+#             (f64, NaN = None), distance_seq, imu_seq (u64)
+_IPC_FIELDS = struct.Struct("<11d2Q")
+
+# Shared memory: header (magic "AFBS", version u32, seq u64) + IPC fields
+_SHM_MAGIC = b"AFBS"
+_SHM_VERSION = 2
+_SHM_HEADER = struct.Struct("<4sIQ")
+_SHM_SEQ = struct.Struct("<Q")
+_SHM_SEQ_OFFSET = 8
+_SHM_SIZE = _SHM_HEADER.size + _IPC_FIELDS.size
+_SHM_READ_TRIES = 100
+
+# Binary UDS: request  = magic "AFBQ", version u8, cmd u8, reserved u16, id u32
+#             response = magic "AFBR", version u8, status u8, body length u16, id u32
+#                        + IPC fields (status OK only)
+_BIN_REQ_MAGIC = b"AFBQ"
+_BIN_RESP_MAGIC = b"AFBR"
+_BIN_VERSIONS = (1,)
+_BIN_HEADER = struct.Struct("<4sBBHI")
+_BIN_CMD_GET = 0x01
+_BIN_CMD_HISTORY = 0x02
+_BIN_OK = 0
+_BIN_BAD_VERSION = 1
+
+# History: request  = since_seq u64, max samples u16
+#          response = first_seq u64, count u32, lost u32 + count * _IMU_SAMPLE
+#          _IMU_SAMPLE = ts, ax, ay, az, gx, gy, gz, temp_c (f64, NaN = None); seq = first_seq + i
+_BIN_HISTORY_REQ = struct.Struct("<QH")
+_HISTORY_HEADER = struct.Struct("<QII")
+_IMU_SAMPLE = struct.Struct("<8d")
+IMU_HISTORY_MAX = 256  # samples per reply (i2c_manager's cap)
+
+# Push datagram (Subscription): magic "AFBP", version u8, kind u8, reserved u16,
+#                               push seq u32, dropped u32 + IPC fields
+_PUSH_MAGIC = b"AFBP"
+_PUSH_HEADER = struct.Struct("<4sBBHII")
+_PUSH_KIND_NAMES = {1: "distance", 2: "imu"}
+SUB_LEASE_SEC = 5.0  # i2c_manager drops a subscription not renewed within this
+
+# Use the binary UDS protocol when i2c_manager offers it (False = JSON only)
+UDS_BINARY = True
+
+_NAN = float("nan")
+
+
+class _UdsClient:
+    """Long-lived datagram socket connected to one i2c_manager UDS path.
+
+    Bound once to an abstract-namespace address (no file in /tmp, nothing to
+    unlink), so a request is just send() + recv(). One request is in flight
+    at a time (lock); requests carry an "id" that i2c_manager echoes back, so
+    a late reply to a timed-out request is never mistaken for the current one.
+
+    get_values() asks the server once for its binary protocol versions
+    ({"cmd":"caps"}) and then uses fixed-layout binary requests; servers
+    without the binary protocol (or that reject the version) get JSON.
+    """
+
+    def __init__(self, uds_path: str):
+        self.uds_path = uds_path
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.bound_path: Optional[str] = None  # filesystem fallback (non-Linux)
+        self.binary: Optional[int] = None      # negotiated version; 0 = JSON only, None = not asked yet
+
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            try:
+                # Abstract namespace: leading NUL byte, Linux only.
+                s.bind(f"\0afb_i2c_cli_{self.pid}_{id(self):x}")
+            except OSError:
+                self.bound_path = f"/tmp/afb_i2c_cli_{self.pid}_{id(self):x}.sock"
+                if os.path.exists(self.bound_path):
+                    os.unlink(self.bound_path)
+                s.bind(self.bound_path)
+            s.connect(uds_path)
+        except Exception:
+            s.close()
+            self._unlink()
+            raise
+        self.sock = s
+        self.timeout: Optional[float] = None
+
+    def _unlink(self) -> None:
+        if self.bound_path is not None:
+            try:
+                os.unlink(self.bound_path)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        finally:
+            self._unlink()
+
+    def _send(self, data: bytes, timeout_sec: float) -> float:
+        """Send one request; call with self.lock held. Returns the reply deadline."""
+        if self.timeout != timeout_sec:
+            self.sock.settimeout(float(timeout_sec))
+            self.timeout = timeout_sec
+        self.sock.send(data)
+        return time.monotonic() + float(timeout_sec)
+
+    def _next_id(self) -> int:
+        self.seq = (self.seq + 1) & 0x7FFFFFFF
+        return self.seq
+
+    def request(self, payload: Dict[str, Any], timeout_sec: float) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            rid = self._next_id()
+            data = json.dumps(dict(payload, id=rid), separators=(",", ":")).encode("utf-8")
+            deadline = self._send(data, timeout_sec)
+
+            while True:
+                raw = self.sock.recv(65536)  # a full JSON history reply is ~24 KB
+                if raw[:4] != _BIN_RESP_MAGIC:  # else: late binary reply, skip
+                    raw = raw.decode("utf-8", errors="ignore").strip()
+                    if not raw:
+                        return None
+                    out = json.loads(raw)
+                    if not isinstance(out, dict):
+                        return None
+                    # A reply with another id belongs to an earlier request that timed out: skip it.
+                    # Servers that predate request ids do not echo "id": accept their reply.
+                    if out.get("id", rid) == rid:
+                        return out
+                if time.monotonic() >= deadline:
+                    return None
+
+    def _negotiate(self, timeout_sec: float) -> None:
+        caps = self.request({"cmd": "caps"}, timeout_sec)
+        if caps is None:
+            return  # no answer: ask again next time, use JSON meanwhile
+        offered = caps.get("caps", {}).get("binary")
+        common = [v for v in _BIN_VERSIONS if isinstance(offered, list) and v in offered]
+        self.binary = max(common) if common else 0
+
+    def _request_binary(self, cmd: int, args: bytes, timeout_sec: float) -> Optional[bytes]:
+        """One binary request; the reply body, or None if the server rejected it (use JSON)."""
+        with self.lock:
+            rid = self._next_id()
+            req = _BIN_HEADER.pack(_BIN_REQ_MAGIC, self.binary, cmd, 0, rid) + args
+            deadline = self._send(req, timeout_sec)
+
+            while True:
+                raw = self.sock.recv(65536)
+                if raw[:4] == _BIN_RESP_MAGIC and len(raw) >= _BIN_HEADER.size:
+                    _, _version, status, length, resp_id = _BIN_HEADER.unpack_from(raw, 0)
+                    if resp_id == rid:
+                        if status == _BIN_BAD_VERSION:
+                            self.binary = 0  # server does not speak this version after all
+                        if status != _BIN_OK or len(raw) < _BIN_HEADER.size + length:
+                            return None  # e.g. a command this server version does not know
+                        return raw[_BIN_HEADER.size:_BIN_HEADER.size + length]
+                # else: late reply to an earlier request (binary or JSON), skip
+                if time.monotonic() >= deadline:
+                    raise socket.timeout("no matching binary reply")
+
+    def _binary_ready(self, timeout_sec: float) -> bool:
+        if not UDS_BINARY:
+            return False
+        if self.binary is None:
+            self._negotiate(timeout_sec)
+        return bool(self.binary)
+
+    def get_values(self, timeout_sec: float) -> Optional[tuple]:
+        """Latest IPC fields (as _IPC_FIELDS values), binary protocol when available."""
+        if self._binary_ready(timeout_sec):
+            body = self._request_binary(_BIN_CMD_GET, b"", timeout_sec)
+            if body is not None and len(body) == _IPC_FIELDS.size:
+                return _IPC_FIELDS.unpack(body)
+
+        d = self.request({"cmd": "get"}, timeout_sec)
+        return None if d is None else _ipc_dict_to_values(d)
+
+    def history(self, since_seq: int, max_samples: int, timeout_sec: float) -> Optional["ImuHistory"]:
+        """IMU samples newer than since_seq (binary protocol when available)."""
+        max_samples = max(0, min(int(max_samples), 0xFFFF))
+        if self._binary_ready(timeout_sec):
+            body = self._request_binary(_BIN_CMD_HISTORY, _BIN_HISTORY_REQ.pack(since_seq, max_samples), timeout_sec)
+            if body is not None and len(body) >= _HISTORY_HEADER.size:
+                first, count, lost = _HISTORY_HEADER.unpack_from(body, 0)
+                samples = list(_IMU_SAMPLE.iter_unpack(body[_HISTORY_HEADER.size:_HISTORY_HEADER.size + count * _IMU_SAMPLE.size]))
+                return ImuHistory(first, lost, samples)
+
+        d = self.request({"cmd": "history", "since_seq": since_seq, "max": max_samples}, timeout_sec)
+        h = d.get("imu_history") if d else None
+        if not isinstance(h, dict):
+            return None  # i2c_manager without history
+        samples = [tuple(_NAN if v is None else float(v) for v in row) for row in h.get("samples", [])]
+        return ImuHistory(int(h.get("first_seq", since_seq + 1)), int(h.get("lost", 0)), samples)
+
+
+_clients: Dict[str, _UdsClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(uds_path: str) -> _UdsClient:
+    with _clients_lock:
+        c = _clients.get(uds_path)
+        if c is not None and c.pid != os.getpid():
+            # Forked child: the inherited socket is shared with the parent.
+            c = None
+        if c is None:
+            c = _clients[uds_path] = _UdsClient(uds_path)
+        return c
+
+
+def _drop_client(uds_path: str, client: _UdsClient) -> None:
+    with _clients_lock:
+        if _clients.get(uds_path) is client:
+            del _clients[uds_path]
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+def close() -> None:
+    """Close the cached UDS client sockets (also done automatically at exit)."""
+    with _clients_lock:
+        clients = [c for c in _clients.values() if c.pid == os.getpid()]
+        _clients.clear()
+    for c in clients:
+        try:
+            c.close()
+        except Exception:
+            pass
+
+
+atexit.register(close)
+
+
+def _with_client(uds_path: str, fn: Callable[[_UdsClient], Any]) -> Any:
+    """Run fn(client) on the cached client for uds_path; None on timeout / IPC errors.
+
+    A dead connection (i2c_manager restarted, socket re-created) is reconnected once.
+    """
+
+    for attempt in (0, 1):
+        try:
+            client = _get_client(uds_path)
+        except Exception:
+            return None  # server not running (no socket file / connection refused)
+
+        try:
+            return fn(client)
+        except socket.timeout:
+            return None
+        except (ValueError, TypeError, struct.error):
+            return None  # payload not serializable / reply not JSON
+        except OSError:
+            # i2c_manager restarted (socket re-created): reconnect once.
+            _drop_client(uds_path, client)
+            if attempt:
+                return None
+    return None
+
 
 def _uds_rpc(
     payload: Dict[str, Any],
     uds_path: str = DEFAULT_UDS_PATH,
     timeout_sec: float = DEFAULT_TIMEOUT_SEC,
 ) -> Optional[Dict[str, Any]]:
-    """Send a JSON payload to i2c_manager via UDS (datagram) and return JSON response."""
+    """Send a JSON payload to i2c_manager via UDS (datagram) and return JSON response.
+
+    Uses one connected client socket per process and server path (see _UdsClient).
+    """
 
-    if not os.path.exists(uds_path):
+    return _with_client(uds_path, lambda c: c.request(payload, timeout_sec))
+
+
+def _uds_values(
+    uds_path: str = DEFAULT_UDS_PATH,
+    timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+) -> Optional[tuple]:
+    """Latest IPC fields from i2c_manager via UDS (binary protocol when offered, else JSON)."""
+
+    return _with_client(uds_path, lambda c: c.get_values(timeout_sec))
+
+
+class _ShmReader:
+    """Read-only mapping of i2c_manager's shared-memory snapshot (seqlock reader)."""
+
+    def __init__(self, shm_path: str):
+        fd = os.open(shm_path, os.O_RDONLY)
+        try:
+            if os.fstat(fd).st_size < _SHM_SIZE:
+                raise ValueError(f"{shm_path}: too small")
+            self.mm = mmap.mmap(fd, _SHM_SIZE, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+
+        magic, version, _ = _SHM_HEADER.unpack_from(self.mm, 0)
+        if magic != _SHM_MAGIC or version != _SHM_VERSION:
+            self.mm.close()
+            raise ValueError(f"{shm_path}: unknown layout {magic!r} v{version}")
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def read(self) -> Optional[tuple]:
+        """Return the body values from one consistent snapshot, or None."""
+        mm = self.mm
+        for _ in range(_SHM_READ_TRIES):
+            s1 = _SHM_SEQ.unpack_from(mm, _SHM_SEQ_OFFSET)[0]
+            if s1 & 1:
+                continue  # writer in progress
+            body = _IPC_FIELDS.unpack_from(mm, _SHM_HEADER.size)
+            if _SHM_SEQ.unpack_from(mm, _SHM_SEQ_OFFSET)[0] == s1:
+                return body
         return None
 
+
+_shm_readers: Dict[str, _ShmReader] = {}
+_shm_missing: Dict[str, float] = {}  # path -> monotonic time of the last failed open
+
+
+def _get_shm_reader(shm_path: str) -> Optional[_ShmReader]:
+    r = _shm_readers.get(shm_path)
+    if r is not None:
+        return r
+
+    t = time.monotonic()
+    last = _shm_missing.get(shm_path)
+    if last is not None and t - last < SHM_RETRY_SEC:
+        return None
     try:
-        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    except Exception:
+        r = _ShmReader(shm_path)
+    except (OSError, ValueError):
+        _shm_missing[shm_path] = t
         return None
+    # Two threads may race here; the loser's mapping is simply garbage-collected.
+    _shm_readers[shm_path] = r
+    _shm_missing.pop(shm_path, None)
+    return r
 
-    # Datagram sockets require the client to bind to a local path so the server
-    # can reply to that address.
-    pid = os.getpid()
-    nonce = int(time.time() * 1_000_000)
-    client_path = f"/tmp/afb_i2c_cli_{pid}_{nonce}.sock"
 
-    s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
-    try:
-        s.settimeout(float(timeout_sec))
+def _shm_values(shm_path: str) -> Optional[tuple]:
+    """Fresh body values from shared memory, or None if missing/torn/stale."""
+    r = _get_shm_reader(shm_path)
+    if r is None:
+        return None
+    v = r.read()
+    if v is None:
+        return None
+    if abs(time.time() - v[0]) > SHM_STALE_SEC:
+        return None  # i2c_manager stopped (ts = 0) or stalled
+    return v
 
-        # Best-effort cleanup for a stale file
-        try:
-            if os.path.exists(client_path):
-                os.unlink(client_path)
-        except Exception:
-            pass
 
-        s.bind(client_path)
-        s.sendto(data, uds_path)
+def _none_if_nan(v: float) -> Optional[float]:
+    return None if math.isnan(v) else v
 
-        resp, _addr = s.recvfrom(4096)
-        raw = resp.decode("utf-8", errors="ignore").strip()
-        if not raw:
-            return None
 
-        out = json.loads(raw)
-        if isinstance(out, dict):
-            return out
+def _to_float_or_none(x: Any) -> Optional[float]:
+    if x is None or isinstance(x, bool):
         return None
+    try:
+        return float(x)
     except Exception:
         return None
-    finally:
-        try:
-            s.close()
-        except Exception:
-            pass
-        try:
-            if os.path.exists(client_path):
-                os.unlink(client_path)
-        except Exception:
-            pass
+
+
+def _to_vec3_or_none(v: Any) -> Optional[Tuple[float, float, float]]:
+    if not (isinstance(v, (list, tuple)) and len(v) == 3):
+        return None
+    out = tuple(_to_float_or_none(x) for x in v)
+    if None in out:
+        return None
+    return out  # type: ignore[return-value]
+
+
+def _ipc_dict_to_values(d: Dict[str, Any]) -> tuple:
+    """JSON "get" reply -> _IPC_FIELDS values (fields an older i2c_manager lacks become 0/NaN)."""
+    imu = d.get("imu")
+    if not isinstance(imu, dict):
+        imu = {}
+
+    def f(x: Any) -> float:
+        v = _to_float_or_none(x)
+        return _NAN if v is None else v
+
+    accel = _to_vec3_or_none(imu.get("accel_m_s2")) or (_NAN, _NAN, _NAN)
+    gyro = _to_vec3_or_none(imu.get("gyro_rad_s")) or (_NAN, _NAN, _NAN)
+    return (
+        _to_float_or_none(d.get("ts")) or 0.0,
+        f(d.get("distance_mm")),
+        _to_float_or_none(d.get("distance_ts")) or 0.0,
+        *accel,
+        *gyro,
+        f(imu.get("temp_c")),
+        _to_float_or_none(imu.get("ts")) or 0.0,
+        int(d.get("distance_seq") or 0),
+        int(imu.get("seq") or 0),
+    )
+
+
+def _values_to_ipc_dict(v: tuple) -> Dict[str, Any]:
+    """_IPC_FIELDS values -> the JSON "get" reply shape."""
+    ts, dist, dist_ts, ax, ay, az, gx, gy, gz, temp_c, imu_ts, dist_seq, imu_seq = v
+    return {
+        "ts": ts,
+        "distance_mm": _none_if_nan(dist),
+        "distance_ts": dist_ts,
+        "distance_seq": dist_seq,
+        "imu": {
+            "accel_m_s2": None if math.isnan(ax) else [ax, ay, az],
+            "gyro_rad_s": None if math.isnan(gx) else [gx, gy, gz],
+            "temp_c": _none_if_nan(temp_c),
+            "ts": imu_ts,
+            "seq": imu_seq,
+        },
+    }
+
+
+def _fetch_values(
+    uds_path: str,
+    timeout_sec: float,
+    shm_path: Optional[str],
+) -> Optional[Tuple[tuple, str]]:
+    """(IPC field values, "shm" | "uds"): shared memory first, then UDS."""
+
+    if shm_path:
+        v = _shm_values(shm_path)
+        if v is not None:
+            return v, "shm"
+    v = _uds_values(uds_path=uds_path, timeout_sec=timeout_sec)
+    if v is None:
+        return None
+    return v, "uds"
 
 
 def _get_cache(
     uds_path: str = DEFAULT_UDS_PATH,
     timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+    shm_path: Optional[str] = DEFAULT_SHM_PATH,
 ) -> Optional[Dict[str, Any]]:
-    """Fetch latest cached sensor values from i2c_manager."""
+    """Fetch latest cached sensor values from i2c_manager (shared memory first, then UDS)."""
+
+    got = _fetch_values(uds_path, timeout_sec, shm_path)
+    return None if got is None else _values_to_ipc_dict(got[0])
+
+
+@dataclass(frozen=True)
+class SensorSnapshot:
+    """Distance + IMU readings taken from one i2c_manager cache fetch.
+
+    *_ts are unix times of the last new sample of each sensor and *_seq count
+    new samples (unchanged seq = no new reading since the last snapshot).
+    Both are 0 when the sensor never produced a sample or i2c_manager is too
+    old to report them. Missing values are None.
+    """
+
+    ts: float                                   # i2c_manager cache time
+    age_sec: float                              # time.time() - ts when fetched
+    distance_mm: Optional[int]
+    distance_ts: float
+    distance_seq: int
+    accel_m_s2: Optional[Tuple[float, float, float]]
+    gyro_rad_s: Optional[Tuple[float, float, float]]
+    temp_c: Optional[float]
+    imu_ts: float
+    imu_seq: int
+    source: str                                 # "shm" | "uds" | "push"
+    event: Optional[str] = None                 # pushed samples: "imu" | "distance"
+
+    def mpu(self) -> Optional[list[float]]:
+        """[ax, ay, az, gx, gy, gz] like afb2.sensor.mpu(), or None if the IMU has no reading."""
+        if self.accel_m_s2 is None or self.gyro_rad_s is None:
+            return None
+        return [*self.accel_m_s2, *self.gyro_rad_s]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ts": self.ts,
+            "age_sec": self.age_sec,
+            "distance_mm": self.distance_mm,
+            "distance_ts": self.distance_ts,
+            "distance_seq": self.distance_seq,
+            "imu": {
+                "accel_m_s2": list(self.accel_m_s2) if self.accel_m_s2 is not None else None,
+                "gyro_rad_s": list(self.gyro_rad_s) if self.gyro_rad_s is not None else None,
+                "temp_c": self.temp_c,
+                "ts": self.imu_ts,
+                "seq": self.imu_seq,
+            },
+            "source": self.source,
+            "event": self.event,
+        }
+
+
+def _values_to_snapshot(v: tuple, source: str, event: Optional[str] = None) -> SensorSnapshot:
+    ts, dist, dist_ts, ax, ay, az, gx, gy, gz, temp_c, imu_ts, dist_seq, imu_seq = v
+    return SensorSnapshot(
+        ts=ts,
+        age_sec=time.time() - ts,
+        distance_mm=None if math.isnan(dist) else int(round(dist)),
+        distance_ts=dist_ts,
+        distance_seq=dist_seq,
+        accel_m_s2=None if math.isnan(ax) else (ax, ay, az),
+        gyro_rad_s=None if math.isnan(gx) else (gx, gy, gz),
+        temp_c=_none_if_nan(temp_c),
+        imu_ts=imu_ts,
+        imu_seq=imu_seq,
+        source=source,
+        event=event,
+    )
+
+
+def snapshot(
+    uds_path: str = DEFAULT_UDS_PATH,
+    timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+    shm_path: Optional[str] = DEFAULT_SHM_PATH,
+) -> Optional[SensorSnapshot]:
+    """Return distance + IMU from a single fetch as a SensorSnapshot.
+
+    Returns None if i2c_manager cannot be reached. shm_path=None skips shared memory (UDS only).
+    """
+
+    got = _fetch_values(uds_path, timeout_sec, shm_path)
+    if got is None:
+        return None
+    return _values_to_snapshot(*got)
+
+
+@dataclass(frozen=True)
+class ImuHistory:
+    """IMU samples from i2c_manager's ring buffer, oldest first.
+
+    samples[i] = (ts, ax, ay, az, gx, gy, gz, temp_c) with seq first_seq + i
+    (temp_c is NaN when unknown). lost = samples after since_seq that had
+    already left the ring (the caller fell more than IMU_RING_SIZE behind).
+    """
+
+    first_seq: int
+    lost: int
+    samples: list
+
+    @property
+    def last_seq(self) -> int:
+        """Seq of the newest returned sample; pass it as since_seq next time."""
+        return self.first_seq + len(self.samples) - 1
+
+
+def imu_history(
+    since_seq: int = 0,
+    max_samples: int = IMU_HISTORY_MAX,
+    uds_path: str = DEFAULT_UDS_PATH,
+    timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+) -> Optional[ImuHistory]:
+    """Return every IMU sample newer than since_seq in one reply (at most max_samples).
+
+    Keep calling with since_seq = previous .last_seq to integrate all samples
+    even when the caller runs slower than the IMU. since_seq=0 returns what
+    the ring holds. Returns None if i2c_manager cannot be reached or has no
+    history support.
+    """
+
+    return _with_client(uds_path, lambda c: c.history(int(since_seq), max_samples, timeout_sec))
+
+
+class Subscription:
+    """Samples pushed by i2c_manager as they are produced (no polling).
+
+        sub = Subscription(("imu",))            # raises if i2c_manager refuses
+        for snap in sub:                        # blocks; every new IMU sample once
+            ...
+        snap = sub.get(timeout_sec=0.1)         # one sample or None
+        sub.close()
+
+        Subscription(("imu",), callback=fn)     # fn(snap) on a background thread
+
+    Each sample is a SensorSnapshot (source="push", event="imu"|"distance")
+    holding the whole cache at that instant. rate_hz > 0 asks the daemon to
+    send at most that many samples per second. The lease is renewed in the
+    background of get(); a restarted i2c_manager is re-subscribed.
+
+    Counters: received, missed (gaps in the push sequence: samples the daemon
+    could not deliver or that were lost), server_dropped (daemon's count of
+    pushes that did not fit in this socket's buffer).
+    """
+
+    def __init__(
+        self,
+        sensors: Sequence[str] = ("imu",),
+        rate_hz: float = 0.0,
+        callback: Optional[Callable[[SensorSnapshot], None]] = None,
+        uds_path: str = DEFAULT_UDS_PATH,
+        lease_sec: float = SUB_LEASE_SEC,
+        timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+    ):
+        self.uds_path = uds_path
+        self.request = {
+            "cmd": "subscribe",
+            "sensors": list(sensors),
+            "rate_hz": float(rate_hz),
+            "lease_sec": float(lease_sec),
+        }
+        self.lease_sec = float(lease_sec)
+        self.received = 0
+        self.missed = 0
+        self.server_dropped = 0
+        self._last_push_seq: Optional[int] = None
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.bound_path: Optional[str] = None
+
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            try:
+                s.bind(f"\0afb_i2c_sub_{os.getpid()}_{id(self):x}")
+            except OSError:
+                self.bound_path = f"/tmp/afb_i2c_sub_{os.getpid()}_{id(self):x}.sock"
+                if os.path.exists(self.bound_path):
+                    os.unlink(self.bound_path)
+                s.bind(self.bound_path)
+            # Not connect()ed: pushes come from i2c_manager's separate push socket.
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 256 * 1024)
+        except Exception:
+            s.close()
+            self._unlink()
+            raise
+        self.sock = s
+
+        try:
+            self._subscribe(timeout_sec)
+        except Exception:
+            self.close()
+            raise
+
+        if callback is not None:
+            self._thread = threading.Thread(target=self._run_callback, args=(callback,), daemon=True)
+            self._thread.start()
+
+    def _unlink(self) -> None:
+        if self.bound_path is not None:
+            try:
+                os.unlink(self.bound_path)
+            except OSError:
+                pass
+
+    def _subscribe(self, timeout_sec: float) -> None:
+        """Send subscribe and wait for the ack (pushes arriving first are kept for get())."""
+        self.sock.settimeout(timeout_sec)
+        self.sock.sendto(json.dumps(self.request, separators=(",", ":")).encode("utf-8"), self.uds_path)
+        while True:
+            raw = self.sock.recv(4096)
+            if raw[:4] == _PUSH_MAGIC:
+                continue
+            reply = json.loads(raw.decode("utf-8", errors="ignore"))
+            if not isinstance(reply, dict) or "subscribed" not in reply:
+                err = reply.get("error") if isinstance(reply, dict) else reply
+                raise RuntimeError(f"i2c_manager refused subscribe: {err}")
+            self._renew_at = time.monotonic() + self.lease_sec / 3.0
+            return
+
+    def _renew(self) -> None:
+        """Re-send subscribe without waiting (the ack is skipped by get())."""
+        data = json.dumps(self.request, separators=(",", ":")).encode("utf-8")
+        try:
+            self.sock.sendto(data, self.uds_path)
+            self._renew_at = time.monotonic() + self.lease_sec / 3.0
+        except OSError:
+            self._renew_at = time.monotonic() + 0.5  # i2c_manager not running: try again soon
+
+    def get(self, timeout_sec: Optional[float] = None) -> Optional[SensorSnapshot]:
+        """Next pushed sample, or None after timeout_sec (None = wait) or close()."""
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        while not self._closed.is_set():
+            now = time.monotonic()
+            if now >= self._renew_at:
+                self._renew()
+            wait = self._renew_at - now
+            if deadline is not None:
+                if now >= deadline:
+                    return None
+                wait = min(wait, deadline - now)
+
+            try:
+                self.sock.settimeout(max(0.001, wait))
+                raw = self.sock.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                return None  # closed
+
+            if raw[:4] != _PUSH_MAGIC or len(raw) < _PUSH_HEADER.size + _IPC_FIELDS.size:
+                continue  # subscribe ack / error reply
+            _, _version, kind, _, push_seq, dropped = _PUSH_HEADER.unpack_from(raw, 0)
+            values = _IPC_FIELDS.unpack_from(raw, _PUSH_HEADER.size)
+
+            if self._last_push_seq is not None:
+                self.missed += (push_seq - self._last_push_seq - 1) & 0xFFFFFFFF
+            self._last_push_seq = push_seq
+            self.server_dropped = dropped
+            self.received += 1
+            return _values_to_snapshot(values, "push", _PUSH_KIND_NAMES.get(kind))
+        return None
+
+    def __iter__(self) -> Iterator[SensorSnapshot]:
+        while not self._closed.is_set():
+            snap = self.get(timeout_sec=0.5)
+            if snap is not None:
+                yield snap
+
+    def _run_callback(self, callback: Callable[[SensorSnapshot], None]) -> None:
+        for snap in self:
+            try:
+                callback(snap)
+            except Exception:
+                traceback.print_exc()
+
+    def stats(self) -> Dict[str, int]:
+        return {"received": self.received, "missed": self.missed, "server_dropped": self.server_dropped}
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            self.sock.sendto(b'{"cmd":"unsubscribe"}', self.uds_path)
+        except OSError:
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        try:
+            self.sock.close()
+        finally:
+            self._unlink()
+
+    def __enter__(self) -> "Subscription":
+        return self
 
-    return _uds_rpc({"cmd": "get"}, uds_path=uds_path, timeout_sec=timeout_sec)
+    def __exit__(self, *exc) -> None:
+        self.close()
 
 def _to_float_or_nl(x: Any) -> Any:
         if x is None:
@@ -114,13 +820,14 @@ def _to_float_or_nl(x: Any) -> Any:
 def distance(
     uds_path: str = DEFAULT_UDS_PATH,
     timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+    shm_path: Optional[str] = DEFAULT_SHM_PATH,
 ) -> Optional[int]:
     """Return distance in millimeters as int.
 
-    Returns None if unavailable.
+    Returns None if unavailable. shm_path=None skips shared memory (UDS only).
     """
 
-    d = _get_cache(uds_path=uds_path, timeout_sec=timeout_sec)
+    d = _get_cache(uds_path=uds_path, timeout_sec=timeout_sec, shm_path=shm_path)
     if not d:
         return None
 
@@ -143,13 +850,14 @@ def distance(
 def mpu(
     uds_path: str = DEFAULT_UDS_PATH,
     timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+    shm_path: Optional[str] = DEFAULT_SHM_PATH,
 ) -> Optional[list[float]]:
     """Return 6-axis IMU values as [ax, ay, az, gx, gy, gz].
 
-    Returns None if unavailable.
+    Returns None if unavailable. shm_path=None skips shared memory (UDS only).
     """
 
-    d = _get_cache(uds_path=uds_path, timeout_sec=timeout_sec)
+    d = _get_cache(uds_path=uds_path, timeout_sec=timeout_sec, shm_path=shm_path)
     if not d:
         return None
 